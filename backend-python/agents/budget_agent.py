@@ -1,4 +1,8 @@
-from typing import Dict, Any, List
+import copy
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from services.gazetteer import gazetteer
+from agents.cost_model import cost_model, CostModel
 
 
 class BudgetAgent:
@@ -14,12 +18,9 @@ class BudgetAgent:
         "luxury": {"min": 5000, "max": 12000}    # 5-star hotels, resorts
     }
     
-    # Meal costs per person (realistic Indian dining costs)
-    MEAL_COSTS = {
-        "budget": {"breakfast": 80, "lunch": 150, "dinner": 200},      # Street food, local eateries
-        "mid_range": {"breakfast": 150, "lunch": 300, "dinner": 400}, # Standard restaurants
-        "luxury": {"breakfast": 300, "lunch": 600, "dinner": 800}     # Fine dining
-    }
+    # Meal rates and entry fees live in the shared cost model
+    MEAL_COSTS = CostModel.MEAL_COSTS
+    ACTIVITY_COSTS = CostModel.ACTIVITY_COSTS
     
     # Transportation base costs (₹ per km or fixed rates)
     TRANSPORT_COSTS = {
@@ -29,85 +30,161 @@ class BudgetAgent:
         "flexible": {"per_km": 12, "city_daily": 300}            # Mix of auto/taxi/bus
     }
     
-    # Activity/Attraction entry fees (average per person)
-    ACTIVITY_COSTS = {
-        "monument": 50,      # Historical monuments (ASI sites)
-        "fort": 100,         # Forts and palaces
-        "museum": 50,        # Museums
-        "temple": 0,         # Temples (usually free)
-        "beach": 0,          # Beaches (free)
-        "waterfall": 20,     # Waterfalls (nominal entry)
-        "viewpoint": 0,      # Viewpoints (usually free)
-        "park": 30,          # Parks and gardens
-        "adventure": 800,    # Adventure activities (parasailing, rafting, etc.)
-        "water_sports": 500, # Water sports
-        "amusement_park": 600, # Theme/amusement parks
-        "zoo": 80,           # Zoos and aquariums
-        "wildlife": 1500,    # Wildlife sanctuary (with safari)
-        "boat_ride": 200,    # Boat rides
-        "shopping": 500      # Shopping budget per visit
-    }
+    # Monte Carlo cost ranges: draws per plan, fixed seed so ranges are reproducible
+    SIMULATION_DRAWS = 4000
+    SIMULATION_SEED = 7
+    # Lognormal sigma on transport (fuel prices, surge fares)
+    TRANSPORT_SPREAD = 0.15
     
     async def process(
         self, 
         itinerary: List[Dict[str, Any]], 
         budget: float, 
-        trip_details: Dict[str, Any]
+        trip_details: Dict[str, Any],
+        trip_costs: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
-        """Process itinerary and validate budget"""
+        """Process itinerary and validate budget (trip_costs: precomputed trip_costs(trip_details))"""
         print("💰 Budget Agent: Validating budget...")
         
         try:
-            # Calculate costs
-            breakdown = self._calculate_budget_breakdown(itinerary, trip_details)
-            total = breakdown["total"]
-            within_budget = total <= budget
-            remaining = budget - total if within_budget else 0
-            overspent = total - budget if not within_budget else 0
-            
-            adjustments = []
-            if not within_budget:
-                adjustments = self._generate_adjustments(breakdown, budget, total, trip_details)
-            
-            result = {
-                "withinBudget": within_budget,
-                "budget": budget,
-                "estimated": total,
-                "remaining": remaining,
-                "overspent": overspent,
-                "breakdown": breakdown,
-                "perPerson": self._calculate_per_person_cost(breakdown, trip_details),
-                "adjustments": adjustments,
-                "savingsOpportunities": self._identify_savings(breakdown, trip_details),
-                "budgetUtilization": round((total / budget) * 100, 1) if budget > 0 else 0
-            }
-            
-            status = "✅" if within_budget else "⚠️"
-            print(f"{status} Budget Agent: ₹{total:,.0f} / ₹{budget:,.0f} ({result['budgetUtilization']}%)")
-            return result
+            # Per-category running totals; edits patch these instead of re-walking the plan
+            ledger = self.build_ledger(itinerary)
+            return self.validate_ledger(ledger, budget, trip_details, trip_costs)
             
         except Exception as e:
             print(f"❌ Budget Agent Error: {str(e)}")
             raise
     
+    def validate_ledger(
+        self,
+        ledger: Dict[str, Any],
+        budget: float,
+        trip_details: Dict[str, Any],
+        trip_costs: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """budgetValidation from an itinerary's ledger (no pass over the activities)"""
+        breakdown = self._breakdown_from_ledger(ledger, trip_details, trip_costs)
+        total = breakdown["total"]
+        within_budget = total <= budget
+        remaining = budget - total if within_budget else 0
+        overspent = total - budget if not within_budget else 0
+        
+        adjustments = []
+        if not within_budget:
+            adjustments = self._generate_adjustments(breakdown, budget, total, trip_details)
+        
+        result = {
+            "withinBudget": within_budget,
+            "budget": budget,
+            "estimated": total,
+            "remaining": remaining,
+            "overspent": overspent,
+            "breakdown": breakdown,
+            "perPerson": self._calculate_per_person_cost(breakdown, trip_details),
+            "adjustments": adjustments,
+            "savingsOpportunities": self._identify_savings(breakdown, trip_details),
+            "budgetUtilization": round((total / budget) * 100, 1) if budget > 0 else 0,
+            "costRange": self.simulate_costs(ledger, trip_details, budget, breakdown),
+            "ledger": ledger
+        }
+        
+        status = "✅" if within_budget else "⚠️"
+        print(f"{status} Budget Agent: ₹{total:,.0f} / ₹{budget:,.0f} ({result['budgetUtilization']}%)")
+        return result
+    
+    def build_ledger(self, itinerary: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Tier- and group-size-independent running totals: meal counts by kind and
+        per-person count/sum/sum of squares of entry and activity fees
+        """
+        ledger = {
+            "meals": {},
+            "fees": {
+                "sightseeing": {"count": 0, "sum": 0.0, "sumsq": 0.0},
+                "activity": {"count": 0, "sum": 0.0, "sumsq": 0.0}
+            }
+        }
+        for day in itinerary:
+            for activity in day.get("activities", []):
+                self._post_activity(ledger, activity, 1)
+        return ledger
+    
+    def patch_ledger(
+        self,
+        ledger: Dict[str, Any],
+        trip_details: Dict[str, Any],
+        operations: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Apply add / remove / replace activity and set_nights / set_travelers
+        edits in O(changed activities); returns the new ledger and trip details
+        """
+        ledger = copy.deepcopy(ledger)
+        trip_details = copy.deepcopy(trip_details)
+        for operation in operations:
+            op = operation.get("op")
+            if op == "add":
+                self._post_activity(ledger, operation["activity"], 1)
+            elif op == "remove":
+                self._post_activity(ledger, operation["activity"], -1)
+            elif op == "replace":
+                self._post_activity(ledger, operation["activity"], -1)
+                self._post_activity(ledger, operation["with"], 1)
+            elif op == "set_nights":
+                trip_details["duration"]["days"] = int(operation["value"]) + 1
+            elif op == "set_travelers":
+                trip_details["travelers"] = {
+                    "adults": int(operation.get("adults", 1)),
+                    "children": int(operation.get("children", 0))
+                }
+            else:
+                raise ValueError(f"Unknown budget patch operation: {op}")
+        return ledger, trip_details
+    
+    def _post_activity(self, ledger: Dict[str, Any], activity: Dict[str, Any], sign: int):
+        """Add (sign 1) or remove (sign -1) one activity's contribution"""
+        activity_type = cost_model.activity_type(activity)
+        category = cost_model.categorize(activity)
+        if activity_type == "food":
+            meals = ledger["meals"]
+            meals[category] = meals.get(category, 0) + sign
+            if meals[category] <= 0:
+                del meals[category]
+        elif activity_type in ledger["fees"]:
+            per_person = cost_model.per_person(activity_type, category)
+            fees = ledger["fees"][activity_type]
+            fees["count"] += sign
+            fees["sum"] += sign * per_person
+            fees["sumsq"] += sign * per_person ** 2
+    
+    def score_variant(self, validation: Dict[str, Any]) -> float:
+        """
+        Budget fit score (0-100) used to rank alternative itineraries.
+        Plans within budget score 50-100 (higher when the budget is well used),
+        over-budget plans drop below 50 in proportion to the overspend.
+        """
+        utilization = validation.get("budgetUtilization", 0)
+        if validation.get("withinBudget"):
+            return round(50 + min(utilization, 100) / 2, 1)
+        return round(max(0.0, 50 - (utilization - 100)), 1)
+    
     def _calculate_budget_breakdown(
         self, 
         itinerary: List[Dict[str, Any]], 
         trip_details: Dict[str, Any]
     ) -> Dict[str, float]:
         """Calculate detailed budget breakdown with realistic pricing"""
+        return self._breakdown_from_ledger(self.build_ledger(itinerary), trip_details)
+    
+    def trip_costs(self, trip_details: Dict[str, Any]) -> Dict[str, float]:
+        """Accommodation and transportation: the part of the breakdown that doesn't depend on the itinerary"""
         days = trip_details["duration"]["days"]
         nights = days - 1 if days > 1 else 0
         adults = trip_details.get("travelers", {}).get("adults", 1)
         children = trip_details.get("travelers", {}).get("children", 0)
         travelers = adults + children
-        
-        # Get preferences
         preferences = trip_details.get("preferences", {})
         accommodation_type = preferences.get("accommodation_type", "mid_range")
-        transport_mode = preferences.get("transport_mode", "flexible")
-        origin = trip_details.get("origin")
-        destination = trip_details.get("destination", "")
         
         # 1. ACCOMMODATION COSTS
         if nights > 0:
@@ -120,96 +197,46 @@ class BudgetAgent:
         else:
             accommodation = 0
         
-        # 2. FOOD COSTS (count actual meals from itinerary)
-        meal_rates = self.MEAL_COSTS.get(accommodation_type, self.MEAL_COSTS["mid_range"])
+        # 4. TRANSPORTATION COSTS (realistic calculation)
+        transportation = self._calculate_transport_cost(
+            trip_details.get("origin"),
+            trip_details.get("destination", ""),
+            days,
+            travelers,
+            preferences.get("transport_mode", "flexible")
+        )
+        return {"accommodation": accommodation, "transportation": transportation}
+    
+    def _breakdown_from_ledger(
+        self,
+        ledger: Dict[str, Any],
+        trip_details: Dict[str, Any],
+        trip_costs: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """Breakdown from running totals; O(1) in the number of activities"""
+        days = trip_details["duration"]["days"]
+        nights = days - 1 if days > 1 else 0
+        adults = trip_details.get("travelers", {}).get("adults", 1)
+        children = trip_details.get("travelers", {}).get("children", 0)
+        travelers = adults + children
+        accommodation_type = trip_details.get("preferences", {}).get("accommodation_type", "mid_range")
         
-        # Count meals from itinerary
-        breakfast_count = lunch_count = dinner_count = 0
-        for day in itinerary:
-            for activity in day.get("activities", []):
-                if activity.get("type") == "food":
-                    desc = activity.get("description", "").lower()
-                    if "breakfast" in desc:
-                        breakfast_count += 1
-                    elif "lunch" in desc:
-                        lunch_count += 1
-                    elif "dinner" in desc:
-                        dinner_count += 1
-        
-        # Calculate food cost based on actual meals
-        food = round((
-            breakfast_count * meal_rates["breakfast"] +
-            lunch_count * meal_rates["lunch"] +
-            dinner_count * meal_rates["dinner"]
-        ) * travelers)
-        
-        # If no meals counted, use default (3 per day)
-        if breakfast_count + lunch_count + dinner_count == 0:
+        # 1 and 4. ACCOMMODATION and TRANSPORTATION don't depend on the itinerary
+        trip_costs = trip_costs or self.trip_costs(trip_details)
+        accommodation = trip_costs["accommodation"]
+        transportation = trip_costs["transportation"]
+        
+        # 2-3. FOOD, ATTRACTIONS & ACTIVITIES from the ledger's per-person totals
+        meal_rates = self.MEAL_COSTS.get(accommodation_type, self.MEAL_COSTS["mid_range"])
+        if ledger["meals"]:
+            food = round(self._food_per_person(ledger, accommodation_type)[0] * travelers)
+        else:
+            # If no meals planned, use default (3 per day)
             daily_food = sum(meal_rates.values()) * travelers
             food = round(daily_food * days)
         
-        # 3. ATTRACTIONS & ACTIVITIES COSTS (estimate based on activity types)
-        attractions_cost = 0
-        activities_cost = 0
-        
-        for day in itinerary:
-            for activity in day.get("activities", []):
-                act_type = activity.get("type", "")
-                name = activity.get("name", "").lower()
-                
-                if act_type == "sightseeing":
-                    # Estimate based on place type
-                    cost_per_person = 0
-                    if any(word in name for word in ["fort", "palace"]):
-                        cost_per_person = self.ACTIVITY_COSTS["fort"]
-                    elif any(word in name for word in ["monument", "memorial"]):
-                        cost_per_person = self.ACTIVITY_COSTS["monument"]
-                    elif "museum" in name or "gallery" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["museum"]
-                    elif any(word in name for word in ["temple", "church", "mosque"]):
-                        cost_per_person = self.ACTIVITY_COSTS["temple"]
-                    elif any(word in name for word in ["beach", "coast"]):
-                        cost_per_person = self.ACTIVITY_COSTS["beach"]
-                    elif "waterfall" in name or "falls" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["waterfall"]
-                    elif "viewpoint" in name or "view point" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["viewpoint"]
-                    elif any(word in name for word in ["park", "garden"]):
-                        cost_per_person = self.ACTIVITY_COSTS["park"]
-                    elif any(word in name for word in ["zoo", "aquarium"]):
-                        cost_per_person = self.ACTIVITY_COSTS["zoo"]
-                    elif "wildlife" in name or "sanctuary" in name or "safari" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["wildlife"]
-                    else:
-                        cost_per_person = 50  # Default sightseeing
-                    
-                    attractions_cost += cost_per_person * travelers
-                
-                elif act_type == "activity":
-                    # Adventure/special activities
-                    cost_per_person = 0
-                    if any(word in name for word in ["water sport", "jet ski", "parasailing", "banana boat"]):
-                        cost_per_person = self.ACTIVITY_COSTS["water_sports"]
-                    elif any(word in name for word in ["adventure", "rafting", "trekking", "paragliding"]):
-                        cost_per_person = self.ACTIVITY_COSTS["adventure"]
-                    elif "amusement" in name or "theme park" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["amusement_park"]
-                    elif "boat" in name or "cruise" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["boat_ride"]
-                    elif "shop" in name or "market" in name:
-                        cost_per_person = self.ACTIVITY_COSTS["shopping"]
-                    else:
-                        cost_per_person = 300  # Default activity
-                    
-                    activities_cost += cost_per_person * travelers
-        
-        attractions_cost = round(attractions_cost)
-        activities_cost = round(activities_cost)
-        
-        # 4. TRANSPORTATION COSTS (realistic calculation)
-        transportation = self._calculate_transport_cost(
-            origin, destination, days, travelers, transport_mode
-        )
+        attractions_cost = round(ledger["fees"]["sightseeing"]["sum"] * travelers)
+        activities_cost = round(ledger["fees"]["activity"]["sum"] * travelers)
         
         # 5. MISCELLANEOUS (tips, shopping, emergencies)
         # 5-10% of (accommodation + food + activities)
@@ -243,84 +270,210 @@ class BudgetAgent:
         # Estimate distance between cities (km)
         distance = self._estimate_distance(origin, destination)
         
+        fixed, per_traveler, per_day, per_traveler_day = self._transport_coefficients(distance, transport_mode)
+        return round(fixed + per_traveler * travelers + per_day * days + per_traveler_day * travelers * days)
+    
+    def _transport_coefficients(self, distance: float, transport_mode: str) -> Tuple[float, float, float, float]:
+        """
+        Transport cost as fixed + per traveler + per day + per traveler-day terms,
+        so single plans and scenario matrices share one formula
+        """
         transport_info = self.TRANSPORT_COSTS.get(transport_mode, self.TRANSPORT_COSTS["flexible"])
+        intercity = distance > 0
         
         if transport_mode == "public_transport":
-            # Intercity travel (bus/train) + daily city transport
-            if distance > 0:
-                intercity_cost = distance * 0.5 * travelers  # ₹0.5 per km per person (bus/train)
-                intercity_cost *= 2  # Round trip
-            else:
-                intercity_cost = 0
-            city_transport = transport_info["city_daily"] * days * travelers
-            return round(intercity_cost + city_transport)
+            # Intercity bus/train at ₹0.5 per km per person, both ways + daily city transport
+            return 0, (distance * 0.5 * 2 if intercity else 0), 0, transport_info["city_daily"]
         
         elif transport_mode == "own_vehicle":
-            # Fuel + tolls
-            if distance > 0:
-                fuel_cost = distance * transport_info["fuel_per_km"] * 2  # Round trip
-                toll_cost = transport_info["toll_daily"] * ((distance // 200) + 1) * 2  # Tolls
-            else:
-                fuel_cost = 0
-                toll_cost = 0
-            city_fuel = 30 * transport_info["fuel_per_km"] * days  # 30km daily city driving
-            return round(fuel_cost + toll_cost + city_fuel)
+            # Round-trip fuel + tolls, then 30km daily city driving
+            fuel_cost = distance * transport_info["fuel_per_km"] * 2 if intercity else 0
+            toll_cost = transport_info["toll_daily"] * ((distance // 200) + 1) * 2 if intercity else 0
+            return fuel_cost + toll_cost, 0, 30 * transport_info["fuel_per_km"], 0
         
         elif transport_mode == "rental":
-            # Rental fee + fuel
-            rental_fee = transport_info["per_day"] * days
-            if distance > 0:
-                fuel = (distance * 2 + 30 * days) * transport_info["fuel_per_km"]
-            else:
-                fuel = 30 * days * transport_info["fuel_per_km"]
-            return round(rental_fee + fuel)
+            # Rental fee + fuel for the round trip and 30km daily
+            fuel = distance * 2 * transport_info["fuel_per_km"] if intercity else 0
+            return fuel, 0, transport_info["per_day"] + 30 * transport_info["fuel_per_km"], 0
         
         else:  # flexible (mix of transport)
-            # Taxi/auto for city + intercity
-            if distance > 0:
-                intercity = distance * 8 * 2  # ₹8 per km (shared taxi)
+            # Shared taxi at ₹8 per km both ways + taxi/auto in the city
+            return (distance * 8 * 2 if intercity else 0), 0, transport_info["city_daily"], 0
+    
+    def evaluate_scenarios(
+        self,
+        itinerary: List[Dict[str, Any]],
+        trip_details: Dict[str, Any],
+        accommodation_types: Optional[List[str]] = None,
+        transport_modes: Optional[List[str]] = None,
+        traveler_counts: Optional[List[int]] = None,
+        durations: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        What-if cost matrix over accommodation × transport × travelers × days,
+        computed in one broadcast NumPy pass from an existing itinerary.
+        Itinerary meal and entry costs scale with the number of days.
+        """
+        accommodation_types = accommodation_types or list(self.ACCOMMODATION_RATES)
+        transport_modes = transport_modes or list(self.TRANSPORT_COSTS)
+        planned_days = max(1, trip_details["duration"]["days"])
+        traveler_counts = traveler_counts or [cost_model.travelers(trip_details)]
+        durations = durations or [planned_days]
+        budget = float(trip_details.get("budget") or 0)
+        
+        # Axes broadcast as (accommodation, transport, travelers, days)
+        people = np.array(traveler_counts, dtype=float).reshape(1, 1, -1, 1)
+        days = np.array(durations, dtype=float).reshape(1, 1, 1, -1)
+        shape = (len(accommodation_types), len(transport_modes), len(traveler_counts), len(durations))
+        scale = days / planned_days
+        
+        # 1. Accommodation: nightly rate by tier, one room per two travelers
+        rates = np.array([
+            sum(self.ACCOMMODATION_RATES[tier].values()) / 2 for tier in accommodation_types
+        ]).reshape(-1, 1, 1, 1)
+        accommodation = np.round(rates * np.maximum(1, (people + 1) // 2) * np.maximum(days - 1, 0))
+        
+        # 2-3. Per-person itinerary costs from the ledger, food priced per tier
+        ledger = self.build_ledger(itinerary)
+        food_pp = []
+        for tier in accommodation_types:
+            meal_rates = self.MEAL_COSTS.get(tier, self.MEAL_COSTS["mid_range"])
+            if ledger["meals"]:
+                food_pp.append(self._food_per_person(ledger, tier)[0])
             else:
-                intercity = 0
-            city_travel = transport_info["city_daily"] * days
-            return round(intercity + city_travel)
+                # If no meals planned, use default (3 per day)
+                food_pp.append(sum(meal_rates.values()) * planned_days)
+        food = np.round(np.array(food_pp).reshape(-1, 1, 1, 1) * people * scale)
+        attractions = np.round(ledger["fees"]["sightseeing"]["sum"] * people * scale)
+        activities = np.round(ledger["fees"]["activity"]["sum"] * people * scale)
+        
+        # 4. Transportation: bilinear in travelers and days per mode
+        distance = self._estimate_distance(trip_details.get("origin"), trip_details.get("destination", ""))
+        terms = np.array([self._transport_coefficients(distance, mode) for mode in transport_modes])
+        fixed, per_traveler, per_day, per_traveler_day = (terms[:, i].reshape(1, -1, 1, 1) for i in range(4))
+        transportation = np.round(fixed + per_traveler * people + per_day * days + per_traveler_day * people * days)
+        
+        # 5. Miscellaneous on everything but transport
+        base_cost = accommodation + food + attractions + activities
+        miscellaneous = np.round(base_cost * 0.08)
+        
+        components = {
+            "accommodation": accommodation,
+            "food": food,
+            "activities": activities,
+            "attractions": attractions,
+            "transportation": transportation,
+            "miscellaneous": miscellaneous
+        }
+        components = {name: np.broadcast_to(values, shape) for name, values in components.items()}
+        total = sum(components.values())
+        
+        cheapest = np.unravel_index(int(np.argmin(total)), shape)
+        return {
+            "axes": {
+                "accommodation": accommodation_types,
+                "transport": transport_modes,
+                "travelers": traveler_counts,
+                "days": durations
+            },
+            "budget": budget,
+            "totals": total.astype(int).tolist(),
+            "perPerson": np.round(total / people).astype(int).tolist(),
+            "withinBudget": (total <= budget).tolist() if budget > 0 else None,
+            "breakdown": {name: values.astype(int).tolist() for name, values in components.items()},
+            "cheapest": {
+                "accommodation": accommodation_types[cheapest[0]],
+                "transport": transport_modes[cheapest[1]],
+                "travelers": traveler_counts[cheapest[2]],
+                "days": durations[cheapest[3]],
+                "total": int(total[cheapest])
+            }
+        }
+    
+    def simulate_costs(
+        self,
+        ledger: Dict[str, Any],
+        trip_details: Dict[str, Any],
+        budget: float,
+        breakdown: Optional[Dict[str, float]] = None,
+        draws: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo total-cost range: nightly rates drawn from the tier's
+        min-max range, every meal/entry/activity and the transport estimate
+        scaled by mean-one lognormal noise. All draws are one array pass.
+        """
+        draws = draws or self.SIMULATION_DRAWS
+        rng = np.random.default_rng(self.SIMULATION_SEED)
+        breakdown = breakdown or self._breakdown_from_ledger(ledger, trip_details)
+        
+        days = trip_details["duration"]["days"]
+        nights = days - 1 if days > 1 else 0
+        travelers = cost_model.travelers(trip_details)
+        preferences = trip_details.get("preferences", {})
+        rate_range = self.ACCOMMODATION_RATES.get(preferences.get("accommodation_type", "mid_range"), self.ACCOMMODATION_RATES["mid_range"])
+        
+        # Same hotel every night: one rate per draw, most likely mid-range
+        rates = rng.triangular(rate_range["min"], (rate_range["min"] + rate_range["max"]) / 2, rate_range["max"], draws)
+        accommodation = rates * max(1, (travelers + 1) // 2) * nights
+        
+        # (sum, sum of squares) of every cost group from the ledger; meals fall back to three a day
+        tier = preferences.get("accommodation_type", "mid_range")
+        food_sum, food_sumsq = self._food_per_person(ledger, tier)
+        groups = {
+            "food": (food_sum * travelers, food_sumsq * travelers ** 2) if ledger["meals"] else (breakdown["food"], breakdown["food"] ** 2),
+            "sightseeing": (ledger["fees"]["sightseeing"]["sum"] * travelers, ledger["fees"]["sightseeing"]["sumsq"] * travelers ** 2),
+            "activity": (ledger["fees"]["activity"]["sum"] * travelers, ledger["fees"]["activity"]["sumsq"] * travelers ** 2),
+            "transport": (breakdown["transportation"], breakdown["transportation"] ** 2)
+        }
+        spreads = {**cost_model.COST_SPREAD, "transport": self.TRANSPORT_SPREAD}
+        
+        # Each group's sum of independent lognormal costs is matched (mean and
+        # variance) by one lognormal, so draws cost O(groups) not O(activities)
+        means = np.array([total for total, _ in groups.values()], dtype=float)
+        variances = np.array([sumsq for _, sumsq in groups.values()], dtype=float) * np.expm1(
+            np.array([spreads[group] for group in groups]) ** 2
+        )
+        sigmas = np.sqrt(np.log1p(np.divide(variances, means ** 2, out=np.zeros_like(means), where=means > 0)))
+        # Mean-one lognormal factors, one column per group
+        samples = np.exp(rng.standard_normal((draws, len(means))) * sigmas - sigmas ** 2 / 2) * means
+        transport = samples[:, -1]
+        items = samples[:, :-1].sum(axis=1)
+        
+        # Miscellaneous stays 8% of everything but transport
+        totals = (accommodation + items) * 1.08 + transport
+        p10, p50, p90 = np.percentile(totals, [10, 50, 90])
+        return {
+            "p10": round(float(p10)),
+            "p50": round(float(p50)),
+            "p90": round(float(p90)),
+            "withinBudgetProbability": round(float(np.mean(totals <= budget)), 3) if budget > 0 else None,
+            "draws": draws
+        }
+    
+    def _food_per_person(self, ledger: Dict[str, Any], tier: str) -> Tuple[float, float]:
+        """Per-person (sum, sum of squares) of planned meal costs at an accommodation tier"""
+        total = squares = 0.0
+        for category, count in ledger["meals"].items():
+            rate = cost_model.per_person("food", category, tier)
+            total += rate * count
+            squares += rate ** 2 * count
+        return total, squares
     
     def _estimate_distance(self, origin: str, destination: str) -> int:
-        """Estimate distance between cities (very rough estimates)"""
+        """Estimate road distance between places from the bundled gazetteer"""
         if not origin or not destination:
             return 0
         
-        # Common city pairs (km)
-        city_distances = {
-            ("bangalore", "hyderabad"): 570,
-            ("bangalore", "goa"): 560,
-            ("bangalore", "mysore"): 150,
-            ("mumbai", "goa"): 580,
-            ("mumbai", "pune"): 150,
-            ("delhi", "jaipur"): 280,
-            ("delhi", "agra"): 230,
-            ("chennai", "pondicherry"): 160,
-            ("chennai", "bangalore"): 350,
-            ("kolkata", "darjeeling"): 600,
-        }
+        distance = gazetteer.distance_km(origin, destination)
+        if distance is not None:
+            return round(distance)
         
-        # Normalize city names
-        origin_norm = origin.lower().split()[0] if origin else ""
-        dest_norm = destination.lower().split()[0] if destination else ""
-        
-        # Check direct match
-        for (city1, city2), dist in city_distances.items():
-            if (origin_norm in city1 or city1 in origin_norm) and \
-               (dest_norm in city2 or city2 in dest_norm):
-                return dist
-            if (origin_norm in city2 or city2 in origin_norm) and \
-               (dest_norm in city1 or city1 in dest_norm):
-                return dist
-        
-        # If no match, assume moderate distance (local trip)
-        if origin_norm and dest_norm and origin_norm != dest_norm:
+        # Unknown place: assume a moderate distance unless the names are the same
+        if origin.strip().lower() != destination.strip().lower():
             return 300  # Default 300km for unknown routes
         
-        return 0  # Same city or no origin
+        return 0  # Same city
     
     def _calculate_per_person_cost(
         self,
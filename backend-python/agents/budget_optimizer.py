@@ -0,0 +1,287 @@
+import copy
+from typing import Dict, Any, List, Optional, Tuple
+from agents.budget_agent import budget_agent
+from agents.cost_model import cost_model, classify
+from agents.rule_planner import RulePlanner
+from agents.timeline_engine import timeline_engine
+from utils.geo import get_coordinates, resolve_coordinates, build_coordinate_lookup, haversine_km
+
+
+class BudgetOptimizer:
+    """
+    Budget Optimizer
+    Edits an over-budget itinerary until it fits instead of only suggesting
+    cuts. Every accommodation tier (at or below the chosen one) and transport
+    mode is tried; within each, paid stops are swapped for cheaper unused
+    places or dropped greedily by saving per unit of lost value, then edits
+    that are no longer needed are undone. Meals, stays and the style's
+    minimum stops per day are never touched. No LLM calls.
+    """
+
+    TIER_ORDER = ["luxury", "mid_range", "budget"]
+    TRANSPORT_MODES = ["public_transport", "own_vehicle", "rental", "flexible"]
+
+    # Value lost per choice, in rating points (a typical stop is worth ~4)
+    TIER_STEP_PENALTY = 3.0
+    MODE_CHANGE_PENALTY = 2.0
+    SWAP_PENALTY = 0.5
+    SWAP_KM_PENALTY = 0.05
+    DEFAULT_RATING = 4.0
+
+    # Only these stops are optional; everything else is kept as planned
+    EDITABLE_TYPES = {"sightseeing", "activity"}
+
+    def fit(
+        self,
+        itinerary: List[Dict[str, Any]],
+        trip_details: Dict[str, Any],
+        places: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Cheapest-to-accept edited plan within budget (None if it already fits)"""
+        budget = float(trip_details.get("budget") or 0)
+        if budget <= 0:
+            return None
+        current = budget_agent._calculate_budget_breakdown(itinerary, trip_details)["total"]
+        if current <= budget:
+            return None
+
+        preferences = trip_details.get("preferences") or {}
+        tier = preferences.get("accommodation_type", "mid_range")
+        mode = preferences.get("transport_mode", "flexible")
+        tiers = self.TIER_ORDER[self.TIER_ORDER.index(tier):] if tier in self.TIER_ORDER else [tier]
+        modes = self.TRANSPORT_MODES if mode in self.TRANSPORT_MODES else [mode] + self.TRANSPORT_MODES
+
+        # Fixed costs of every tier x mode for the plan as it stands
+        matrix = budget_agent.evaluate_scenarios(
+            itinerary, trip_details,
+            accommodation_types=tiers,
+            transport_modes=modes,
+            traveler_counts=[cost_model.travelers(trip_details)],
+            durations=[trip_details["duration"]["days"]]
+        )
+        slots = self._slots(itinerary, places or [])
+        swaps = self._swap_options(itinerary, slots, places or [])
+        droppable = self._droppable_stops(itinerary, preferences.get("travel_style"))
+        travelers = cost_model.travelers(trip_details)
+
+        best = None
+        for t, tier_choice in enumerate(tiers):
+            for m, mode_choice in enumerate(modes):
+                overspend = matrix["totals"][t][m][0][0] - budget
+                edits, edit_loss, overspend = self._select_edits(slots, swaps, droppable, overspend, travelers)
+                loss = (
+                    t * self.TIER_STEP_PENALTY
+                    + (mode_choice != mode) * self.MODE_CHANGE_PENALTY
+                    + edit_loss
+                )
+                # Plans that fit rank by value lost; the rest by how far over they stay
+                rank = (0, loss) if overspend <= 0 else (1, overspend)
+                if best is None or rank < best[0]:
+                    best = (rank, tier_choice, mode_choice, edits)
+
+        _, tier_choice, mode_choice, edits = best
+        adjusted_details = copy.deepcopy(trip_details)
+        adjusted_details.setdefault("preferences", {}).update(
+            accommodation_type=tier_choice,
+            transport_mode=mode_choice
+        )
+        adjusted = self._apply(itinerary, slots, edits, adjusted_details, places)
+        total = budget_agent._calculate_budget_breakdown(adjusted, adjusted_details)["total"]
+
+        changes = []
+        if tier_choice != tier:
+            changes.append({"type": "accommodation", "from": tier, "to": tier_choice})
+        if mode_choice != mode:
+            changes.append({"type": "transport", "from": mode, "to": mode_choice})
+        for slot_index, edit in edits.items():
+            day, position, activity, _, _ = slots[slot_index]
+            change = {"type": edit[0], "day": itinerary[day]["day"], "activity": activity.get("name")}
+            if edit[0] == "swap":
+                change["replacement"] = edit[1]["name"]
+            changes.append(change)
+
+        print(f"🧮 Budget Optimizer: ₹{current:,.0f} -> ₹{total:,.0f} with {len(changes)} change(s) (budget ₹{budget:,.0f})")
+        return {
+            "itinerary": adjusted,
+            "tripDetails": adjusted_details,
+            "estimated": total,
+            "withinBudget": total <= budget,
+            "saving": round(current - total),
+            "changes": changes
+        }
+
+    def _slots(
+        self,
+        itinerary: List[Dict[str, Any]],
+        places: List[Dict[str, Any]]
+    ) -> List[Tuple[int, int, Dict[str, Any], float, float]]:
+        """(day, position, activity, per-person cost, rating) for each paid, editable stop"""
+        slots = []
+        for day_index, day in enumerate(itinerary):
+            for position, activity in enumerate(day.get("activities", [])):
+                activity_type = cost_model.activity_type(activity)
+                if activity_type not in self.EDITABLE_TYPES:
+                    continue
+                per_person = cost_model.per_person(activity_type, cost_model.categorize(activity))
+                if per_person > 0:
+                    slots.append((day_index, position, activity, per_person, self._rating(activity, places)))
+        return slots
+
+    def _swap_options(
+        self,
+        itinerary: List[Dict[str, Any]],
+        slots: List[Tuple[int, int, Dict[str, Any], float, float]],
+        places: List[Dict[str, Any]]
+    ) -> List[List[Tuple[float, float, Dict[str, Any]]]]:
+        """Per slot: (per-person cost, value lost, place) for cheaper unused attractions"""
+        used = {
+            name.strip().lower()
+            for day in itinerary for activity in day.get("activities", [])
+            for name in ((activity.get("location") or {}).get("name"), activity.get("name")) if name
+        }
+        candidates = []
+        for place in places:
+            if place.get("category", "attraction") != "attraction" or place["name"].strip().lower() in used:
+                continue
+            per_person = cost_model.per_person("sightseeing", classify("sightseeing", place["name"].lower()))
+            candidates.append((per_person, place))
+
+        lookup = build_coordinate_lookup(places)
+        options = []
+        for _, _, activity, cost, rating in slots:
+            point = resolve_coordinates(activity, lookup)
+            slot_options = []
+            for per_person, place in candidates:
+                if per_person >= cost:
+                    continue
+                target = get_coordinates(place)
+                km = float(haversine_km(*point, *target)) if point and target else 10.0
+                lost = (
+                    self.SWAP_PENALTY
+                    + max(0.0, rating - (place.get("rating") or self.DEFAULT_RATING))
+                    + km * self.SWAP_KM_PENALTY
+                )
+                slot_options.append((per_person, lost, place))
+            options.append(sorted(slot_options, key=lambda option: option[1]))
+        return options
+
+    def _droppable_stops(self, itinerary: List[Dict[str, Any]], travel_style: Optional[str]) -> Dict[int, int]:
+        """Stops each day may still drop without going below the style's minimum pace"""
+        low, _ = RulePlanner.STYLE_PACE.get(travel_style, RulePlanner.STYLE_PACE["balanced"])
+        droppable = {}
+        for day_index, day in enumerate(itinerary):
+            stops = sum(cost_model.activity_type(a) in self.EDITABLE_TYPES for a in day.get("activities", []))
+            droppable[day_index] = max(0, stops - low)
+        return droppable
+
+    def _select_edits(
+        self,
+        slots: List[Tuple[int, int, Dict[str, Any], float, float]],
+        swaps: List[List[Tuple[float, float, Dict[str, Any]]]],
+        droppable: Dict[int, int],
+        overspend: float,
+        travelers: int
+    ) -> Tuple[Dict[int, Tuple], float, float]:
+        """Greedy by saving per value lost, then undo edits that are no longer needed"""
+        # Entry fees also carry the 8% miscellaneous allowance
+        scale = travelers * 1.08
+        edits: Dict[int, Tuple] = {}
+        remaining_drops = dict(droppable)
+        taken = set()
+
+        while overspend > 0:
+            best, best_ratio = None, 0.0
+            for index, (day, _, _, cost, rating) in enumerate(slots):
+                if index in edits:
+                    continue
+                options = [
+                    ("swap", place, (cost - per_person) * scale, lost)
+                    for per_person, lost, place in swaps[index]
+                    if place["name"] not in taken
+                ][:1]
+                if remaining_drops.get(day, 0) > 0:
+                    options.append(("drop", None, cost * scale, rating))
+                for kind, place, saving, lost in options:
+                    ratio = saving / max(lost, 0.1)
+                    if ratio > best_ratio:
+                        best, best_ratio = (index, kind, place, saving, lost), ratio
+            if best is None:
+                break
+            index, kind, place, saving, lost = best
+            edits[index] = (kind, place, saving, lost)
+            overspend -= saving
+            if kind == "drop":
+                remaining_drops[slots[index][0]] -= 1
+            else:
+                taken.add(place["name"])
+
+        # Local search: revert the costliest edits the budget can now absorb
+        for index in sorted(edits, key=lambda i: -edits[i][3]):
+            saving = edits[index][2]
+            if overspend + saving <= 0:
+                overspend += saving
+                del edits[index]
+
+        return edits, sum(edit[3] for edit in edits.values()), overspend
+
+    def _apply(
+        self,
+        itinerary: List[Dict[str, Any]],
+        slots: List[Tuple[int, int, Dict[str, Any], float, float]],
+        edits: Dict[int, Tuple],
+        trip_details: Dict[str, Any],
+        places: Optional[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Copy of the itinerary with swaps and drops applied and costs/timeline refreshed"""
+        adjusted = copy.deepcopy(itinerary)
+        dropped = set()
+        for index, (kind, place, _, _) in edits.items():
+            day, position = slots[index][:2]
+            activity = adjusted[day]["activities"][position]
+            if kind == "drop":
+                dropped.add((day, position))
+                continue
+            activity["originalName"] = activity.get("name")
+            activity.update(
+                type="sightseeing",
+                name=place["name"],
+                description=f"Explore {place['name']}",
+                location={
+                    "name": place["name"],
+                    "address": place.get("address", ""),
+                    **({"lat": place["location"]["lat"], "lng": place["location"]["lng"]} if get_coordinates(place) else {})
+                },
+                budgetEdit="swapped"
+            )
+            activity.pop("costCategory", None)
+
+        for day_index, day in enumerate(adjusted):
+            day["activities"] = [
+                activity for position, activity in enumerate(day.get("activities", []))
+                if (day_index, position) not in dropped
+            ]
+            for activity in day["activities"]:
+                price = cost_model.price(activity, trip_details)
+                activity["estimatedCost"] = price["total"]
+                activity["costCategory"] = price["category"]
+            day["totalCost"] = sum(activity["estimatedCost"] for activity in day["activities"])
+
+        return timeline_engine.schedule(
+            adjusted,
+            places,
+            trip_details.get("preferences", {}).get("transport_mode", "flexible")
+        )
+
+    def _rating(self, activity: Dict[str, Any], places: List[Dict[str, Any]]) -> float:
+        names = {
+            name.strip().lower()
+            for name in ((activity.get("location") or {}).get("name"), activity.get("name")) if name
+        }
+        for place in places:
+            if place.get("name", "").strip().lower() in names:
+                return place.get("rating") or self.DEFAULT_RATING
+        return self.DEFAULT_RATING
+
+
+# Singleton instance
+budget_optimizer = BudgetOptimizer()
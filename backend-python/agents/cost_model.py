@@ -0,0 +1,166 @@
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+
+# Cost categories per activity type, highest priority first; an activity takes
+# the first category whose words appear anywhere in its text
+CATEGORY_WORDS = {
+    "sightseeing": [
+        ("fort", ["fort", "palace"]),
+        ("monument", ["monument", "memorial"]),
+        ("museum", ["museum", "gallery"]),
+        ("temple", ["temple", "church", "mosque"]),
+        ("beach", ["beach", "coast"]),
+        ("waterfall", ["waterfall", "falls"]),
+        ("viewpoint", ["viewpoint", "view point"]),
+        ("park", ["park", "garden"]),
+        ("zoo", ["zoo", "aquarium"]),
+        ("wildlife", ["wildlife", "sanctuary", "safari"])
+    ],
+    "activity": [
+        ("water_sports", ["water sport", "jet ski", "parasailing", "banana boat"]),
+        ("adventure", ["adventure", "rafting", "trekking", "paragliding"]),
+        ("amusement_park", ["amusement", "theme park"]),
+        ("boat_ride", ["boat", "cruise"]),
+        ("shopping", ["shop", "market"])
+    ],
+    "food": [
+        ("breakfast", ["breakfast"]),
+        ("lunch", ["lunch"]),
+        ("dinner", ["dinner"])
+    ]
+}
+
+
+def _compile(categories: List[Tuple[str, List[str]]]) -> re.Pattern:
+    """One zero-width alternation per type: every position reports its highest-priority category"""
+    groups = "|".join(
+        f"(?P<{category}>{'|'.join(re.escape(word) for word in words)})"
+        for category, words in categories
+    )
+    return re.compile(f"(?=(?:{groups}))")
+
+
+CATEGORY_PATTERNS = {activity_type: _compile(categories) for activity_type, categories in CATEGORY_WORDS.items()}
+CATEGORY_PRIORITY = {
+    activity_type: {category: rank for rank, (category, _) in enumerate(categories)}
+    for activity_type, categories in CATEGORY_WORDS.items()
+}
+
+# Activity types as they arrive from LLMs and templates
+TYPE_ALIASES = {"restaurant": "food", "meal": "food", "attraction": "sightseeing", "accommodation": "hotel"}
+
+
+@lru_cache(maxsize=4096)
+def classify(activity_type: str, text: str) -> str:
+    """Cost category for an activity type and its lowercase text, in one regex pass"""
+    pattern = CATEGORY_PATTERNS.get(activity_type)
+    if pattern is None:
+        return activity_type
+    priority = CATEGORY_PRIORITY[activity_type]
+    found = [match.lastgroup for match in pattern.finditer(text)]
+    if not found:
+        return activity_type if activity_type != "food" else "meal"
+    return min(found, key=priority.__getitem__)
+
+
+class CostModel:
+    """
+    Cost Model
+    Table-driven per-activity pricing shared by the itinerary and budget
+    agents. Activities are classified once by a compiled pattern and priced
+    from per-person fees (attractions, activities) or meal rates by
+    accommodation tier; stays and transport are priced per trip elsewhere.
+    """
+
+    # Meal costs per person (realistic Indian dining costs)
+    MEAL_COSTS = {
+        "budget": {"breakfast": 80, "lunch": 150, "dinner": 200},      # Street food, local eateries
+        "mid_range": {"breakfast": 150, "lunch": 300, "dinner": 400}, # Standard restaurants
+        "luxury": {"breakfast": 300, "lunch": 600, "dinner": 800}     # Fine dining
+    }
+
+    # Activity/Attraction entry fees (average per person)
+    ACTIVITY_COSTS = {
+        "monument": 50,      # Historical monuments (ASI sites)
+        "fort": 100,         # Forts and palaces
+        "museum": 50,        # Museums
+        "temple": 0,         # Temples (usually free)
+        "beach": 0,          # Beaches (free)
+        "waterfall": 20,     # Waterfalls (nominal entry)
+        "viewpoint": 0,      # Viewpoints (usually free)
+        "park": 30,          # Parks and gardens
+        "adventure": 800,    # Adventure activities (parasailing, rafting, etc.)
+        "water_sports": 500, # Water sports
+        "amusement_park": 600, # Theme/amusement parks
+        "zoo": 80,           # Zoos and aquariums
+        "wildlife": 1500,    # Wildlife sanctuary (with safari)
+        "boat_ride": 200,    # Boat rides
+        "shopping": 500,     # Shopping budget per visit
+        "sightseeing": 50,   # Default sightseeing
+        "activity": 300      # Default activity
+    }
+
+    # Spread of actual spend around the table price (lognormal sigma) by activity type
+    COST_SPREAD = {
+        "food": 0.30,        # Menu choices and where the meal ends up
+        "sightseeing": 0.20, # Camera fees, guides, foreigner/weekend rates
+        "activity": 0.35     # Operator, season and package add-ons
+    }
+
+    # Breakdown bucket each activity type's cost lands in
+    BUCKETS = {
+        "sightseeing": "attractions",
+        "activity": "activities",
+        "food": "food",
+        "hotel": "accommodation",
+        "travel": "transportation"
+    }
+
+    def activity_type(self, activity: Dict[str, Any]) -> str:
+        activity_type = (activity.get("type") or "sightseeing").strip().lower()
+        return TYPE_ALIASES.get(activity_type, activity_type)
+
+    def categorize(self, activity: Dict[str, Any]) -> str:
+        """Cost category of an activity (reuses the one stored by the itinerary agent)"""
+        if activity.get("costCategory"):
+            return activity["costCategory"]
+        activity_type = self.activity_type(activity)
+        # Meals are named in the description ("Lunch at ..."), sights and activities by name
+        field = "description" if activity_type == "food" else "name"
+        return classify(activity_type, (activity.get(field) or "").lower())
+
+    def price(self, activity: Dict[str, Any], trip_details: Dict[str, Any]) -> Dict[str, Any]:
+        """{type, bucket, category, perPerson, total} for one activity"""
+        activity_type = self.activity_type(activity)
+        category = self.categorize(activity)
+        per_person = self.per_person(activity_type, category, self._tier(trip_details))
+        return {
+            "type": activity_type,
+            "bucket": self.BUCKETS.get(activity_type),
+            "category": category,
+            "perPerson": per_person,
+            "total": round(per_person * self.travelers(trip_details))
+        }
+
+    def per_person(self, activity_type: str, category: str, tier: str = "mid_range") -> float:
+        """Per-person cost from the fee and meal tables"""
+        if activity_type == "food":
+            rates = self.MEAL_COSTS.get(tier, self.MEAL_COSTS["mid_range"])
+            # A meal of unknown kind is priced as lunch
+            return rates.get(category, rates["lunch"])
+        if activity_type in ("sightseeing", "activity"):
+            return self.ACTIVITY_COSTS.get(category, self.ACTIVITY_COSTS[activity_type])
+        return 0
+
+    def travelers(self, trip_details: Dict[str, Any]) -> int:
+        travelers = trip_details.get("travelers") or {}
+        return max(1, travelers.get("adults", 1) + travelers.get("children", 0))
+
+    def _tier(self, trip_details: Dict[str, Any]) -> str:
+        preferences = trip_details.get("preferences") or {}
+        return preferences.get("accommodation_type", "mid_range")
+
+
+# Singleton instance
+cost_model = CostModel()
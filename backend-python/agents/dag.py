@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Iterable
+
+
+class Stage:
+    """
+    One step of an agent pipeline.
+    `run` receives the shared context and returns a dict with exactly the
+    declared outputs; the stage starts as soon as all its inputs exist.
+    Tasks a stage leaves running for a later stage go in context["background"]
+    so they are cancelled if the run ends first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        inputs: Iterable[str] = (),
+        outputs: Iterable[str] = ()
+    ):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name}: {', '.join(self.inputs) or '-'} -> {', '.join(self.outputs) or '-'})"
+
+
+class DAGError(Exception):
+    """Pipeline definition problem (missing input, duplicate output, cycle)"""
+
+
+class DAGTimeout(asyncio.TimeoutError):
+    """The pipeline ran past its deadline; `pending` names the stages that were cancelled"""
+
+    def __init__(self, pending: List[str]):
+        super().__init__(f"Deadline exceeded with stages still running: {', '.join(pending)}")
+        self.pending = pending
+
+
+class AgentDAG:
+    """
+    Agent DAG Executor
+    Runs stages concurrently as their inputs become available. The first
+    stage failure, a deadline or cancellation of the caller cancels every
+    stage still running. Per-stage start and duration are recorded in
+    `timings` (milliseconds from the start of the run).
+    """
+
+    def __init__(self, stages: Optional[List[Stage]] = None):
+        self.stages: List[Stage] = []
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "AgentDAG":
+        """Plug in a stage (its outputs must not clash with existing ones)"""
+        if any(existing.name == stage.name for existing in self.stages):
+            raise DAGError(f"Duplicate stage name: {stage.name}")
+        produced = {output for existing in self.stages for output in existing.outputs}
+        clashes = produced.intersection(stage.outputs)
+        if clashes:
+            raise DAGError(f"Stage {stage.name} re-declares outputs: {', '.join(sorted(clashes))}")
+        self.stages.append(stage)
+        return self
+
+    def validate(self, initial: Iterable[str]) -> None:
+        """Every input is provided by the caller or exactly one stage, and there are no cycles"""
+        available = set(initial)
+        remaining = list(self.stages)
+        while remaining:
+            ready = [stage for stage in remaining if available.issuperset(stage.inputs)]
+            if not ready:
+                missing = {
+                    stage.name: sorted(set(stage.inputs) - available)
+                    for stage in remaining
+                }
+                raise DAGError(f"Unsatisfiable or cyclic inputs: {missing}")
+            for stage in ready:
+                available.update(stage.outputs)
+                remaining.remove(stage)
+
+    async def run(
+        self,
+        initial: Dict[str, Any],
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute the pipeline and return the final context plus `timings`.
+        `deadline` is an absolute time.monotonic() value.
+        """
+        self.validate(initial.keys())
+        context = dict(initial)
+        timings: Dict[str, Dict[str, Any]] = {}
+        context["timings"] = timings
+        context["background"] = []
+        start = time.monotonic()
+        waiting = list(self.stages)
+        running: Dict[asyncio.Task, Stage] = {}
+
+        def launch_ready():
+            for stage in [s for s in waiting if all(key in context for key in s.inputs)]:
+                waiting.remove(stage)
+                timings[stage.name] = {"startMs": round((time.monotonic() - start) * 1000, 1)}
+                running[asyncio.create_task(stage.run(context))] = stage
+
+        try:
+            launch_ready()
+            while running:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise DAGTimeout([stage.name for stage in running.values()])
+
+                for task in done:
+                    stage = running.pop(task)
+                    timing = timings[stage.name]
+                    timing["durationMs"] = round((time.monotonic() - start) * 1000 - timing["startMs"], 1)
+                    error = task.exception()
+                    if error is not None:
+                        timing["status"] = "failed"
+                        print(f"❌ Stage {stage.name} failed after {timing['durationMs']:.0f}ms: {error}")
+                        raise error
+                    result = task.result() or {}
+                    missing = set(stage.outputs) - result.keys()
+                    if missing:
+                        timing["status"] = "failed"
+                        raise DAGError(f"Stage {stage.name} did not produce: {', '.join(sorted(missing))}")
+                    timing["status"] = "done"
+                    context.update({key: result[key] for key in stage.outputs})
+                launch_ready()
+        finally:
+            # Failure, timeout or caller cancellation: nothing keeps running in the background
+            for task, stage in running.items():
+                task.cancel()
+                timings[stage.name]["status"] = "cancelled"
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            for task in context["background"]:
+                task.cancel()
+
+        return context
@@ -1,9 +1,22 @@
-from typing import Dict, Any, List
+import asyncio
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
+from agents.route_optimizer import route_optimizer
+from agents.rule_planner import rule_planner
+from agents.place_resolver import place_resolver
+from agents.timeline_engine import timeline_engine
+from agents.plan_modes import get_plan_mode
+from agents.cost_model import cost_model
 from services.llm_service import llm_service
 from services.travel_api import travel_api
+from services.query_planner import query_planner
+from services.spatial_index import spatial_indexes
+from services.gazetteer import gazetteer
+from services.destinations import destinations
 from services.booking_service import booking_service
 from utils.logger import log_data
+from utils.geo import coordinates_array, distance_matrix_km, haversine_km
 
 
 class ItineraryAgent:
@@ -12,77 +25,116 @@ class ItineraryAgent:
     Creates detailed day-wise travel itineraries
     """
     
-    async def process(self, trip_details: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Attractions fetched for free slots on event trips
+    EVENT_ATTRACTION_LIMIT = 4
+    
+    # Restaurants kept for the prompt: nearest per attraction zone, or the first
+    # RESTAURANT_LIMIT when they have no coordinates
+    RESTAURANTS_PER_ZONE = 2
+    RESTAURANT_RADIUS_KM = 8.0
+    RESTAURANT_LIMIT = 5
+    
+    # Clustering: a place is an outlier when it is this many times further from the
+    # overall medoid than typical, and at least OUTLIER_MIN_KM away
+    OUTLIER_FACTOR = 3.0
+    OUTLIER_MIN_KM = 25.0
+    CENTRAL_RADIUS_KM = 2.0
+    
+    async def process(
+        self, 
+        trip_details: Dict[str, Any], 
+        plan_mode: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Process trip details and create itinerary"""
-        print("📅 Itinerary Agent: Creating itinerary...")
+        itineraries = await self.process_variants(trip_details, 1, plan_mode)
+        return itineraries[0]
+    
+    async def process_variants(
+        self, 
+        trip_details: Dict[str, Any], 
+        variants: int = 1,
+        plan_mode: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Create one or more alternative itineraries from a single place fetch"""
+        itineraries, _ = await self.plan_variants(trip_details, variants, plan_mode)
+        return itineraries
+    
+    async def plan_variants(
+        self, 
+        trip_details: Dict[str, Any], 
+        variants: int = 1,
+        plan_mode: Optional[Dict[str, Any]] = None,
+        place_search: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[List[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """
+        Alternative itineraries plus the place data they were built from (None if the fetch failed).
+        place_search is a search_places result the caller already has (e.g. prefetched).
+        """
+        plan_mode = plan_mode or get_plan_mode()
+        print(f"📅 Itinerary Agent: Creating {variants} itinerary option(s) ({plan_mode['name']} mode)...")
+        place_data = None
         
         try:
-            # Get travel style preference
-            travel_style = trip_details.get("preferences", {}).get("travel_style", "balanced")
-            print(f"🎨 Travel Style Detected: {travel_style}")
-            
-            # Fetch places data from travel API - ADJUST CATEGORIES BASED ON TRAVEL STYLE
-            place_categories = self._get_categories_for_style(travel_style)
-            
-            places = []
-            for category, limit in place_categories.items():
-                category_places = await travel_api.search_places(trip_details["destination"], category)
-                # Take limited results per category based on priority
-                places.extend(category_places[:limit])
-            
-            # Remove duplicates based on name
-            unique_places = {p["name"]: p for p in places}.values()
-            places = list(unique_places)[:30]  # Increased to 30 for more variety
-            
-            print(f"📍 Diverse Attractions fetched: {len(places)} items (from {len(place_categories)} categories)")
-            
-            # Fetch fewer restaurants (only for meal planning)
-            restaurants = await travel_api.search_restaurants(
-                trip_details["destination"],
-                trip_details["preferences"].get("dietary", [])[0] if trip_details["preferences"].get("dietary") else "any"
-            )
-            restaurants = restaurants[:5]  # Limit to 5 restaurants only
-            print(f"🍽️ Restaurants fetched: {len(restaurants)} items (limited for meals)")
-            
-            # Fetch fewer hotels (only for accommodation reference)
-            hotels = await travel_api.search_hotels(
-                trip_details["destination"],
-                trip_details["preferences"].get("accommodation_type", "mid_range")
-            )
-            hotels = hotels[:3]  # Limit to 3 hotels only
-            print(f"🏨 Hotels fetched: {len(hotels)} items (limited for accommodation)")
+            place_data = await self.fetch_place_data(trip_details, plan_mode, place_search)
+            # One lookup index per request, shared by every variant
+            place_data["place_index"] = place_resolver.build_index(place_data["places_data"])
             
-            # Organize places by geographic clusters for route optimization
-            clustered_places = self._cluster_places_by_location(places)
-            print(f"🗺️  Organized {len(places)} attractions into geographic clusters")
-            
-            # Combine data for LLM with clustering info
-            places_data = [
-                {**p, "category": "attraction", "cluster": self._get_place_cluster(p, clustered_places)} 
-                for p in places
-            ] + [
-                {**r, "category": "restaurant"} for r in restaurants
-            ] + [
-                {**h, "category": "hotel"} for h in hotels
-            ]
-            print(f"📦 Total places for Gemini: {len(places_data)} items")
-            log_data("PLACES DATA SENT TO GEMINI", places_data)
-            if places_data:
-                print(f"🔍 Sample place: {places_data[0].get('name')}")
+            # No-LLM mode: deterministic schedule straight from the fetched places
+            if not plan_mode["use_llm"]:
+                return [self._create_rule_based_itinerary(trip_details, place_data, index) for index in range(variants)], place_data
             
             # Generate route-optimized itinerary using LLM
-            itinerary_data = await llm_service.generate_itinerary(
-                trip_details, 
-                places_data,
-                clustered_places  # Pass clustering info for route optimization
-            )
-            log_data("GEMINI ITINERARY RESPONSE", itinerary_data)
+            # (event trips always use the single short event prompt)
+            is_event = trip_details.get("event_details", {}).get("has_event", False)
+            if plan_mode["parallel_days"] and not is_event:
+                # One short prompt per day, all days in flight at once
+                responses = await asyncio.gather(*(
+                    llm_service.generate_itinerary_by_day(
+                        trip_details,
+                        place_data["places_data"],
+                        plan_mode,
+                        variant=index,
+                        variants=variants
+                    )
+                    for index in range(variants)
+                ), return_exceptions=True)
+            elif variants > 1:
+                responses = await llm_service.generate_itinerary_variants(
+                    trip_details,
+                    place_data["places_data"],
+                    place_data["clusters"],
+                    variants,
+                    plan_mode
+                )
+            else:
+                responses = [await llm_service.generate_itinerary(
+                    trip_details, 
+                    place_data["places_data"],
+                    place_data["clusters"],  # Pass clustering info for route optimization
+                    plan_mode
+                )]
             
-            # Structure and enrich the itinerary
-            itinerary = self._structure_itinerary(itinerary_data, trip_details)
+            itineraries = []
+            for index, itinerary_data in enumerate(responses):
+                if isinstance(itinerary_data, Exception):
+                    print(f"⚠️ Itinerary option {index + 1} failed: {itinerary_data}")
+                    continue
+                log_data("GEMINI ITINERARY RESPONSE", itinerary_data)
+                
+                # Structure and enrich the itinerary
+                # Ground generated names to fetched places before anything uses them
+                itinerary_data = place_resolver.ground(itinerary_data, place_data["place_index"])
+                itineraries.append(self._finalize_itinerary(
+                    self._structure_itinerary(itinerary_data, trip_details),
+                    trip_details,
+                    place_data
+                ))
+            
+            if not itineraries:
+                raise Exception("All itinerary options failed to generate")
             
-            print(f"✅ Itinerary Agent: Created {len(itinerary)}-day itinerary")
-            return itinerary
+            print(f"✅ Itinerary Agent: Created {len(itineraries)} option(s) of {len(itineraries[0])}-day itinerary")
+            return itineraries, place_data
             
         except Exception as e:
             import traceback
@@ -96,9 +148,246 @@ class ItineraryAgent:
             
             log_data("ITINERARY AGENT EXCEPTION", {"error": str(e), "traceback": traceback.format_exc()})
             
-            # Fallback to template-based itinerary
+            # Fallback to the rule-based planner when places were fetched
+            if place_data:
+                print("⚠️ FALLING BACK TO RULE-BASED PLANNER DUE TO ERROR")
+                try:
+                    return [self._create_rule_based_itinerary(trip_details, place_data)], place_data
+                except Exception as fallback_error:
+                    print(f"❌ Rule-based planner failed: {fallback_error}")
+            
+            # Last resort: template-based itinerary
             print("⚠️ FALLING BACK TO TEMPLATE DATA DUE TO ERROR")
-            return self._create_template_itinerary(trip_details)
+            return [self._create_template_itinerary(trip_details)], place_data
+    
+    def _create_rule_based_itinerary(
+        self, 
+        trip_details: Dict[str, Any], 
+        place_data: Dict[str, Any], 
+        variant: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Deterministic itinerary from fetched places (no-LLM mode and error fallback)"""
+        itinerary_data = rule_planner.plan(trip_details, place_data, variant)
+        if place_data.get("place_index"):
+            itinerary_data = place_resolver.ground(itinerary_data, place_data["place_index"])
+        itinerary = self._structure_itinerary(itinerary_data, trip_details)
+        return self._finalize_itinerary(itinerary, trip_details, place_data)
+    
+    def _finalize_itinerary(
+        self, 
+        itinerary: List[Dict[str, Any]], 
+        trip_details: Dict[str, Any], 
+        place_data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Deterministic post-processing: route order, then a consistent timeline"""
+        # Enforce the "minimize backtracking" instruction deterministically
+        itinerary = route_optimizer.optimize(itinerary, place_data["places_data"])
+        return timeline_engine.schedule(
+            itinerary,
+            place_data["places_data"],
+            trip_details.get("preferences", {}).get("transport_mode", "flexible")
+        )
+    
+    async def fetch_place_data(
+        self, 
+        trip_details: Dict[str, Any], 
+        plan_mode: Optional[Dict[str, Any]] = None,
+        search: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Fetch and cluster attractions, restaurants and hotels for the trip"""
+        plan_mode = plan_mode or get_plan_mode()
+        
+        # Event trips only need logistics around the venue, not the tourism set
+        if trip_details.get("event_details", {}).get("has_event"):
+            return await self._fetch_event_place_data(trip_details)
+        
+        # A search started before parsing finished (see place_search_key) is reused as is
+        search = search or await self.search_places(trip_details, plan_mode)
+        places = search["places"]
+        
+        # Organize places by geographic clusters for route optimization
+        clustering = self._cluster_places_by_location(
+            places, 
+            trip_details["duration"]["days"], 
+            trip_details["destination"]
+        )
+        clustered_places = clustering["clusters"]
+        print(f"🗺️  Organized {len(places)} attractions into geographic clusters")
+        
+        # Only restaurants near the attraction zones go to the prompt
+        dietary = trip_details.get("preferences", {}).get("dietary") or []
+        restaurants = self._restaurants_near_clusters(
+            trip_details["destination"],
+            search["restaurants"],
+            clustering["centroids"],
+            travel_api.restaurant_keyword(dietary[0] if dietary else "any")
+        )
+        print(f"🍽️ Restaurants fetched: {len(restaurants)} items (nearest per zone)")
+        hotels = search["hotels"]
+        
+        # Combine data for LLM with clustering info
+        places_data = [
+            {**p, "category": "attraction", "cluster": self._get_place_cluster(p, clustering["index"])} 
+            for p in places
+        ] + [
+            {**r, "category": "restaurant"} for r in restaurants
+        ] + [
+            {**h, "category": "hotel"} for h in hotels
+        ]
+        print(f"📦 Total places for Gemini: {len(places_data)} items")
+        log_data("PLACES DATA SENT TO GEMINI", places_data)
+        if places_data:
+            print(f"🔍 Sample place: {places_data[0].get('name')}")
+        
+        return {
+            "places": places,
+            "restaurants": restaurants,
+            "hotels": hotels,
+            "clusters": clustered_places,
+            "cluster_centroids": clustering["centroids"],
+            "places_data": places_data
+        }
+    
+    async def search_places(
+        self, 
+        trip_details: Dict[str, Any], 
+        plan_mode: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Network half of the place fetch: attraction, restaurant and hotel searches (no clustering)"""
+        plan_mode = plan_mode or get_plan_mode()
+        preferences = trip_details.get("preferences") or {}
+        
+        # Get travel style preference
+        travel_style = preferences.get("travel_style", "balanced")
+        print(f"🎨 Travel Style Detected: {travel_style}")
+        
+        # Fetch places data from travel API - ADJUST CATEGORIES BASED ON TRAVEL STYLE
+        place_categories = self._get_categories_for_style(travel_style)
+        
+        # Plan mode trims to the highest-weighted categories and caps results per category
+        if plan_mode["category_count"]:
+            top = sorted(place_categories.items(), key=lambda item: item[1], reverse=True)
+            place_categories = dict(top[:plan_mode["category_count"]])
+        if plan_mode["places_per_category"]:
+            place_categories = {
+                category: min(limit, plan_mode["places_per_category"])
+                for category, limit in place_categories.items()
+            }
+        
+        # Attractions, restaurants and hotels are independent searches, so they run together.
+        # Attractions: merged, weight-ordered searches that stop once quota and diversity are met
+        dietary = preferences.get("dietary") or []
+        (places, fetch_stats), restaurants, hotels = await asyncio.gather(
+            query_planner.fetch(
+                travel_api,
+                trip_details["destination"],
+                place_categories,
+                max_attractions=plan_mode["max_attractions"]
+            ),
+            travel_api.search_restaurants(trip_details["destination"], dietary[0] if dietary else "any"),
+            travel_api.search_hotels(trip_details["destination"], preferences.get("accommodation_type", "mid_range"))
+        )
+        print(f"📍 Diverse Attractions fetched: {len(places)} items (from {fetch_stats['groups']} query groups)")
+        
+        # Fewer hotels (only for accommodation reference)
+        hotels = hotels[:3]  # Limit to 3 hotels only
+        print(f"🏨 Hotels fetched: {len(hotels)} items (limited for accommodation)")
+        
+        return {"places": places, "restaurants": restaurants, "hotels": hotels}
+    
+    def place_search_key(self, trip_details: Dict[str, Any], plan_mode: Dict[str, Any]) -> Tuple:
+        """Everything search_places depends on: equal keys give the same searches"""
+        preferences = trip_details.get("preferences") or {}
+        dietary = preferences.get("dietary") or []
+        return (
+            destinations.destination_id(trip_details["destination"]),
+            preferences.get("travel_style", "balanced"),
+            dietary[0] if dietary else "any",
+            preferences.get("accommodation_type", "mid_range"),
+            plan_mode["name"]
+        )
+    
+    def _restaurants_near_clusters(
+        self, 
+        destination: str, 
+        restaurants: List[Dict[str, Any]], 
+        centroids: Dict[str, Dict[str, Any]],
+        keyword: str = "restaurant"
+    ) -> List[Dict[str, Any]]:
+        """Nearest restaurants to each attraction zone (first few when none have coordinates)"""
+        # Shared with /api/places/nearby: one index per cached restaurant search
+        index = spatial_indexes.get(
+            destination, f"restaurant:{keyword}", restaurants, travel_api.cache_version(destination, keyword)
+        )
+        if not len(index) or not centroids:
+            return restaurants[:self.RESTAURANT_LIMIT]
+        
+        picked = {}
+        for zone, centre in centroids.items():
+            nearby = index.nearest(
+                centre["lat"], 
+                centre["lng"], 
+                k=self.RESTAURANTS_PER_ZONE, 
+                max_km=self.RESTAURANT_RADIUS_KM
+            )
+            for restaurant, km in nearby:
+                picked.setdefault(restaurant["name"], {**restaurant, "cluster": zone, "distanceKm": km})
+        return list(picked.values()) or restaurants[:self.RESTAURANT_LIMIT]
+    
+    async def _fetch_event_place_data(self, trip_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch hotels and restaurants near the event venue plus a few attractions for free slots"""
+        event_area = self._get_event_area(trip_details)
+        print(f"🎪 Event trip: fetching logistics near {event_area}")
+        
+        # Independent searches, run together as in search_places
+        dietary = trip_details["preferences"].get("dietary", [])
+        restaurants, hotels, places = await asyncio.gather(
+            travel_api.search_restaurants(event_area, dietary[0] if dietary else "any"),
+            travel_api.search_hotels(
+                event_area,
+                trip_details["preferences"].get("accommodation_type", "mid_range")
+            ),
+            travel_api.search_places(event_area, "tourist attraction")
+        )
+        restaurants = restaurants[:5]
+        hotels = hotels[:3]
+        places = list({p["name"]: p for p in places}.values())[:self.EVENT_ATTRACTION_LIMIT]
+        print(f"🎪 Event logistics: {len(hotels)} hotels, {len(restaurants)} restaurants, {len(places)} nearby attractions")
+        
+        clustering = self._cluster_places_by_location(
+            places, 
+            trip_details["duration"]["days"], 
+            trip_details["destination"]
+        )
+        clustered_places = clustering["clusters"]
+        places_data = [
+            {**p, "category": "attraction", "cluster": self._get_place_cluster(p, clustering["index"])} 
+            for p in places
+        ] + [
+            {**r, "category": "restaurant"} for r in restaurants
+        ] + [
+            {**h, "category": "hotel"} for h in hotels
+        ]
+        log_data("PLACES DATA SENT TO GEMINI (EVENT)", places_data)
+        
+        return {
+            "places": places,
+            "restaurants": restaurants,
+            "hotels": hotels,
+            "clusters": clustered_places,
+            "cluster_centroids": clustering["centroids"],
+            "places_data": places_data
+        }
+    
+    def _get_event_area(self, trip_details: Dict[str, Any]) -> str:
+        """Search area for event logistics: the venue, qualified by the destination city"""
+        destination = trip_details["destination"]
+        venue = trip_details.get("event_details", {}).get("event_location")
+        if not venue:
+            return destination
+        if destination.lower() in venue.lower():
+            return venue
+        return f"{venue}, {destination}"
     
     def _structure_itinerary(
         self, 
@@ -116,11 +405,9 @@ class ItineraryAgent:
         for index, day in enumerate(days):
             activities = day.get("activities", [])
             
-            # Calculate estimated costs
-            total_cost = sum(
-                self._estimate_activity_cost(activity, trip_details["budget"])
-                for activity in activities
-            )
+            # Price each activity once; the budget agent reuses the category
+            prices = [cost_model.price(activity, trip_details) for activity in activities]
+            total_cost = sum(price["total"] for price in prices)
             
             structured.append({
                 "day": index + 1,
@@ -132,42 +419,27 @@ class ItineraryAgent:
                         "name": activity.get("name"),
                         "description": activity.get("description", ""),
                         "location": activity.get("location", {"name": activity.get("name")}),
-                        "estimatedCost": self._estimate_activity_cost(activity, trip_details["budget"]),
+                        "estimatedCost": price["total"],
+                        "costCategory": price["category"],
                         "duration": activity.get("duration", "2 hours"),
                         "tips": activity.get("tips", ""),
                         "booking": booking_service.generate_booking_for_activity(
                             activity, 
                             trip_details["destination"]
-                        )
+                        ),
+                        # Place resolver annotations
+                        **{key: activity[key] for key in ("grounding", "originalName", "placeId") if key in activity}
                     }
-                    for activity in activities
+                    for activity, price in zip(activities, prices)
                 ],
                 "totalCost": round(total_cost),
                 "summary": day.get("summary", f"Day {index + 1} exploring {trip_details['destination']}")
             })
+            if day.get("grounding"):
+                structured[-1]["grounding"] = day["grounding"]
         
         return structured
     
-    def _estimate_activity_cost(self, activity: Dict, total_budget: float) -> float:
-        """Estimate cost for an activity with realistic percentages"""
-        # More realistic cost allocation
-        cost_map = {
-            "sightseeing": total_budget * 0.08,  # 8% per attraction
-            "food": total_budget * 0.15,  # 15% per meal (realistic for food tours)
-            "Restaurant": total_budget * 0.15,  # Handle capitalized type from Gemini
-            "activity": total_budget * 0.12,  # 12% for activities
-            "travel": total_budget * 0.05,  # 5% for transport
-            "rest": 0
-        }
-        activity_type = activity.get("type", "sightseeing")
-        base_cost = cost_map.get(activity_type, total_budget * 0.08)
-        
-        # Ensure minimum reasonable cost
-        if activity_type in ["food", "Restaurant"] and base_cost < 300:
-            base_cost = 300  # Minimum ₹300 for a meal
-        
-        return round(base_cost)
-    
     def _suggest_time(self, activity_type: str) -> str:
         """Suggest time based on activity type"""
         time_map = {
@@ -192,58 +464,110 @@ class ItineraryAgent:
         except:
             return None
     
-    def _cluster_places_by_location(self, places: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    def _cluster_places_by_location(
+        self, 
+        places: List[Dict[str, Any]], 
+        days: int = 1,
+        destination: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Cluster places into geographic zones based on coordinates.
-        Uses simple lat/lng grouping for route optimization.
+        Cluster places into geographic zones for route optimization.
+        Haversine k-medoids with one zone per trip day; far-flung points go to an
+        "Outskirts" zone and places without coordinates to "Unlocated".
+        Returns {"clusters": zone -> places, "centroids": zone -> centre, "index": place name -> zone}.
+        The Unlocated zone is centred on the destination's gazetteer point when known.
         """
+        result = {"clusters": {}, "centroids": {}, "index": {}}
         if not places:
-            return {}
-        
-        # Simple clustering: group by rounded lat/lng (approximate zones)
-        clusters = {}
-        cluster_names = ["North", "South", "East", "West", "Central"]
+            return result
         
-        # Calculate center point
-        valid_places = [p for p in places if p.get("location", {}).get("lat") and p.get("location", {}).get("lng")]
-        if not valid_places:
-            return {"Central": places}
+        coords, valid = coordinates_array(places)
+        located = np.flatnonzero(valid)
+        labels = np.full(len(places), -1)  # -1 unlocated, -2 outskirts, else zone number
         
-        avg_lat = sum(p["location"]["lat"] for p in valid_places) / len(valid_places)
-        avg_lng = sum(p["location"]["lng"] for p in valid_places) / len(valid_places)
-        
-        # Cluster based on position relative to center
-        for place in places:
-            loc = place.get("location", {})
-            lat, lng = loc.get("lat", avg_lat), loc.get("lng", avg_lng)
+        if len(located):
+            distances = distance_matrix_km(coords[located])
             
-            if not lat or not lng:
-                cluster_key = "Central"
-            else:
-                # Determine zone
-                lat_diff = lat - avg_lat
-                lng_diff = lng - avg_lng
-                
-                if abs(lat_diff) < 0.01 and abs(lng_diff) < 0.01:
-                    cluster_key = "Central"
-                elif abs(lat_diff) > abs(lng_diff):
-                    cluster_key = "North" if lat_diff > 0 else "South"
-                else:
-                    cluster_key = "East" if lng_diff > 0 else "West"
+            # Outliers: far from the overall medoid relative to the typical spread
+            to_centre = distances[np.argmin(distances.sum(axis=1))]
+            outliers = to_centre > max(self.OUTLIER_MIN_KM, self.OUTLIER_FACTOR * np.median(to_centre))
+            labels[located[outliers]] = -2
             
-            if cluster_key not in clusters:
-                clusters[cluster_key] = []
-            clusters[cluster_key].append(place)
+            core = located[~outliers]
+            core_distances = distances[np.ix_(~outliers, ~outliers)]
+            # At least two places per zone, at most one zone per day
+            k = max(1, min(days, len(core) // 2))
+            _, labels[core] = self._k_medoids(core_distances, k)
+        
+        # Name zones by compass direction from the overall centre
+        names = {-1: "Unlocated", -2: "Outskirts"}
+        zone_ids = [z for z in np.unique(labels) if z >= 0]
+        if zone_ids:
+            centre = coords[labels >= 0].mean(axis=0)
+            used = {}
+            for zone in zone_ids:
+                name = self._zone_name(coords[labels == zone].mean(axis=0), centre)
+                used[name] = used.get(name, 0) + 1
+                names[zone] = name if used[name] == 1 else f"{name} {used[name]}"
+        
+        for i, place in enumerate(places):
+            zone = names[labels[i]]
+            result["clusters"].setdefault(zone, []).append(place)
+            result["index"][place["name"]] = zone
+        
+        for zone_id, zone in names.items():
+            members = labels == zone_id
+            if zone_id == -1 or not members.any():
+                continue
+            lat, lng = coords[members].mean(axis=0)
+            result["centroids"][zone] = {"lat": round(float(lat), 6), "lng": round(float(lng), 6), "size": int(members.sum())}
+        
+        destination_point = gazetteer.coordinates(destination)
+        if "Unlocated" in result["clusters"] and destination_point:
+            result["centroids"]["Unlocated"] = {
+                "lat": destination_point[0], 
+                "lng": destination_point[1], 
+                "size": len(result["clusters"]["Unlocated"]),
+                "approximate": True
+            }
+        
+        print(f"   🗺️  Geographic zones: {', '.join([f'{k}({len(v)})' for k, v in result['clusters'].items()])}")
+        return result
+    
+    def _k_medoids(self, distances: np.ndarray, k: int, max_iter: int = 20):
+        """Alternating k-medoids on a distance matrix with deterministic farthest-first seeding"""
+        n = len(distances)
+        medoids = [int(np.argmin(distances.sum(axis=1)))]
+        while len(medoids) < k:
+            medoids.append(int(np.argmax(distances[:, medoids].min(axis=1))))
+        medoids = np.array(medoids)
         
-        print(f"   🗺️  Geographic zones: {', '.join([f'{k}({len(v)})' for k, v in clusters.items()])}")
-        return clusters
+        for _ in range(max_iter):
+            assignment = np.argmin(distances[:, medoids], axis=1)
+            updated = medoids.copy()
+            for cluster in range(k):
+                members = np.flatnonzero(assignment == cluster)
+                if len(members):
+                    within = distances[np.ix_(members, members)].sum(axis=1)
+                    updated[cluster] = members[np.argmin(within)]
+            if np.array_equal(updated, medoids):
+                break
+            medoids = updated
+        
+        return medoids, np.argmin(distances[:, medoids], axis=1)
+    
+    def _zone_name(self, point: np.ndarray, centre: np.ndarray) -> str:
+        """Compass label for a zone centre relative to the overall centre"""
+        if float(haversine_km(point[0], point[1], centre[0], centre[1])) < self.CENTRAL_RADIUS_KM:
+            return "Central"
+        lat_km = (point[0] - centre[0]) * 111.0
+        lng_km = (point[1] - centre[1]) * 111.0 * np.cos(np.radians(centre[0]))
+        bearing = (np.degrees(np.arctan2(lng_km, lat_km)) + 360) % 360
+        return ["North", "North-East", "East", "South-East", "South", "South-West", "West", "North-West"][int((bearing + 22.5) // 45) % 8]
     
-    def _get_place_cluster(self, place: Dict[str, Any], clusters: Dict[str, List[Dict[str, Any]]]) -> str:
-        """Get the cluster name for a place"""
-        for cluster_name, cluster_places in clusters.items():
-            if any(p["name"] == place["name"] for p in cluster_places):
-                return cluster_name
-        return "Central"
+    def _get_place_cluster(self, place: Dict[str, Any], cluster_index: Dict[str, str]) -> str:
+        """Get the cluster name for a place (O(1) index lookup)"""
+        return cluster_index.get(place["name"], "Central")
     
     def _create_template_itinerary(self, trip_details: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Create template-based itinerary as fallback"""
@@ -13,14 +13,20 @@ class NLPAgent:
     async def process(
         self, 
         user_query: str, 
-        user_preferences: Optional[Dict] = None
+        user_preferences: Optional[Dict] = None,
+        model_tier: Optional[str] = None,
+        use_llm: bool = True
     ) -> Dict[str, Any]:
         """Process user query and extract trip details"""
         print("🧠 NLP Agent: Parsing user query...")
         
         try:
-            # Use LLM to parse the query
-            parsed = await llm_service.parse_user_query(user_query, user_preferences or {})
+            if use_llm:
+                # Use LLM to parse the query
+                parsed = await llm_service.parse_user_query(user_query, user_preferences or {}, model_tier)
+            else:
+                # No-LLM mode: regex extraction, enriched the same way as LLM output
+                parsed = self._regex_parse(user_query, user_preferences or {})
             
             # Debug: Log what was parsed
             print(f"🔍 LLM Parsed Data:")
@@ -148,6 +154,17 @@ class NLPAgent:
         
         return activities
     
+    def _regex_parse(self, query: str, user_preferences: Dict) -> Dict[str, Any]:
+        """Parsed-query shape from regex extraction alone"""
+        dest_match = re.search(r'to\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', query)
+        return {
+            "destination": dest_match.group(1) if dest_match else (user_preferences.get("destination") or "Goa"),
+            "preferences": {
+                "dietary": self._extract_dietary(query),
+                "activities": self._extract_activities(query)
+            }
+        }
+    
     def _fallback_parsing(
         self, 
         query: str, 
@@ -1,76 +1,368 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import copy
+import json
 import time
+import uuid
 from agents.nlp_agent import nlp_agent
 from agents.itinerary_agent import itinerary_agent
 from agents.budget_agent import budget_agent
+from agents.budget_optimizer import budget_optimizer
+from agents.place_resolver import place_resolver
+from agents.plan_modes import get_plan_mode, DEFAULT_PLAN_MODE
+from agents.dag import AgentDAG, Stage
+from utils.deadline import deadline_scope, remaining_ms, current_deadline, DEFAULT_DEADLINE_MS
+from utils.single_flight import SingleFlight
+from services.destinations import destinations
 
 
 class Orchestrator:
     """
     Agent Orchestrator
-    Coordinates all AI agents to create complete travel plans
+    Coordinates all AI agents to create complete travel plans.
+    The plan is a DAG of stages (see agents/dag.py); independent stages run
+    concurrently and extra stages can be plugged in with add_stage().
+    Everything after parsing is coalesced: concurrent requests that parse to
+    the same trip share one run of the planning stages.
     """
     
+    # Degradation ladder: time left on the request deadline when a stage starts
+    TRIM_CATEGORIES_BELOW_MS = 20000  # search only the fast mode's top categories
+    RULE_BASED_BELOW_MS = 10000       # skip the itinerary LLM, schedule with the rule-based planner
+    BUDGET_ONLY_BELOW_MS = 2000       # no places or itinerary, budget estimate only
+    # Hard stop after the deadline: the stages left by then are CPU-only and short
+    DEADLINE_GRACE_MS = 3000
+    
+    # Outputs of the shared planning run that land in each request's context
+    PLAN_OUTPUTS = ["prefetch_status", "search_mode", "itineraries", "place_data", "options", "budget_fit"]
+    
+    def __init__(self):
+        self.pipeline = AgentDAG([
+            Stage("prefetch", self._prefetch_stage, ["preferences", "plan_mode"], ["prefetch"]),
+            Stage("parse", self._parse_stage, ["query", "preferences", "plan_mode"], ["trip_details"]),
+            Stage("plan", self._plan_stage, ["prefetch", "trip_details", "plan_mode", "variants", "deadline_ms"], self.PLAN_OUTPUTS + ["coalesced"])
+        ])
+        # Run once per distinct trip in flight (see _plan_stage). The place search and
+        # the itinerary-independent costs are siblings; budgeting waits for both.
+        self.planning = AgentDAG([
+            Stage("places", self._places_stage, ["prefetch", "trip_details", "plan_mode"], ["place_search", "prefetch_status", "search_mode"]),
+            Stage("trip_costs", self._trip_costs_stage, ["trip_details"], ["trip_costs"]),
+            Stage("itinerary", self._itinerary_stage, ["trip_details", "place_search", "variants", "search_mode"], ["itineraries", "place_data"]),
+            Stage("budget", self._budget_stage, ["itineraries", "trip_details", "trip_costs"], ["options"]),
+            Stage("budget_fit", self._budget_fit_stage, ["options", "trip_details", "place_data"], ["budget_fit"])
+        ])
+        self.flights = SingleFlight()
+    
+    def add_stage(self, stage: Stage) -> None:
+        """Plug an extra stage into every plan (its outputs land in the pipeline context)"""
+        self.pipeline.add(stage)
+    
     async def create_travel_plan(
         self, 
         user_query: str, 
         user_id: str,
-        user_preferences: Dict[str, Any] = None
+        user_preferences: Dict[str, Any] = None,
+        variants: int = 1,
+        mode: str = DEFAULT_PLAN_MODE,
+        deadline_ms: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Create complete travel plan using all agents"""
+        """
+        Create complete travel plan using all agents.
+        With variants > 1, parsing and place fetching run once and every
+        alternative itinerary is budget-scored; the best fit is returned first.
+        The mode selects a plan-quality preset (instant / fast / balanced / thorough).
+        deadline_ms bounds the whole request (default PLAN_DEADLINE_MS); as it runs
+        low the plan degrades instead of failing and the response says why.
+        """
         start_time = time.time()
         print("\n🚀 Starting Agent Orchestration...")
         print(f'Query: "{user_query}"')
+        plan_mode = get_plan_mode(mode)
+        print(f"⚙️  Plan mode: {plan_mode['name']} (target {plan_mode['latency_target_ms']}ms)")
+        deadline_ms = deadline_ms or DEFAULT_DEADLINE_MS
         
         try:
-            # Step 1: Get user preferences (merge with provided)
-            preferences = user_preferences or {}
-            
-            # Step 2: NLP Agent - Parse user query
-            print("\n--- Step 1: NLP Processing ---")
-            trip_details = await nlp_agent.process(user_query, preferences)
+            # LLM and Mappls calls made inside the scope are bounded by the deadline
+            with deadline_scope(deadline_ms):
+                context = await self.pipeline.run({
+                    "query": user_query,
+                    "user_id": user_id,
+                    "preferences": user_preferences or {},
+                    "variants": variants,
+                    "plan_mode": plan_mode,
+                    "deadline_ms": deadline_ms,
+                    "degradations": []
+                }, deadline=current_deadline() + self.DEADLINE_GRACE_MS / 1000)
             
-            if not trip_details.get("destination"):
-                raise Exception("Could not determine destination from query")
-            
-            # Step 3: Itinerary Agent - Create day-wise plan
-            print("\n--- Step 2: Itinerary Generation ---")
-            itinerary = await itinerary_agent.process(trip_details)
-            
-            # Step 4: Budget Agent - Validate and adjust
-            print("\n--- Step 3: Budget Validation ---")
-            budget_validation = await budget_agent.process(
-                itinerary,
-                trip_details["budget"],
-                trip_details
-            )
+            trip_details = context["trip_details"]
+            options = context["options"]
+            itinerary = options[0]["itinerary"]
+            budget_validation = options[0]["budgetValidation"]
+            budget_fit = context["budget_fit"]
             
-            # Step 5: Create response
+            # Create response
             processing_time = (time.time() - start_time) * 1000  # Convert to ms
-            trip_id = f"temp-{int(time.time() * 1000)}"
+            # Unique even for coalesced requests finishing in the same millisecond
+            trip_id = f"temp-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
             
             response = {
                 "success": True,
                 "tripId": trip_id,
                 "destination": trip_details["destination"],
+                "destinationId": trip_details["destination_id"],
                 "duration": trip_details["duration"],
                 "budget": trip_details["budget"],
                 "itinerary": itinerary,
                 "budgetValidation": budget_validation,
                 "processingTime": processing_time,
+                "mode": plan_mode["name"],
+                "latencyTargetMs": plan_mode["latency_target_ms"],
+                "withinLatencyTarget": processing_time <= plan_mode["latency_target_ms"],
+                "groundingRate": place_resolver.grounding_rate(itinerary),
+                "placePrefetch": context["prefetch_status"],
+                "coalesced": context["coalesced"],
+                "stageTimings": context["timings"],
+                "deadlineMs": deadline_ms,
+                "degraded": bool(context["degradations"]),
+                "degradedReason": "; ".join(context["degradations"]) or None,
                 "message": (
                     "✅ Your perfect trip is ready!" 
                     if budget_validation["withinBudget"]
+                    else "⚠️ Trip plan created but slightly over budget. An adjusted plan that fits is included."
+                    if budget_fit and budget_fit["withinBudget"]
                     else "⚠️ Trip plan created but slightly over budget. See suggestions for adjustments."
                 )
             }
+            if budget_fit:
+                response["budgetFit"] = budget_fit
+            if variants > 1:
+                response["variants"] = options
             
             print(f"\n✅ Orchestration Complete ({processing_time:.0f}ms)")
             return response
             
+        except asyncio.CancelledError:
+            # Client went away: the pipeline has already cancelled its stages
+            print("\n🛑 Orchestration cancelled")
+            raise
         except Exception as e:
             print(f"\n❌ Orchestration Error: {str(e)}")
             raise Exception(f"Failed to create travel plan: {str(e)}")
+    
+    # --- Pipeline stages: each reads its inputs from the context and returns its outputs ---
+    
+    async def _prefetch_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Place searches only need the form fields, so they start while the query is parsed
+        prefetch = self._start_place_prefetch(context["preferences"], context["plan_mode"])
+        if prefetch:
+            context["background"].append(prefetch[1])
+        return {"prefetch": prefetch}
+    
+    async def _parse_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        print("\n--- Step 1: NLP Processing ---")
+        plan_mode = context["plan_mode"]
+        trip_details = await nlp_agent.process(
+            context["query"],
+            context["preferences"],
+            plan_mode["parse_model_tier"],
+            use_llm=plan_mode["use_llm"]
+        )
+        if not trip_details.get("destination"):
+            raise Exception("Could not determine destination from query")
+        # One key per destination for every downstream cache
+        trip_details["destination_id"] = destinations.destination_id(trip_details["destination"])
+        return {"trip_details": trip_details}
+    
+    async def _plan_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Identical trips planned at the same moment (a promotion burst) wait for one run
+        key = self._flight_key(context)
+        prefetch = context["prefetch"]
+        if prefetch and self.flights.joining(key):
+            prefetch[1].cancel()
+        planned, coalesced = await self.flights.run(key, lambda: self._plan(context))
+        if coalesced:
+            print(f"🔗 Joined an in-flight plan for {context['trip_details']['destination']}")
+        offset = context["timings"]["plan"]["startMs"]
+        for name, timing in planned["timings"].items():
+            context["timings"][name] = {**timing, "startMs": round(timing["startMs"] + offset, 1)}
+        context["degradations"].extend(planned["degradations"])
+        # Each request gets its own copy of the shared plan
+        outputs = copy.deepcopy({name: planned[name] for name in self.PLAN_OUTPUTS})
+        return {**outputs, "coalesced": coalesced}
+    
+    async def _plan(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # The leader's prefetch now belongs to the shared run, which outlives the leader if others joined
+        prefetch = context["prefetch"]
+        if prefetch and prefetch[1] in context["background"]:
+            context["background"].remove(prefetch[1])
+        deadline = current_deadline()
+        try:
+            return await self.planning.run({
+                "prefetch": prefetch,
+                "trip_details": context["trip_details"],
+                "plan_mode": context["plan_mode"],
+                "variants": context["variants"],
+                "degradations": []
+            }, deadline=None if deadline is None else deadline + self.DEADLINE_GRACE_MS / 1000)
+        finally:
+            if prefetch:
+                prefetch[1].cancel()
+    
+    def _flight_key(self, context: Dict[str, Any]) -> str:
+        """Normalized trip after parsing (destination by ID, list order ignored), mode, variants and deadline"""
+        def normalize(value):
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return sorted((normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+            return value
+        trip = {key: value for key, value in context["trip_details"].items() if key != "destination"}
+        return json.dumps(
+            normalize([trip, context["plan_mode"]["name"], context["variants"], context["deadline_ms"]]),
+            sort_keys=True, default=str
+        )
+    
+    async def _places_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        plan_mode = context["plan_mode"]
+        left = remaining_ms()
+        if left is not None and left < self.BUDGET_ONLY_BELOW_MS:
+            # The itinerary stage will skip planning, so the places aren't needed
+            if context["prefetch"]:
+                context["prefetch"][1].cancel()
+            return {"place_search": None, "prefetch_status": "off", "search_mode": plan_mode}
+        
+        place_search, status = await self._reconcile_prefetch(
+            context["prefetch"], context["trip_details"], plan_mode
+        )
+        search_mode = plan_mode
+        if place_search is None and left is not None and left < self.TRIM_CATEGORIES_BELOW_MS:
+            fast = get_plan_mode("fast")
+            search_mode = {
+                **plan_mode,
+                **{key: fast[key] for key in ("category_count", "places_per_category", "max_attractions")}
+            }
+            if search_mode != plan_mode:
+                self._degrade(context, f"{left / 1000:.1f}s left before place search: top {fast['category_count']} categories only")
+        
+        # Event trips fetch around the venue in the itinerary stage instead
+        is_event = context["trip_details"].get("event_details", {}).get("has_event", False)
+        if place_search is None and not is_event:
+            try:
+                place_search = await itinerary_agent.search_places(context["trip_details"], search_mode)
+            except Exception as e:
+                # The itinerary stage fetches again and falls back from there
+                print(f"⚠️ Place search failed: {e}")
+        return {"place_search": place_search, "prefetch_status": status, "search_mode": search_mode}
+    
+    async def _trip_costs_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Accommodation and transport only need the parsed trip, so they don't wait for the itinerary
+        return {"trip_costs": budget_agent.trip_costs(context["trip_details"])}
+    
+    async def _itinerary_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Day-wise plan(s) from one place fetch
+        print("\n--- Step 2: Itinerary Generation ---")
+        plan_mode = context["search_mode"]
+        left = remaining_ms()
+        if left is not None and left < self.BUDGET_ONLY_BELOW_MS:
+            self._degrade(context, f"{left / 1000:.1f}s left before planning: budget estimate only")
+            return {"itineraries": [[]], "place_data": None}
+        if left is not None and left < self.RULE_BASED_BELOW_MS and plan_mode["use_llm"]:
+            self._degrade(context, f"{left / 1000:.1f}s left before planning: rule-based itinerary")
+            plan_mode = {**plan_mode, "use_llm": False}
+        
+        itineraries, place_data = await itinerary_agent.plan_variants(
+            context["trip_details"], context["variants"], plan_mode, context["place_search"]
+        )
+        # A generation cut off by the deadline already fell back to the rule-based planner
+        if plan_mode["use_llm"] and remaining_ms() == 0:
+            self._degrade(context, "itinerary generation hit the deadline: fallback itinerary")
+        return {"itineraries": itineraries, "place_data": place_data}
+    
+    async def _budget_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Validate and score each option; the best budget fit becomes the primary plan
+        print("\n--- Step 3: Budget Validation ---")
+        trip_details = context["trip_details"]
+        options = []
+        for index, option in enumerate(context["itineraries"]):
+            validation = await budget_agent.process(option, trip_details["budget"], trip_details, context["trip_costs"])
+            options.append({
+                "variant": index + 1,
+                "itinerary": option,
+                "budgetValidation": validation,
+                "budgetScore": budget_agent.score_variant(validation)
+            })
+        options.sort(key=lambda o: o["budgetScore"], reverse=True)
+        return {"options": options}
+    
+    async def _budget_fit_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # Over budget: edit the plan to fit instead of asking for a re-plan
+        best = context["options"][0]
+        if best["budgetValidation"]["withinBudget"]:
+            return {"budget_fit": None}
+        trip_details = context["trip_details"]
+        place_data = context["place_data"]
+        budget_fit = budget_optimizer.fit(
+            best["itinerary"],
+            trip_details,
+            place_data["places_data"] if place_data else None
+        )
+        if budget_fit:
+            budget_fit["budgetValidation"] = await budget_agent.process(
+                budget_fit["itinerary"],
+                trip_details["budget"],
+                budget_fit.pop("tripDetails")
+            )
+        return {"budget_fit": budget_fit}
+    
+    def _degrade(self, context: Dict[str, Any], reason: str) -> None:
+        print(f"⏳ Degrading: {reason}")
+        context["degradations"].append(reason)
+    
+    def _start_place_prefetch(
+        self, 
+        preferences: Dict[str, Any], 
+        plan_mode: Dict[str, Any]
+    ) -> Optional[Tuple[Tuple, asyncio.Task]]:
+        """Speculative place search from the form's fields (None without a form destination)"""
+        if not preferences.get("destination") or not plan_mode["use_llm"]:
+            return None
+        form = preferences.get("preferences") or {}
+        # Same defaults the NLP agent fills in
+        speculative = {
+            "destination": preferences["destination"],
+            "preferences": {
+                "travel_style": form.get("travel_style", "balanced"),
+                "dietary": form.get("dietary") or [],
+                "accommodation_type": form.get("accommodation_type", "mid_range")
+            }
+        }
+        key = itinerary_agent.place_search_key(speculative, plan_mode)
+        task = asyncio.create_task(itinerary_agent.search_places(speculative, plan_mode))
+        # A discarded prefetch may still fail; collect the error so it isn't reported as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        print(f"⚡ Prefetching places for {preferences['destination']} while parsing")
+        return key, task
+    
+    async def _reconcile_prefetch(
+        self, 
+        prefetch: Optional[Tuple[Tuple, asyncio.Task]], 
+        trip_details: Dict[str, Any], 
+        plan_mode: Dict[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """(search, status): the prefetched search when the parsed trip needs the same one"""
+        if prefetch is None:
+            return None, "off"
+        key, task = prefetch
+        is_event = trip_details.get("event_details", {}).get("has_event", False)
+        if is_event or key != itinerary_agent.place_search_key(trip_details, plan_mode):
+            task.cancel()
+            print("🔁 Place prefetch discarded: parsed trip differs from the form")
+            return None, "miss"
+        try:
+            return await task, "hit"
+        except Exception as e:
+            print(f"⚠️ Place prefetch failed, fetching again: {e}")
+            return None, "miss"
 
 
 # Singleton instance
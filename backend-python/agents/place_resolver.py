@@ -0,0 +1,224 @@
+import re
+import unicodedata
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import get_coordinates, haversine_km
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+MEAL_PATTERN = re.compile(r"breakfast|lunch|dinner|brunch", re.IGNORECASE)
+
+# Words that say nothing about which place is meant
+STOP_TOKENS = {"the", "a", "an", "of", "at", "in", "and", "to", "visit", "explore", "breakfast", "lunch", "dinner"}
+# Category words that alone must not make a match ("beach" is not "Baga Beach")
+GENERIC_TOKENS = {
+    "beach", "fort", "temple", "church", "museum", "park", "garden", "lake", "market",
+    "restaurant", "cafe", "hotel", "resort", "inn", "kitchen", "house", "palace", "point",
+    "falls", "waterfall", "waterfalls", "view", "viewpoint", "sanctuary", "national"
+}
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ASCII name with punctuation collapsed to single spaces"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    return " ".join(TOKEN_PATTERN.findall(text))
+
+
+def name_tokens(name: str) -> frozenset:
+    return frozenset(token for token in normalize_name(name).split() if token not in STOP_TOKENS)
+
+
+class PlaceIndex:
+    """Lookup tables over one request's fetched places (exact, normalized, token)"""
+
+    def __init__(self, places: List[Dict[str, Any]]):
+        self.places = places
+        self.exact: Dict[str, int] = {}
+        self.normalized: Dict[str, int] = {}
+        self.tokens: List[frozenset] = []
+        self.inverted: Dict[str, List[int]] = {}
+
+        for index, place in enumerate(places):
+            name = place.get("name") or ""
+            self.exact.setdefault(name.strip().lower(), index)
+            self.normalized.setdefault(normalize_name(name), index)
+            tokens = name_tokens(name)
+            self.tokens.append(tokens)
+            for token in tokens:
+                self.inverted.setdefault(token, []).append(index)
+
+    def match(self, name: str, category: Optional[str] = None) -> Tuple[Optional[int], str]:
+        """(place index, match kind) for a generated name; kind is exact / normalized / fuzzy / none"""
+        if not name:
+            return None, "none"
+
+        for kind, table, key in (
+            ("exact", self.exact, name.strip().lower()),
+            ("normalized", self.normalized, normalize_name(name))
+        ):
+            index = table.get(key)
+            if index is not None and self._in_category(index, category):
+                return index, kind
+
+        query = name_tokens(name)
+        best, best_score = None, 0.0
+        candidates = {i for token in query for i in self.inverted.get(token, [])}
+        for index in candidates:
+            if not self._in_category(index, category):
+                continue
+            common = query & self.tokens[index]
+            if not common - GENERIC_TOKENS:
+                continue
+            jaccard = len(common) / len(query | self.tokens[index])
+            # "Sunset walk at Baga Beach" contains all of "Baga Beach";
+            # "Sattvam" is all of the query for "Sattvam - Pure Veg Restaurant"
+            place_containment = len(common) / len(self.tokens[index])
+            query_containment = len(common) / len(query)
+            score = max(jaccard, 0.9 * place_containment, 0.8 * query_containment)
+            if score > best_score:
+                best, best_score = index, score
+
+        if best is not None and best_score >= PlaceResolver.FUZZY_THRESHOLD:
+            return best, "fuzzy"
+        return None, "none"
+
+    def _in_category(self, index: int, category: Optional[str]) -> bool:
+        return category is None or self.places[index].get("category") == category
+
+
+class PlaceResolver:
+    """
+    Place Resolver
+    Grounds generated activity names to the places fetched for the request so
+    every activity carries a place_id, coordinates and address. Hallucinated
+    meals, hotels and sights are swapped for the nearest real place of the same
+    category instead of regenerating the itinerary.
+    """
+
+    FUZZY_THRESHOLD = 0.6
+
+    # Activity type -> place category it must come from
+    CATEGORY_FOR_TYPE = {
+        "food": "restaurant",
+        "hotel": "hotel",
+        "sightseeing": "attraction",
+        "activity": "attraction"
+    }
+    # Types whose unmatched names are replaced (event blocks etc. are left alone)
+    SUBSTITUTE_TYPES = {"food", "hotel", "sightseeing"}
+
+    def build_index(self, places: List[Dict[str, Any]]) -> PlaceIndex:
+        """Build the per-request index over fetched places"""
+        return PlaceIndex(places)
+
+    def ground(self, itinerary_data: Any, index: PlaceIndex) -> Any:
+        """Resolve every activity in a Gemini-shaped itinerary in place; attaches per-day grounding"""
+        days = itinerary_data if isinstance(itinerary_data, list) else itinerary_data.get("days", [])
+        used = set()
+        totals = {"matched": 0, "substituted": 0, "unresolved": 0}
+
+        for day in days:
+            stats = {"matched": 0, "substituted": 0, "unresolved": 0}
+            last_point = None
+            for activity in day.get("activities", []):
+                category = self.CATEGORY_FOR_TYPE.get(activity.get("type"))
+                if not category or activity.get("grounding") == "freeform":
+                    continue
+
+                place_index, kind = self._match_activity(activity, index, category)
+                if place_index is None and activity.get("type") in self.SUBSTITUTE_TYPES:
+                    place_index = self._substitute(index, category, used, last_point)
+                    kind = "substituted" if place_index is not None else "none"
+
+                if place_index is None:
+                    if activity.get("type") in self.SUBSTITUTE_TYPES:
+                        stats["unresolved"] += 1
+                        activity["grounding"] = "unresolved"
+                    continue
+
+                place = index.places[place_index]
+                self._apply(activity, place, kind)
+                used.add(place_index)
+                stats["substituted" if kind == "substituted" else "matched"] += 1
+                last_point = get_coordinates(place) or last_point
+
+            day["grounding"] = stats
+            for key in totals:
+                totals[key] += stats[key]
+
+        resolved = sum(totals.values())
+        if resolved:
+            print(
+                f"📌 Place Resolver: {totals['matched']}/{resolved} grounded, "
+                f"{totals['substituted']} substituted, {totals['unresolved']} unresolved"
+            )
+        return itinerary_data
+
+    def grounding_rate(self, itinerary: List[Dict[str, Any]]) -> Optional[float]:
+        """Share of place-bound activities that matched a fetched place without substitution"""
+        totals = [day["grounding"] for day in itinerary if day.get("grounding")]
+        checked = sum(t["matched"] + t["substituted"] + t["unresolved"] for t in totals)
+        if not checked:
+            return None
+        return round(sum(t["matched"] for t in totals) / checked, 3)
+
+    def _match_activity(self, activity: Dict[str, Any], index: PlaceIndex, category: str) -> Tuple[Optional[int], str]:
+        """Try the location name first, then the activity name and description"""
+        location = activity.get("location") or {}
+        names = [location.get("name"), activity.get("name")]
+        if activity.get("type") == "food":
+            # "Lunch at X" style descriptions often carry the real restaurant
+            names.append(activity.get("description"))
+        for name in names:
+            place_index, kind = index.match(name, category)
+            if place_index is not None:
+                return place_index, kind
+        return None, "none"
+
+    def _substitute(
+        self,
+        index: PlaceIndex,
+        category: str,
+        used: set,
+        last_point: Optional[Tuple[float, float]]
+    ) -> Optional[int]:
+        """Nearest place of the category (unused ones first, restaurants may repeat)"""
+        candidates = [i for i, place in enumerate(index.places) if place.get("category") == category]
+        unused = [i for i in candidates if i not in used]
+        pool = unused or (candidates if category in ("restaurant", "hotel") else [])
+        if not pool:
+            return None
+
+        def rank(i):
+            point = get_coordinates(index.places[i])
+            distance = float(haversine_km(*last_point, *point)) if last_point and point else float("inf")
+            return distance, -(index.places[i].get("rating") or 0)
+
+        return min(pool, key=rank)
+
+    def _apply(self, activity: Dict[str, Any], place: Dict[str, Any], kind: str):
+        """Point the activity at a fetched place"""
+        location = {"name": place["name"], "address": place.get("address", "")}
+        if place.get("place_id"):
+            location["place_id"] = place["place_id"]
+        if get_coordinates(place):
+            location.update(lat=place["location"]["lat"], lng=place["location"]["lng"])
+
+        if kind == "substituted":
+            activity["originalName"] = activity.get("name")
+            if activity.get("type") == "food":
+                meal = MEAL_PATTERN.search(activity.get("description") or activity.get("name") or "")
+                activity["description"] = f"{meal.group(0).title() if meal else 'Meal'} at {place['name']}"
+            elif activity.get("type") == "sightseeing":
+                activity["description"] = f"Explore {place['name']}"
+        # A matched sight keeps its planned activity ("Sunset walk at Baga Beach"),
+        # the place it happens at is the location
+        if kind == "substituted" or activity.get("type") in ("food", "hotel"):
+            activity["name"] = place["name"]
+
+        activity["location"] = location
+        if place.get("place_id"):
+            activity["placeId"] = place["place_id"]
+        activity["grounding"] = kind
+
+
+# Singleton instance
+place_resolver = PlaceResolver()
@@ -0,0 +1,72 @@
+from typing import Dict, Any, Optional
+
+
+# Plan-quality presets
+# - category_count: top-weighted place categories to search (None = all for the style)
+# - places_per_category: cap on results kept per category (None = style weight)
+# - max_attractions: attractions kept after de-duplication
+# - prompt_token_budget: approximate token budget for the whole itinerary prompt
+# - compact_prompt: use the short instruction set instead of the full one
+# - model_tier: LLM tier for itinerary generation (lite / standard / pro)
+# - parse_model_tier: LLM tier for query parsing
+# - parallel_days: generate each day concurrently instead of one big call
+# - latency_target_ms: target end-to-end latency reported to the client
+# - use_llm: False skips the LLM entirely (regex parsing + rule-based planner)
+PLAN_MODES = {
+    "instant": {
+        "category_count": 6,
+        "places_per_category": 4,
+        "max_attractions": 20,
+        "prompt_token_budget": 0,
+        "compact_prompt": True,
+        "model_tier": None,
+        "parse_model_tier": None,
+        "parallel_days": False,
+        "latency_target_ms": 1500,
+        "use_llm": False
+    },
+    "fast": {
+        "category_count": 6,
+        "places_per_category": 4,
+        "max_attractions": 15,
+        "prompt_token_budget": 3000,
+        "compact_prompt": True,
+        "model_tier": "lite",
+        "parse_model_tier": "lite",
+        "parallel_days": True,
+        "latency_target_ms": 5000,
+        "use_llm": True
+    },
+    "balanced": {
+        "category_count": None,
+        "places_per_category": None,
+        "max_attractions": 30,
+        "prompt_token_budget": 12000,
+        "compact_prompt": False,
+        "model_tier": "standard",
+        "parse_model_tier": "standard",
+        "parallel_days": False,
+        "latency_target_ms": 20000,
+        "use_llm": True
+    },
+    "thorough": {
+        "category_count": None,
+        "places_per_category": None,
+        "max_attractions": 40,
+        "prompt_token_budget": 20000,
+        "compact_prompt": False,
+        "model_tier": "pro",
+        "parse_model_tier": "standard",
+        "parallel_days": False,
+        "latency_target_ms": 45000,
+        "use_llm": True
+    }
+}
+
+DEFAULT_PLAN_MODE = "balanced"
+
+
+def get_plan_mode(name: Optional[str] = None) -> Dict[str, Any]:
+    """Return a copy of the preset for a mode name (unknown names use the default)"""
+    name = name if name in PLAN_MODES else DEFAULT_PLAN_MODE
+    return {"name": name, **PLAN_MODES[name]}
@@ -0,0 +1,161 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import build_coordinate_lookup, resolve_coordinates, distance_matrix_km
+
+
+class RouteOptimizer:
+    """
+    Route Optimizer
+    Reorders each day's sightseeing stops (nearest neighbour + 2-opt) so the day
+    doesn't zigzag across the city. Meals, hotel check-in/out, travel legs and
+    event blocks are anchors: they keep their position and time slot, and only
+    the stops between two anchors are shuffled among their own slots.
+    """
+
+    # Activity types that may be reordered; everything else is an anchor
+    MOVABLE_TYPES = {"sightseeing"}
+
+    # 2-opt passes before giving up on further improvement
+    MAX_PASSES = 10
+
+    def optimize(
+        self,
+        itinerary: List[Dict[str, Any]],
+        places: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Reorder sightseeing within each day and attach per-day routeStats"""
+        lookup = build_coordinate_lookup(places)
+
+        total_before = total_after = 0.0
+        for day in itinerary:
+            before, after = self._optimize_day(day, lookup)
+            day["routeStats"] = {
+                "distanceKmBefore": round(before, 1),
+                "distanceKmAfter": round(after, 1),
+                "savedKm": round(before - after, 1)
+            }
+            total_before += before
+            total_after += after
+
+        if total_before > total_after:
+            print(f"🧭 Route Optimizer: {total_before:.1f} km → {total_after:.1f} km across {len(itinerary)} day(s)")
+        return itinerary
+
+    def _optimize_day(
+        self,
+        day: Dict[str, Any],
+        lookup: Dict[str, Tuple[float, float]]
+    ) -> Tuple[float, float]:
+        """Optimize one day in place, returning (km before, km after)"""
+        activities = day.get("activities", [])
+        coords = [resolve_coordinates(activity, lookup) for activity in activities]
+        located = [i for i, point in enumerate(coords) if point]
+        if len(located) < 2:
+            return 0.0, 0.0
+
+        # One matrix per day, indexed by activity position
+        matrix = np.zeros((len(activities), len(activities)))
+        matrix[np.ix_(located, located)] = distance_matrix_km([coords[i] for i in located])
+        before = self._path_length(located, matrix)
+
+        order = list(range(len(activities)))
+        for run in self._movable_runs(activities, coords):
+            start = self._anchor(run[0] - 1, -1, coords)
+            end = self._anchor(run[-1] + 1, 1, coords)
+            best = self._two_opt(self._nearest_neighbour(run, start, matrix), start, end, matrix)
+            if self._run_length(best, start, end, matrix) >= self._run_length(run, start, end, matrix):
+                continue  # The model's own order is already as good
+            for slot, stop in zip(run, best):
+                order[slot] = stop
+
+        if order != list(range(len(activities))):
+            # Stops move; their time slots stay where they were
+            times = [activity.get("time") for activity in activities]
+            day["activities"] = [activities[i] for i in order]
+            for activity, time in zip(day["activities"], times):
+                if time:
+                    activity["time"] = time
+
+        after = self._path_length([i for i in order if coords[i]], matrix)
+        return before, after
+
+    def _movable_runs(self, activities: List[Dict[str, Any]], coords: List) -> List[List[int]]:
+        """Consecutive located sightseeing stops between anchors"""
+        runs, current = [], []
+        for i, activity in enumerate(activities):
+            if activity.get("type") in self.MOVABLE_TYPES and coords[i]:
+                current.append(i)
+            elif activity.get("type") not in self.MOVABLE_TYPES:
+                # Unlocated stops stay put without breaking the run around them
+                if len(current) > 1:
+                    runs.append(current)
+                current = []
+        if len(current) > 1:
+            runs.append(current)
+        return runs
+
+    def _anchor(self, index: int, step: int, coords: List) -> Optional[int]:
+        """Nearest located activity from index in direction step"""
+        while 0 <= index < len(coords):
+            if coords[index]:
+                return index
+            index += step
+        return None
+
+    def _nearest_neighbour(self, stops: List[int], start: Optional[int], matrix: np.ndarray) -> List[int]:
+        """Greedy tour from the previous anchor (or the first stop)"""
+        remaining = list(stops)
+        tour = []
+        current = start
+        if current is None:
+            current = remaining.pop(0)
+            tour.append(current)
+        while remaining:
+            nearest = min(remaining, key=lambda stop: matrix[current, stop])
+            remaining.remove(nearest)
+            tour.append(nearest)
+            current = nearest
+        return tour
+
+    def _two_opt(
+        self,
+        tour: List[int],
+        start: Optional[int],
+        end: Optional[int],
+        matrix: np.ndarray
+    ) -> List[int]:
+        """Reverse segments while it shortens the start → tour → end path"""
+        path = ([start] if start is not None else []) + tour + ([end] if end is not None else [])
+        first = 1 if start is not None else 0
+        last = len(path) - (1 if end is not None else 0)
+
+        for _ in range(self.MAX_PASSES):
+            improved = False
+            for i in range(first, last - 1):
+                for j in range(i + 1, last):
+                    before = (matrix[path[i - 1], path[i]] if i > 0 else 0) + \
+                             (matrix[path[j], path[j + 1]] if j + 1 < len(path) else 0)
+                    after = (matrix[path[i - 1], path[j]] if i > 0 else 0) + \
+                            (matrix[path[i], path[j + 1]] if j + 1 < len(path) else 0)
+                    if after < before - 1e-9:
+                        path[i:j + 1] = path[i:j + 1][::-1]
+                        improved = True
+            if not improved:
+                break
+
+        return path[first:last]
+
+    def _run_length(self, tour: List[int], start: Optional[int], end: Optional[int], matrix: np.ndarray) -> float:
+        """Path length of a run including its anchor legs"""
+        path = ([start] if start is not None else []) + tour + ([end] if end is not None else [])
+        return self._path_length(path, matrix)
+
+    def _path_length(self, order: List[int], matrix: np.ndarray) -> float:
+        """Total km along consecutive located activities"""
+        if len(order) < 2:
+            return 0.0
+        return float(matrix[order[:-1], order[1:]].sum())
+
+
+# Singleton instance
+route_optimizer = RouteOptimizer()
@@ -0,0 +1,391 @@
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import get_coordinates, haversine_km
+from agents.timeline_engine import timeline_engine
+from services.gazetteer import gazetteer
+
+
+class RulePlanner:
+    """
+    Rule Planner
+    Deterministic scheduler that builds a day-wise itinerary from the fetched
+    places, clusters, restaurants and hotels without an LLM call. Output has the
+    same shape as the Gemini response so it goes through the normal structuring
+    and route optimization.
+    """
+
+    # Sightseeing stops per day (travel days, full days)
+    STYLE_PACE = {
+        "relaxed": (3, 4),
+        "balanced": (4, 5),
+        "cultural": (4, 5),
+        "adventure": (5, 6)
+    }
+
+    # Meal times in minutes from midnight
+    MEAL_TIMES = {"breakfast": 8 * 60 + 30, "lunch": 13 * 60, "dinner": 19 * 60 + 30}
+
+    # Sightseeing windows around the meals (start, end); the way back to the next
+    # meal (at least TRAVEL_BUFFER) is kept free at the end of a window
+    MORNING_WINDOW = (9 * 60 + 30, 12 * 60 + 45)
+    AFTERNOON_WINDOW = (14 * 60 + 15, 19 * 60 + 15)
+    TRAVEL_BUFFER = 15
+    # Time at a stop once the legs between stops are taken out of the window
+    MIN_STOP_MINUTES = 45
+    MAX_STOP_MINUTES = 180
+
+    # Intercity legs: road km from the gazetteer at this average speed plus terminal time.
+    # Longer legs than OVERNIGHT_LEG_MINUTES are travelled overnight.
+    INTERCITY_KMH = 55
+    INTERCITY_OVERHEAD_MIN = 30
+    UNKNOWN_INTERCITY_MIN = 90
+    OVERNIGHT_LEG_MINUTES = 4 * 60 + 30
+    DEPART_TIME = 6 * 60
+    RETURN_TIME = 21 * 60
+
+    # Zones visited after the regular ones; far ones are kept off the check-out day
+    LATE_ZONES = ("Outskirts", "Unlocated")
+    DEPARTURE_DAY_EXCLUDED = ("Outskirts",)
+
+    # Light unplanned stops that top a day up to its style's minimum pace
+    FILLER_ACTIVITIES = [
+        ("Stroll through a local market in {destination}", "Browse local stalls and street snacks"),
+        ("Walk around the old quarter of {destination}", "Wander the lanes at your own pace"),
+        ("Café break in {destination}", "Slow down over coffee and people-watching"),
+        ("Evening walk in {destination}", "Catch the sunset from a nearby promenade or viewpoint")
+    ]
+
+    # Restaurant words that satisfy vegetarian-style diets (whole words, never after "non")
+    VEG_MARKERS = ("veg", "vegetarian", "vegan", "jain")
+
+    def plan(
+        self,
+        trip_details: Dict[str, Any],
+        place_data: Dict[str, Any],
+        variant: int = 0
+    ) -> Dict[str, Any]:
+        """Build {"days": [...]} for the trip; variants start from a different zone"""
+        destination = trip_details["destination"]
+        days = trip_details["duration"]["days"]
+        preferences = trip_details.get("preferences", {})
+        origin = trip_details.get("origin")
+        event = trip_details.get("event_details", {})
+        is_event = event.get("has_event", False)
+
+        low, high = self.STYLE_PACE.get(preferences.get("travel_style"), self.STYLE_PACE["balanced"])
+        attractions = self._order_attractions(place_data.get("places_data", []), variant)
+        restaurants = self._filter_restaurants(place_data.get("restaurants", []), preferences.get("dietary", []))
+        hotels = place_data.get("hotels") or [{"name": f"Hotel in {destination}"}]
+        hotel = hotels[variant % len(hotels)]
+
+        transport_mode = preferences.get("transport_mode", "flexible")
+        round_trip = bool(origin and trip_details.get("is_round_trip"))
+        leg = self._intercity_minutes(origin, destination) if origin else None
+        targets = [
+            1 if is_event else (low if (day == 1 and origin) or (day == days and round_trip) else high)
+            for day in range(1, days + 1)
+        ]
+        day_places = self._allocate(attractions, targets)
+
+        meal_index = variant
+        result_days = []
+        filler_index = variant
+        for day in range(1, days + 1):
+            activities = []
+            breakfast_time = self.MEAL_TIMES["breakfast"]
+
+            if day == 1 and origin:
+                if leg > self.OVERNIGHT_LEG_MINUTES:
+                    activities.append(self._activity(
+                        self.DEPART_TIME, "travel", f"Arrive in {destination} from {origin}",
+                        f"Overnight journey from {origin} ({self._format_duration(leg)} by road)", 30
+                    ))
+                    arrival = self.DEPART_TIME + 30
+                else:
+                    activities.append(self._activity(
+                        self.DEPART_TIME, "travel", f"Travel from {origin} to {destination}",
+                        f"Depart {origin} early to reach {destination}", leg
+                    ))
+                    arrival = self.DEPART_TIME + leg
+                activities.append(self._activity(
+                    arrival, "hotel", hotel["name"], f"Hotel check-in at {hotel['name']}", 30, hotel
+                ))
+                breakfast_time = max(breakfast_time, self._round_up(arrival + 30 + self.TRAVEL_BUFFER))
+            elif day == 1:
+                activities.append(self._activity(
+                    7 * 60 + 30, "hotel", hotel["name"], f"Hotel check-in at {hotel['name']}", 30, hotel
+                ))
+
+            breakfast, meal_index = self._pick_restaurant(restaurants, meal_index, activities)
+            activities.append(self._meal("breakfast", breakfast, breakfast_time))
+            morning_start = max(self.MORNING_WINDOW[0], breakfast_time + 60 + self.TRAVEL_BUFFER)
+
+            if day == days and days > 1:
+                back = timeline_engine.leg_minutes(get_coordinates(breakfast), get_coordinates(hotel), transport_mode)
+                checkout = max(9 * 60 + 45, self._round_up(breakfast_time + 60 + max(back, self.TRAVEL_BUFFER)))
+                activities.append(self._activity(
+                    checkout, "hotel", hotel["name"], f"Hotel check-out from {hotel['name']}", 30, hotel
+                ))
+                morning_start = max(morning_start, checkout + 45)
+
+            todays = day_places[day - 1]
+            if not is_event:
+                # Below the style's minimum pace: top up with light unplanned stops
+                while len(todays) < low:
+                    todays.append(self._filler(destination, filler_index))
+                    filler_index += 1
+
+            if is_event:
+                event_type = event.get("event_type") or "event"
+                activities.append(self._activity(
+                    10 * 60, "activity", f"Attend {event_type}",
+                    f"{event_type.title()} at {event.get('event_location') or destination}", 180
+                ))
+                morning = []
+            else:
+                # Share the stops between the windows by their length
+                morning_length = max(0, self.MORNING_WINDOW[1] - morning_start)
+                afternoon_length = self.AFTERNOON_WINDOW[1] - self.AFTERNOON_WINDOW[0]
+                morning = todays[:round(len(todays) * morning_length / (morning_length + afternoon_length))]
+            afternoon = todays[len(morning):]
+
+            planned, overflow = self._fill_window(
+                morning, (morning_start, self.MORNING_WINDOW[1]), self._last_point(activities), transport_mode
+            )
+            activities.extend(planned)
+            stops = len(planned)
+            lunch, meal_index = self._pick_restaurant(restaurants, meal_index, activities)
+            activities.append(self._meal("lunch", lunch))
+            afternoon = overflow + afternoon
+            planned, overflow = self._fill_window(
+                afternoon, self.AFTERNOON_WINDOW, self._last_point(activities), transport_mode
+            )
+            if not is_event and stops + len(planned) < low and any(not p.get("filler") for p in overflow):
+                # A stop too far to reach today gives its slot to a light unplanned one
+                kept = [p for p in afternoon if not any(p is o for o in overflow)]
+                while stops + len(kept) < low:
+                    kept.append(self._filler(destination, filler_index))
+                    filler_index += 1
+                planned, refill_overflow = self._fill_window(
+                    kept, self.AFTERNOON_WINDOW, self._last_point(activities), transport_mode
+                )
+                overflow = [p for p in overflow if not p.get("filler")] + refill_overflow
+            activities.extend(planned)
+            stops += len(planned)
+            # Places that didn't fit move to the next day
+            if day < days:
+                day_places[day] = [p for p in overflow if not p.get("filler")] + day_places[day]
+
+            if not stops and not is_event:
+                activities.append(self._activity(
+                    15 * 60, "rest", f"Free time in {destination}",
+                    "Relax or explore the neighbourhood at your own pace", 180
+                ))
+
+            dinner, meal_index = self._pick_restaurant(restaurants, meal_index, activities)
+            activities.append(self._meal("dinner", dinner))
+
+            if day == days and round_trip:
+                overnight = leg > self.OVERNIGHT_LEG_MINUTES
+                activities.append(self._activity(
+                    self.RETURN_TIME, "travel", f"Return to {origin}",
+                    f"{'Overnight journey' if overnight else 'Travel'} back from {destination} to {origin}", leg
+                ))
+
+            zones = sorted({p.get("cluster") for p in todays if p.get("cluster")})
+            result_days.append({
+                "day": day,
+                "summary": f"Day {day} in {destination}" + (f": {', '.join(zones)}" if zones else ""),
+                "activities": activities
+            })
+
+        print(f"📐 Rule Planner: {days}-day plan for {destination} ({low}-{high} stops/day)")
+        return {"days": result_days}
+
+    def _order_attractions(self, places_data: List[Dict[str, Any]], variant: int) -> List[Dict[str, Any]]:
+        """Attractions zone by zone (largest first, far/unlocated last), best rated first"""
+        attractions = [p for p in places_data if p.get("category") == "attraction"]
+        zones: Dict[str, List[Dict[str, Any]]] = {}
+        for place in attractions:
+            zones.setdefault(place.get("cluster") or "Central", []).append(place)
+
+        order = sorted(
+            zones,
+            key=lambda zone: (zone in self.LATE_ZONES, -len(zones[zone]), zone)
+        )
+        regular = [zone for zone in order if zone not in self.LATE_ZONES]
+        if variant and regular:
+            shift = variant % len(regular)
+            order = regular[shift:] + regular[:shift] + [zone for zone in order if zone in self.LATE_ZONES]
+
+        return [
+            place
+            for zone in order
+            for place in sorted(zones[zone], key=lambda p: -(p.get("rating") or 0))
+        ]
+
+    def _allocate(self, attractions: List[Dict[str, Any]], targets: List[int]) -> List[List[Dict[str, Any]]]:
+        """Attractions per day in zone order (a short supply is spread over the days)"""
+        day_places = []
+        remaining = list(attractions)
+        for index, target in enumerate(targets):
+            take = min(target, -(-len(remaining) // (len(targets) - index)))
+            day_places.append(remaining[:take])
+            remaining = remaining[take:]
+
+        # Far-flung stops go to an earlier day (swapped with its last regular stop)
+        if len(day_places) > 1:
+            last = day_places[-1]
+            for place in [p for p in last if p.get("cluster") in self.DEPARTURE_DAY_EXCLUDED]:
+                last.remove(place)
+                for earlier in reversed(day_places[:-1]):
+                    regular = [p for p in earlier if p.get("cluster") not in self.DEPARTURE_DAY_EXCLUDED]
+                    if regular:
+                        earlier[earlier.index(regular[-1])] = place
+                        last.append(regular[-1])
+                        break
+        return day_places
+
+    def _intercity_minutes(self, origin: str, destination: str) -> int:
+        """Origin to destination by road, from the gazetteer distance"""
+        km = gazetteer.distance_km(origin, destination)
+        if km is None:
+            return self.UNKNOWN_INTERCITY_MIN
+        return self._round_up(km / self.INTERCITY_KMH * 60 + self.INTERCITY_OVERHEAD_MIN, 30)
+
+    def _filter_restaurants(self, restaurants: List[Dict[str, Any]], dietary: List[str]) -> List[Dict[str, Any]]:
+        """Keep restaurants matching a vegetarian-style diet (all of them if none match)"""
+        if not restaurants:
+            return [{"name": "Hotel Restaurant"}]
+        if not any(diet in ("veg", "vegetarian", "vegan", "jain") for diet in dietary or []):
+            return restaurants
+
+        matching = [r for r in restaurants if self._is_vegetarian(r)]
+        return matching or restaurants
+
+    def _is_vegetarian(self, restaurant: Dict[str, Any]) -> bool:
+        """A whole-word veg marker in the name or types, and no "non-veg" anywhere"""
+        words = re.findall(r"[a-z]+", " ".join([restaurant.get("name", "")] + list(restaurant.get("types", []))).lower())
+        if "nonveg" in words or any(a == "non" and b in self.VEG_MARKERS for a, b in zip(words, words[1:])):
+            return False
+        return any(word in self.VEG_MARKERS for word in words)
+
+    def _pick_restaurant(self, restaurants: List[Dict[str, Any]], meal_index: int, activities: List[Dict[str, Any]]):
+        """Nearest unused-today restaurant to the last located stop, else round robin"""
+        last = next(
+            (point for point in (get_coordinates(a) for a in reversed(activities)) if point),
+            None
+        )
+        used_today = {a["name"] for a in activities if a["type"] == "food"}
+        candidates = [
+            r for r in restaurants
+            if r["name"] not in used_today and get_coordinates(r)
+        ]
+        if last and candidates:
+            return min(candidates, key=lambda r: float(haversine_km(*last, *get_coordinates(r)))), meal_index
+        return restaurants[meal_index % len(restaurants)], meal_index + 1
+
+    def _fill_window(
+        self,
+        places: List[Dict[str, Any]],
+        window: tuple,
+        previous: Optional[Tuple[float, float]],
+        transport_mode: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        (activities, overflow): stops in order with the estimated legs between them
+        and an equal share of the time left as each visit. While that leaves less
+        than MIN_STOP_MINUTES each, the hardest stop to reach is returned as overflow.
+        """
+        places = list(places)
+        overflow = []
+        while places:
+            points = [get_coordinates(place) for place in places]
+            legs = [
+                timeline_engine.leg_minutes(a, b, transport_mode)
+                for a, b in zip([previous] + points[:-1], points)
+            ]
+            # The meal after the window is picked near the last stop, but back towards where the day is based
+            last = next((point for point in reversed(points) if point), None)
+            back = max(self.TRAVEL_BUFFER, timeline_engine.leg_minutes(last, previous, transport_mode)) if last else self.TRAVEL_BUFFER
+            free = window[1] - window[0] - sum(legs) - back
+            stay = min(free / len(places), self.MAX_STOP_MINUTES)
+            if stay >= self.MIN_STOP_MINUTES:
+                break
+            # The stop with the longest way there gives way first (ties: the last one)
+            farthest = max(range(len(places)), key=lambda i: (legs[i], i))
+            overflow.append(places.pop(farthest))
+        if not places:
+            return [], overflow
+
+        # Whole half hours once over an hour, so the shown duration is what was scheduled
+        stay = int(stay // 30 * 30 if stay >= 60 else stay // 5 * 5)
+        activities = []
+        clock = window[0]
+        for place, leg in zip(places, legs):
+            start = self._round_up(clock + leg)
+            description = place.get("description") if place.get("filler") else f"Explore {place['name']}"
+            activity = self._activity(
+                start, "sightseeing", place["name"], description, stay, None if place.get("filler") else place
+            )
+            if place.get("filler"):
+                # Not a fetched place: the place resolver leaves it as is
+                activity["grounding"] = "freeform"
+            activities.append(activity)
+            clock = start + stay
+        return activities, overflow
+
+    def _filler(self, destination: str, index: int) -> Dict[str, Any]:
+        name, description = self.FILLER_ACTIVITIES[index % len(self.FILLER_ACTIVITIES)]
+        return {"name": name.format(destination=destination), "description": description, "filler": True}
+
+    def _last_point(self, activities: List[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+        return next((point for point in (get_coordinates(a) for a in reversed(activities)) if point), None)
+
+    def _round_up(self, minutes: float, step: int = 5) -> int:
+        return int(-(-minutes // step) * step)
+
+    def _meal(self, meal: str, restaurant: Dict[str, Any], minutes: Optional[int] = None) -> Dict[str, Any]:
+        return self._activity(
+            minutes or self.MEAL_TIMES[meal], "food", restaurant["name"],
+            f"{meal.title()} at {restaurant['name']}", 60, restaurant
+        )
+
+    def _activity(
+        self,
+        minutes: int,
+        activity_type: str,
+        name: str,
+        description: str,
+        duration: int,
+        place: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        location = {"name": name}
+        if place:
+            location["address"] = place.get("address", "")
+            if get_coordinates(place):
+                location.update(place["location"])
+        return {
+            "time": self._format_time(minutes),
+            "type": activity_type,
+            "name": name,
+            "description": description,
+            "duration": self._format_duration(duration),
+            "tips": "",
+            "location": location
+        }
+
+    def _format_time(self, minutes: int) -> str:
+        hours, mins = divmod(int(minutes), 60)
+        suffix = "AM" if hours < 12 else "PM"
+        return f"{(hours - 1) % 12 + 1:02d}:{mins:02d} {suffix}"
+
+    def _format_duration(self, minutes: int) -> str:
+        if minutes < 60:
+            return f"{minutes} minutes"
+        hours = round(minutes / 60 * 2) / 2
+        return f"{hours:g} hour" + ("" if hours == 1 else "s")
+
+
+# Singleton instance
+rule_planner = RulePlanner()
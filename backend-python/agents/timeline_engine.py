@@ -0,0 +1,391 @@
+import re
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import build_coordinate_lookup, resolve_coordinates, haversine_km
+
+DURATION_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(\d+(?:\.\d+)?))?\s*(hours?|hrs?|h(?![a-z])|minutes?|mins?|m(?![a-z]))",
+    re.IGNORECASE
+)
+DAY_PATTERN = re.compile(r"\b(half|full|whole)[\s-]*day\b", re.IGNORECASE)
+TIME_PATTERN = re.compile(r"^\s*(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?\s*m?\.?\s*$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def parse_duration(text: Optional[str]) -> Optional[float]:
+    """Minutes in a free-text duration ("2 hours", "1-2 hrs", "1h 30m", "half day")"""
+    if not text:
+        return None
+    day = DAY_PATTERN.search(text)
+    if day:
+        return 240.0 if day.group(1).lower() == "half" else 480.0
+
+    total = None
+    for low, high, unit in DURATION_PATTERN.findall(text):
+        value = (float(low) + float(high)) / 2 if high else float(low)
+        total = (total or 0.0) + (value * 60 if unit.lower().startswith("h") else value)
+    return total
+
+
+@lru_cache(maxsize=1024)
+def parse_time(text: Optional[str]) -> Optional[float]:
+    """Minutes from midnight for "09:30 AM", "9am", "14:00" style times"""
+    if not text:
+        return None
+    match = TIME_PATTERN.match(text)
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").lower()
+    if meridiem == "p" and hours < 12:
+        hours += 12
+    elif meridiem == "a" and hours == 12:
+        hours = 0
+    if hours > 23 or minutes > 59:
+        return None
+    return float(hours * 60 + minutes)
+
+
+class TimelineEngine:
+    """
+    Timeline Engine
+    Recomputes each day's activity times from parsed durations and estimated
+    travel legs so the schedule is physically possible. Meals, hotel and travel
+    entries are anchors held at their planned times; the sightseeing between
+    them is shortened, then dropped, until the day fits before midnight.
+    Anchors that still start late are flagged as conflicts.
+    """
+
+    # Door-to-door speed (km/h) per transport_mode preference
+    SPEED_KMH = {
+        "public_transport": 18,
+        "own_vehicle": 30,
+        "rental": 30,
+        "flexible": 22
+    }
+    WALKING_KMH = 4.5
+    WALKING_MAX_KM = 1.0
+
+    # Straight-line to road distance, plus parking/waiting per leg
+    ROAD_FACTOR = 1.3
+    LEG_OVERHEAD_MIN = 10
+    # Leg estimate when either end has no coordinates
+    UNKNOWN_LEG_MIN = 15
+
+    # Fallback durations by activity type (minutes)
+    DEFAULT_DURATION = {
+        "food": 60,
+        "hotel": 30,
+        "sightseeing": 90,
+        "activity": 120,
+        "travel": 120,
+        "rest": 60
+    }
+
+    # Types that bend around the anchors (everything else keeps its planned time)
+    FLEXIBLE_TYPES = {"sightseeing", "rest"}
+    # Flexible activities shrink to this share of their duration (not below the
+    # minimum) before any of them is dropped
+    COMPRESS_RATIO = 0.5
+    MIN_FLEXIBLE_MINUTES = 30
+
+    DAY_START = 7 * 60
+    DAY_END = 24 * 60
+    # Slack before a later-than-planned start counts as a conflict
+    CONFLICT_TOLERANCE_MIN = 15
+
+    def schedule(
+        self,
+        itinerary: List[Dict[str, Any]],
+        places: Optional[List[Dict[str, Any]]] = None,
+        transport_mode: str = "flexible"
+    ) -> List[Dict[str, Any]]:
+        """Rewrite activity times in place, dropping what can't fit, and attach per-day timeline stats"""
+        lookup = build_coordinate_lookup(places)
+        totals = {"conflicts": 0, "overruns": 0, "compressed": 0, "dropped": 0}
+        days = [day for day in itinerary if day.get("activities")]
+        if not days:
+            return itinerary
+
+        # Every day is parsed and placed at its planned times in one vectorized pass;
+        # only days that don't fit that way are shortened and trimmed one by one
+        columns = self._columns([day["activities"] for day in days], lookup, transport_mode)
+        pinned = self._place_pinned(columns)
+        offsets = columns["offsets"]
+
+        for d, day in enumerate(days):
+            activities = day["activities"]
+            rows = slice(offsets[d], offsets[d + 1])
+            dropped = []
+            keep = list(range(len(activities)))
+            if pinned["fits"][d]:
+                placed = {key: values[rows] for key, values in pinned.items() if key != "fits"}
+            else:
+                while True:
+                    placed = self._place_day({key: columns[key][rows][keep] for key in self.COLUMNS}, transport_mode)
+                    if placed["drop"] is None:
+                        break
+                    dropped.append(activities[keep.pop(placed["drop"])])
+                activities[:] = [activities[k] for k in keep]
+            start, end, duration, travel, planned = (
+                placed[key] for key in ("start", "end", "duration", "travel", "planned")
+            )
+
+            delay = np.where(np.isnan(planned), 0.0, start - planned)
+            conflict = (delay > self.CONFLICT_TOLERANCE_MIN) & ~columns["flexible"][rows][keep]
+            overrun = (end > self.DAY_END) & ~columns["is_travel"][rows][keep]
+            compressed = duration < placed["requested"] - 0.5
+
+            # Plain floats from here on: formatting numpy scalars one by one is the slow part
+            times = zip(start.tolist(), end.tolist(), np.rint(travel).astype(int).tolist())
+            for i, (activity, (begin, finish, leg)) in enumerate(zip(activities, times)):
+                activity["time"] = self._format_time(begin)
+                activity["endTime"] = self._format_time(finish)
+                activity["travelMinutes"] = leg
+                activity.pop("conflict", None)
+                activity.pop("overrun", None)
+                if compressed[i]:
+                    activity["duration"] = self._format_duration(duration[i])
+                if conflict[i]:
+                    activity["conflict"] = f"Starts {delay[i]:.0f} min later than planned ({self._format_time(planned[i])})"
+                if overrun[i]:
+                    activity["overrun"] = True
+
+            if dropped and "totalCost" in day:
+                day["totalCost"] -= sum(a.get("estimatedCost") or 0 for a in dropped)
+            day["timeline"] = {
+                "start": self._format_time(start.min()),
+                "end": self._format_time(end.max()),
+                "travelMinutes": int(round(travel.sum())),
+                "conflicts": int(conflict.sum()),
+                "overrun": bool(overrun.any()),
+                "compressed": int(compressed.sum()),
+                "dropped": [a.get("name") for a in dropped]
+            }
+            totals["conflicts"] += int(conflict.sum())
+            totals["overruns"] += int(overrun.sum())
+            totals["compressed"] += int(compressed.sum())
+            totals["dropped"] += len(dropped)
+
+        if any(totals.values()):
+            print(
+                f"⏱️  Timeline: {totals['compressed']} shortened, {totals['dropped']} dropped, "
+                f"{totals['conflicts']} conflict(s), {totals['overruns']} overrun(s) left"
+            )
+        return itinerary
+
+    # Per-activity arrays a day is placed from
+    COLUMNS = ("planned", "requested", "coords", "flexible", "is_travel")
+
+    def _columns(
+        self,
+        days: List[List[Dict[str, Any]]],
+        lookup: Dict[str, Tuple[float, float]],
+        transport_mode: str
+    ) -> Dict[str, np.ndarray]:
+        """Parsed times, durations, coordinates and travel legs for every day, flattened in day order"""
+        activities = [activity for day in days for activity in day]
+        offsets = np.r_[0, np.cumsum([len(day) for day in days])]
+        planned = np.array([parse_time(a.get("time")) for a in activities], dtype=float)
+        requested = np.array([parse_duration(a.get("duration")) for a in activities], dtype=float)
+        defaults = [self.DEFAULT_DURATION.get(a.get("type"), 60) for a in activities]
+        coords = np.array([resolve_coordinates(a, lookup) or (np.nan, np.nan) for a in activities], dtype=float)
+        columns = {
+            "offsets": offsets,
+            "planned": planned,
+            "requested": np.where(np.isnan(requested), defaults, requested),
+            "coords": coords,
+            "flexible": np.array([a.get("type") in self.FLEXIBLE_TYPES for a in activities]),
+            "is_travel": np.array([a.get("type") == "travel" for a in activities])
+        }
+        columns["travel"] = self._travel_minutes(coords, columns["is_travel"], offsets[:-1], transport_mode)
+        return columns
+
+    def _place_pinned(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Every activity at its planned time or as soon as the previous one allows, for
+        all days at once (days padded into one grid). A day fits when each flexible
+        run still reaches its next anchor in time (the last run by DAY_END) and no
+        anchor with flexible activities before it ends past midnight.
+        """
+        offsets = columns["offsets"]
+        lengths = np.diff(offsets)
+        n_days, width = len(lengths), int(lengths.max()) + 1
+        row = np.repeat(np.arange(n_days), lengths)
+        col = np.arange(offsets[-1]) - offsets[row]
+
+        def grid(values: np.ndarray, fill) -> np.ndarray:
+            padded = np.full((n_days, width), fill, dtype=values.dtype)
+            padded[row, col] = values
+            return padded
+
+        planned, requested, travel = columns["planned"], columns["requested"], columns["travel"]
+        # Planned times are earliest starts; the first activity starts at DAY_START if untimed
+        earliest = np.where(np.isnan(planned), -np.inf, planned)
+        first = offsets[:-1]
+        earliest[first] = np.where(np.isnan(planned[first]), self.DAY_START, planned[first])
+
+        # start[i] = max(earliest[i], end[i-1] + travel[i]) as a running max over cumulative time
+        duration, legs = grid(requested, 0.0), grid(travel, 0.0)
+        elapsed = np.zeros((n_days, width))
+        elapsed[:, 1:] = np.cumsum(duration[:, :-1] + legs[:, 1:], axis=1)
+        start = elapsed + np.maximum.accumulate(grid(earliest, -np.inf) - elapsed, axis=1)
+        end = start + duration
+
+        # Flexible runs have to leave time to reach the next anchor (or end the day)
+        deadline = grid(np.where(np.isnan(planned), np.inf, planned - travel), np.inf)
+        deadline[np.arange(n_days), lengths] = self.DAY_END
+        flexible = grid(columns["flexible"], False)
+        late_run = flexible[:, :-1] & ~flexible[:, 1:] & (end[:, :-1] > deadline[:, 1:] + 0.5)
+
+        anchor = grid(~columns["flexible"] & ~columns["is_travel"], False)
+        late_anchor = anchor & (end > self.DAY_END)
+        first_late = late_anchor.argmax(axis=1)
+        flexible_before = (np.cumsum(flexible, axis=1) - flexible)[np.arange(n_days), first_late] > 0
+        fits = ~late_run.any(axis=1) & ~(late_anchor.any(axis=1) & flexible_before)
+
+        return {
+            "planned": planned,
+            "requested": requested,
+            "travel": travel,
+            "start": start[row, col],
+            "end": end[row, col],
+            "duration": requested.copy(),
+            "fits": fits
+        }
+
+    def _place_day(self, columns: Dict[str, np.ndarray], transport_mode: str) -> Dict[str, Any]:
+        """
+        Times for one day that doesn't fit as planned. Each run of flexible activities
+        has to end in time to reach the next anchor at its planned start (the last run
+        by DAY_END); a run that can't make it even fully shortened names one of its
+        activities to drop, as does the last flexible activity before an anchor past midnight.
+        """
+        planned, requested, flexible = columns["planned"], columns["requested"], columns["flexible"]
+        travel = self._travel_minutes(columns["coords"], columns["is_travel"], [0], transport_mode)
+        shortest = np.minimum(requested, np.maximum(requested * self.COMPRESS_RATIO, self.MIN_FLEXIBLE_MINUTES))
+
+        duration = requested.copy()
+        start = np.zeros(len(planned))
+        # Day start for the first activity (planned times are earliest starts)
+        earliest = np.where(np.isnan(planned), -np.inf, planned)
+        if np.isnan(planned[0]):
+            earliest[0] = self.DAY_START
+
+        result = {"planned": planned, "requested": requested, "travel": travel, "drop": None}
+        # Nothing moves earlier than the day's first start
+        cursor, run = earliest[0], []
+        for i in range(len(planned) + 1):
+            if i < len(planned) and flexible[i]:
+                run.append(i)
+                continue
+
+            if i < len(planned):
+                deadline = planned[i] - travel[i] if not np.isnan(planned[i]) else np.inf
+            else:
+                deadline = self.DAY_END
+            if run:
+                cursor, fits = self._place_run(run, cursor, deadline, earliest, travel, duration, shortest, start)
+                if not fits:
+                    # The activity that costs most time (ways there and on + shortest stay) goes
+                    onward = np.r_[travel[1:], 0.0]
+                    result["drop"] = max(run, key=lambda k: (travel[k] + onward[k] + shortest[k], k))
+                    return result
+                run = []
+
+            if i < len(planned):
+                start[i] = max(earliest[i], cursor + travel[i])
+                cursor = start[i] + duration[i]
+
+        end = start + duration
+        late_anchor = np.flatnonzero((end > self.DAY_END) & ~flexible & ~columns["is_travel"])
+        if len(late_anchor):
+            before = np.flatnonzero(flexible[:late_anchor[0]])
+            if len(before):
+                result["drop"] = int(before[-1])
+                return result
+
+        result.update(start=start, end=end, duration=duration)
+        return result
+
+    def _place_run(
+        self,
+        run: List[int],
+        cursor: float,
+        deadline: float,
+        earliest: np.ndarray,
+        travel: np.ndarray,
+        duration: np.ndarray,
+        shortest: np.ndarray,
+        start: np.ndarray
+    ) -> Tuple[float, bool]:
+        """Place a run of flexible activities after cursor, moving them earlier, then shortening them, to end by deadline"""
+        run = np.array(run)
+        pinned = True
+        while True:
+            clock = cursor
+            for k in run:
+                start[k] = max(earliest[k] if pinned else -np.inf, clock + travel[k])
+                clock = start[k] + duration[k]
+            overshoot = clock - deadline
+            slack = float((duration[run] - shortest[run]).sum())
+            if overshoot <= 0.5:
+                return clock, True
+            if pinned:
+                # Starting earlier than planned comes before shortening anything
+                pinned = False
+                continue
+            if slack <= 0.5:
+                return clock, False
+            # Shorten every activity of the run in proportion to how much it can give
+            duration[run] -= (duration[run] - shortest[run]) * min(1.0, overshoot / slack)
+
+    def _travel_minutes(
+        self,
+        coords: np.ndarray,
+        is_travel: np.ndarray,
+        day_starts,
+        transport_mode: str
+    ) -> np.ndarray:
+        """Minutes travelling from the previous activity of the same day"""
+        km = np.zeros(len(coords))
+        km[1:] = haversine_km(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1]) * self.ROAD_FACTOR
+        minutes = self._leg_minutes(km, transport_mode)
+
+        # Travel activities already include the journey on either side
+        minutes[1:][is_travel[1:] | is_travel[:-1]] = 0.0
+        minutes[day_starts] = 0.0
+        return minutes
+
+    def leg_minutes(
+        self,
+        origin: Optional[Tuple[float, float]],
+        destination: Optional[Tuple[float, float]],
+        transport_mode: str = "flexible"
+    ) -> float:
+        """Estimated minutes for one in-city leg (same model the schedule uses)"""
+        if not origin or not destination:
+            return float(self.UNKNOWN_LEG_MIN)
+        km = np.array([float(haversine_km(*origin, *destination)) * self.ROAD_FACTOR])
+        return float(self._leg_minutes(km, transport_mode)[0])
+
+    def _leg_minutes(self, km: np.ndarray, transport_mode: str) -> np.ndarray:
+        """Walk short hops, ride the rest, plus per-leg overhead (NaN km = unknown leg)"""
+        speed = np.where(km <= self.WALKING_MAX_KM, self.WALKING_KMH, self.SPEED_KMH.get(transport_mode, 22))
+        minutes = np.where(km > 0, km / speed * 60 + self.LEG_OVERHEAD_MIN, 0.0)
+        return np.where(np.isnan(km), self.UNKNOWN_LEG_MIN, minutes)
+
+    def _format_duration(self, minutes: float) -> str:
+        hours, mins = divmod(int(round(minutes)), 60)
+        if not hours:
+            return f"{mins} minutes"
+        return f"{hours} hour{'s' if hours > 1 else ''}" + (f" {mins} minutes" if mins else "")
+
+    def _format_time(self, minutes: float) -> str:
+        hours, mins = divmod(int(round(minutes)) % (24 * 60), 60)
+        suffix = "AM" if hours < 12 else "PM"
+        return f"{(hours - 1) % 12 + 1:02d}:{mins:02d} {suffix}"
+
+
+# Singleton instance
+timeline_engine = TimelineEngine()
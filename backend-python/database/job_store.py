@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class JobStore:
+    """
+    Plan Job Store
+    SQLite queue and result store for asynchronous plan jobs. The web tier and
+    separate worker processes share one database file: a claim is a single
+    guarded UPDATE inside an immediate transaction, so a job runs once. A job
+    whose worker died is re-queued when its lease runs out. Finished jobs
+    expire after a TTL.
+    """
+
+    STATUSES = ("queued", "running", "done", "failed")
+
+    # A running job is re-queued when its worker hasn't finished it by then
+    # (longer than the largest allowed request deadline)
+    LEASE_SECONDS = 360
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PLAN_JOBS_DB", "plan_jobs.db")
+        self.ttl = int(os.getenv("PLAN_JOB_TTL", str(24 * 3600)))
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    lease_expires REAL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS plan_jobs_queue ON plan_jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit connection per operation; transactions are explicit
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a plan request and return the new job"""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO plan_jobs (id, status, request, created_at, updated_at, expires_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, json.dumps(request), now, now, now + self.ttl)
+            )
+        return self.get(job_id)
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Oldest queued (or abandoned) job, marked running for this worker"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Abandoned too often: give up instead of re-running forever
+                conn.execute(
+                    "UPDATE plan_jobs SET status = 'failed', error = 'Worker lost the job', updated_at = ?, expires_at = ? "
+                    "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                    (now, now + self.ttl, now, self.MAX_ATTEMPTS)
+                )
+                row = conn.execute(
+                    "SELECT id FROM plan_jobs WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE plan_jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                    "updated_at = ?, lease_expires = ? WHERE id = ?",
+                    (worker, now, now + self.LEASE_SECONDS, row["id"])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._finish(job_id, "done", result=json.dumps(result, default=str))
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE plan_jobs SET status = ?, result = ?, error = ?, updated_at = ?, lease_expires = NULL, "
+                "expires_at = ? WHERE id = ?",
+                (status, result, error, now, now + self.ttl, job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, request and (when done) result; None if unknown or expired"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM plan_jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "jobId": row["id"],
+            "status": row["status"],
+            "request": json.loads(row["request"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"]
+        }
+
+    def queue_depth(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM plan_jobs WHERE status = 'queued'").fetchone()[0]
+
+    def purge_expired(self) -> int:
+        """Delete jobs past their TTL"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM plan_jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+# Singleton instance
+job_store = JobStore()
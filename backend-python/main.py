@@ -1,11 +1,15 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 import os
 from dotenv import load_dotenv
 from agents.orchestrator import orchestrator
-from routes import auth, trips
+from models.schemas import PlanRequest
+from routes import auth, trips, places, budget, jobs
+from utils.disconnect import cancel_on_disconnect, ClientDisconnected
+from services.plan_workers import plan_workers
+from services.admission import admission, Overloaded
 
 load_dotenv()
 
@@ -31,17 +35,23 @@ app.add_middleware(
 # Include routers
 app.include_router(auth.router)
 app.include_router(trips.router)
+app.include_router(places.router)
+app.include_router(budget.router)
+app.include_router(jobs.router)
 
 
-# Request/Response Models
-class PlanRequest(BaseModel):
-    query: str
-    userId: str = "demo-user-123"
-    preferences: dict = {}
-    origin: str = None
-    is_round_trip: bool = False
+@app.on_event("startup")
+async def start_plan_workers():
+    """Plan job workers in the web process (PLAN_WORKERS=0 leaves them to worker.py)"""
+    plan_workers.start()
+
+
+@app.on_event("shutdown")
+async def stop_plan_workers():
+    await plan_workers.stop()
 
 
+# Request/Response Models
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
@@ -62,32 +72,46 @@ async def health_check():
     )
 
 
+async def _admitted_plan(request: PlanRequest) -> dict:
+    """Generate a plan in an admission slot, in the plan mode the current load allows"""
+    async with admission.admit():
+        args = request.orchestrator_args()
+        args["mode"] = admission.effective_mode(request.mode)
+        result = await orchestrator.create_travel_plan(**args)
+        admission.observe(result["processingTime"], result["latencyTargetMs"])
+    if args["mode"] != request.mode:
+        result["requestedMode"] = request.mode
+    return result
+
+
 @app.post("/api/plan/create")
-async def create_plan(request: PlanRequest):
-    """Create a new travel plan from user query"""
+async def create_plan(request: PlanRequest, http_request: Request):
+    """Create a new travel plan from user query (abandoned if the client disconnects)"""
     try:
         if not request.query:
             raise HTTPException(status_code=400, detail="Query is required")
         
-        # Add origin and round trip to preferences if present
-        if request.origin:
-            request.preferences['origin'] = request.origin
-        request.preferences['is_round_trip'] = request.is_round_trip
-
-        # Create travel plan using agent orchestrator
-        result = await orchestrator.create_travel_plan(
-            request.query, 
-            request.userId,
-            request.preferences
-        )
-        
-        return result
+        # Create travel plan using agent orchestrator, subject to admission control
+        return await cancel_on_disconnect(http_request, _admitted_plan(request))
         
+    except Overloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ClientDisconnected:
+        # Nobody is reading; 499 (client closed request) keeps it out of error metrics
+        return Response(status_code=499)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Plan creation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/plan/admission")
+async def admission_stats():
+    """Current plan concurrency, queue and load step-down"""
+    return admission.stats()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from bson import ObjectId
 
@@ -73,3 +73,30 @@ class TripResponse(BaseModel):
 
 class TripDetailResponse(TripResponse):
     itinerary_data: Dict[str, Any]
+
+
+class PlanRequest(BaseModel):
+    query: str
+    userId: str = "demo-user-123"
+    preferences: dict = {}
+    origin: Optional[str] = None
+    is_round_trip: bool = False
+    variants: int = Field(1, ge=1, le=5)  # Alternative itineraries from one data fetch
+    mode: Literal["instant", "fast", "balanced", "thorough"] = "balanced"  # Plan-quality preset
+    deadlineMs: Optional[int] = Field(None, ge=1000, le=300000)  # Overrides PLAN_DEADLINE_MS
+
+    def orchestrator_args(self) -> Dict[str, Any]:
+        """Keyword arguments for orchestrator.create_travel_plan"""
+        preferences = dict(self.preferences)
+        # Add origin and round trip to preferences if present
+        if self.origin:
+            preferences["origin"] = self.origin
+        preferences["is_round_trip"] = self.is_round_trip
+        return {
+            "user_query": self.query,
+            "user_id": self.userId,
+            "user_preferences": preferences,
+            "variants": self.variants,
+            "mode": self.mode,
+            "deadline_ms": self.deadlineMs
+        }
@@ -0,0 +1,148 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Literal, Annotated
+from agents.budget_agent import budget_agent
+from agents.budget_optimizer import budget_optimizer
+
+router = APIRouter(prefix="/api/budget", tags=["Budget"])
+
+AccommodationType = Literal["budget", "mid_range", "luxury"]
+TransportMode = Literal["public_transport", "own_vehicle", "rental", "flexible"]
+
+
+class ScenarioRequest(BaseModel):
+    itinerary: List[Dict[str, Any]] = Field(..., min_length=1)
+    destination: str
+    origin: Optional[str] = None
+    budget: float = Field(0, ge=0)
+    days: Optional[int] = Field(None, ge=1, le=30)  # Planned length (defaults to the itinerary's)
+    accommodation_types: List[AccommodationType] = Field(default_factory=lambda: ["budget", "mid_range", "luxury"], min_length=1)
+    transport_modes: List[TransportMode] = Field(
+        default_factory=lambda: ["public_transport", "own_vehicle", "rental", "flexible"],
+        min_length=1
+    )
+    travelers: List[Annotated[int, Field(ge=1, le=20)]] = Field(default_factory=lambda: [1, 2, 3, 4], min_length=1, max_length=20)
+    durations: Optional[List[Annotated[int, Field(ge=1, le=30)]]] = Field(None, min_length=1, max_length=30)
+
+
+class TripBudget(BaseModel):
+    """Trip fields the budget agent prices against"""
+    destination: str
+    origin: Optional[str] = None
+    budget: float = Field(..., gt=0)
+    days: Optional[int] = Field(None, ge=1, le=30)
+    adults: int = Field(2, ge=1, le=20)
+    children: int = Field(0, ge=0, le=20)
+    accommodation_type: AccommodationType = "mid_range"
+    transport_mode: TransportMode = "flexible"
+    travel_style: str = "balanced"
+
+    def trip_details(self, default_days: int) -> Dict[str, Any]:
+        return {
+            "destination": self.destination,
+            "origin": self.origin,
+            "budget": self.budget,
+            "duration": {"days": self.days or default_days},
+            "travelers": {"adults": self.adults, "children": self.children},
+            "preferences": {
+                "accommodation_type": self.accommodation_type,
+                "transport_mode": self.transport_mode,
+                "travel_style": self.travel_style
+            }
+        }
+
+
+class FitRequest(TripBudget):
+    itinerary: List[Dict[str, Any]] = Field(..., min_length=1)
+    places: Optional[List[Dict[str, Any]]] = None  # Candidate places for cheaper swaps
+
+
+class BudgetEdit(BaseModel):
+    op: Literal["add", "remove", "replace", "set_nights", "set_travelers"]
+    activity: Optional[Dict[str, Any]] = None  # Added, removed or replaced activity
+    replacement: Optional[Dict[str, Any]] = Field(None, alias="with")
+    value: Optional[int] = Field(None, ge=0, le=29)  # Nights
+    adults: Optional[int] = Field(None, ge=1, le=20)
+    children: Optional[int] = Field(None, ge=0, le=20)
+
+
+class PatchRequest(TripBudget):
+    ledger: Dict[str, Any]  # budgetValidation.ledger from the plan (or the previous patch)
+    days: int = Field(..., ge=1, le=30)
+    operations: List[BudgetEdit] = Field(..., min_length=1, max_length=100)
+
+
+@router.post("/scenarios")
+async def budget_scenarios(request: ScenarioRequest) -> Dict[str, Any]:
+    """Cost of an existing itinerary across accommodation, transport, group size and trip length"""
+    days = request.days or len(request.itinerary)
+    trip_details = {
+        "destination": request.destination,
+        "origin": request.origin,
+        "budget": request.budget,
+        "duration": {"days": days}
+    }
+    # Default lengths: a couple of days either side of the plan
+    durations = request.durations or list(range(max(1, days - 2), days + 3))
+
+    try:
+        return budget_agent.evaluate_scenarios(
+            request.itinerary,
+            trip_details,
+            accommodation_types=list(dict.fromkeys(request.accommodation_types)),
+            transport_modes=list(dict.fromkeys(request.transport_modes)),
+            traveler_counts=request.travelers,
+            durations=durations
+        )
+    except Exception as e:
+        print(f"❌ Budget scenarios error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/fit")
+async def fit_budget(request: FitRequest) -> Dict[str, Any]:
+    """Edit an over-budget itinerary (tier, transport, paid stops) until it fits"""
+    trip_details = request.trip_details(len(request.itinerary))
+
+    try:
+        result = budget_optimizer.fit(request.itinerary, trip_details, request.places)
+    except Exception as e:
+        print(f"❌ Budget fit error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        return {"withinBudget": True, "itinerary": request.itinerary, "changes": []}
+    result.pop("tripDetails")
+    return result
+
+
+@router.post("/patch")
+async def patch_budget(request: PatchRequest) -> Dict[str, Any]:
+    """Updated budgetValidation after itinerary edits, without re-walking or re-planning the trip"""
+    operations = []
+    for edit in request.operations:
+        if edit.op in ("add", "remove", "replace") and not edit.activity:
+            raise HTTPException(status_code=400, detail=f"'{edit.op}' needs an activity")
+        if edit.op == "replace" and not edit.replacement:
+            raise HTTPException(status_code=400, detail="'replace' needs a 'with' activity")
+        if edit.op == "set_nights" and edit.value is None:
+            raise HTTPException(status_code=400, detail="'set_nights' needs a value")
+        operation = edit.model_dump(exclude_none=True)
+        if edit.replacement:
+            operation["with"] = operation.pop("replacement")
+        operations.append(operation)
+
+    try:
+        ledger, trip_details = budget_agent.patch_ledger(request.ledger, request.trip_details(request.days), operations)
+        validation = budget_agent.validate_ledger(ledger, request.budget, trip_details)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ledger or edit: {e}")
+    except Exception as e:
+        print(f"❌ Budget patch error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "budgetValidation": validation,
+        "days": trip_details["duration"]["days"],
+        "travelers": trip_details["travelers"]
+    }
@@ -0,0 +1,85 @@
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any
+from database.job_store import job_store
+from models.schemas import PlanRequest
+from services.plan_workers import plan_workers
+
+router = APIRouter(prefix="/api/plan/jobs", tags=["Plan Jobs"])
+
+# Job store calls are blocking SQLite (a busy database waits up to its timeout),
+# so every route runs them in a thread instead of on the event loop
+
+# Server-sent events: status checks per second, and a keep-alive comment so proxies keep the stream open
+EVENT_POLL_SECONDS = 0.5
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job as returned to clients (without the stored request)"""
+    return {key: value for key, value in job.items() if key != "request"}
+
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def submit_plan_job(request: PlanRequest) -> Dict[str, Any]:
+    """Queue a plan and return at once; poll the job or stream its events for the result"""
+    if not request.query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    try:
+        job = await asyncio.to_thread(job_store.submit, request.model_dump())
+    except Exception as e:
+        print(f"❌ Plan job submit error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    plan_workers.notify()
+
+    return {
+        "jobId": job["jobId"],
+        "status": job["status"],
+        "pollUrl": f"{router.prefix}/{job['jobId']}",
+        "eventsUrl": f"{router.prefix}/{job['jobId']}/events"
+    }
+
+
+@router.get("/{job_id}")
+async def get_plan_job(job_id: str) -> Dict[str, Any]:
+    """Job status, with the plan once it is done (or the error if it failed)"""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _public(job)
+
+
+@router.get("/{job_id}/events")
+async def plan_job_events(job_id: str, request: Request) -> StreamingResponse:
+    """Server-sent events: a `status` event on every change, then `done` or `failed` with the job"""
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        last_status = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job is None:
+                yield f"event: failed\ndata: {json.dumps({'jobId': job_id, 'error': 'Job expired'})}\n\n"
+                return
+            if job["status"] in ("done", "failed"):
+                yield f"event: {job['status']}\ndata: {json.dumps(_public(job), default=str)}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                idle = 0.0
+                yield f"event: status\ndata: {json.dumps({'jobId': job_id, 'status': last_status})}\n\n"
+            elif idle >= EVENT_KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            idle += EVENT_POLL_SECONDS
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
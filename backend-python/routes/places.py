@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional, Dict, Any, Literal
+from services.travel_api import travel_api
+from services.spatial_index import spatial_indexes, SpatialIndex
+
+router = APIRouter(prefix="/api/places", tags=["Places"])
+
+PlaceCategory = Literal["restaurant", "hotel", "attraction"]
+
+
+async def _index_for(destination: str, category: str, keyword: Optional[str]) -> SpatialIndex:
+    """Spatial index over the (cached) search results for a destination and category"""
+    if category == "restaurant":
+        places = await travel_api.search_restaurants(destination, keyword or "any")
+        search = travel_api.restaurant_keyword(keyword or "any")
+    elif category == "hotel":
+        places = await travel_api.search_hotels(destination, keyword or "mid_range")
+        search = travel_api.hotel_keyword(keyword or "mid_range")
+    else:
+        search = keyword or "tourist attraction"
+        places = await travel_api.search_places(destination, search)
+    return spatial_indexes.get(
+        destination, f"{category}:{search}", places, travel_api.cache_version(destination, search)
+    )
+
+
+@router.get("/nearby")
+async def nearby_places(
+    destination: str,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    category: PlaceCategory = "restaurant",
+    keyword: Optional[str] = None,
+    k: int = Query(5, ge=1, le=50),
+    radius_km: Optional[float] = Query(None, gt=0, le=100)
+) -> Dict[str, Any]:
+    """Places of a category nearest to a point (e.g. restaurants near an attraction)"""
+    try:
+        index = await _index_for(destination, category, keyword)
+        if radius_km is not None:
+            matches = index.within(lat, lng, radius_km)[:k]
+        else:
+            matches = index.nearest(lat, lng, k=k)
+    except Exception as e:
+        print(f"❌ Nearby search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "destination": destination,
+        "category": category,
+        "center": {"lat": lat, "lng": lng},
+        "results": [{**place, "distanceKm": km} for place, km in matches]
+    }
+
+
+@router.get("/within")
+async def places_in_bbox(
+    destination: str,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    category: PlaceCategory = "attraction",
+    keyword: Optional[str] = None
+) -> Dict[str, Any]:
+    """Places of a category inside a bounding box (e.g. the visible map area)"""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Bounding box minimums must not exceed maximums")
+
+    try:
+        index = await _index_for(destination, category, keyword)
+        results: List[Dict[str, Any]] = index.in_bbox(min_lat, min_lng, max_lat, max_lng)
+    except Exception as e:
+        print(f"❌ Bounding-box search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"destination": destination, "category": category, "results": results}
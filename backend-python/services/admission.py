@@ -0,0 +1,141 @@
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
+
+
+class Overloaded(Exception):
+    """Plan request rejected by admission control; retry after `retry_after` seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Admission Controller
+    Bounds concurrent plan generations, queues a limited number of requests
+    for a free slot (rejecting the rest with a retry hint), and steps the plan
+    mode down to cheaper presets while the queue fills or plans miss their
+    latency targets, then back up once load falls. Separate step-down and
+    step-up thresholds plus a minimum dwell time keep it from flapping.
+    """
+
+    # Cheapest last; a step-down moves every request this many places right
+    MODE_LADDER = ["thorough", "balanced", "fast", "instant"]
+
+    # Step down when the wait queue is this full or plans take this share of their target...
+    STEP_DOWN_QUEUE_FILL = 0.5
+    STEP_DOWN_LATENCY_RATIO = 1.0
+    # ...and back up only when both are well clear
+    STEP_UP_QUEUE_FILL = 0.1
+    STEP_UP_LATENCY_RATIO = 0.6
+    MIN_DWELL_SECONDS = 10.0
+
+    # Weight of the newest plan in the latency averages
+    LATENCY_SMOOTHING = 0.2
+    # Assumed plan time for Retry-After before any plan has finished
+    DEFAULT_PLAN_SECONDS = 10.0
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None
+    ):
+        self.max_concurrent = max_concurrent or int(os.getenv("PLAN_MAX_CONCURRENT", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("PLAN_MAX_QUEUE", "32"))
+        self.queue_timeout = queue_timeout or float(os.getenv("PLAN_QUEUE_TIMEOUT", "10"))
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.level = 0
+        self.changed_at = 0.0
+        self.latency_ratio = 0.0
+        self.plan_seconds: Optional[float] = None
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator["AdmissionController"]:
+        """Hold a generation slot for the block, or raise Overloaded"""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("Plan queue is full", self.retry_after())
+
+        self.waiting += 1
+        self._adjust()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"No plan slot within {self.queue_timeout:.0f}s", self.retry_after())
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield self
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self._adjust()
+
+    def effective_mode(self, mode: str) -> str:
+        """The requested plan mode after the current load step-down"""
+        if mode not in self.MODE_LADDER:
+            return mode
+        index = min(len(self.MODE_LADDER) - 1, self.MODE_LADDER.index(mode) + self.level)
+        return self.MODE_LADDER[index]
+
+    def observe(self, latency_ms: float, target_ms: float) -> None:
+        """Record a finished plan's latency against its mode's target"""
+        ratio = latency_ms / target_ms if target_ms else 0.0
+        seconds = latency_ms / 1000
+        self.latency_ratio += self.LATENCY_SMOOTHING * (ratio - self.latency_ratio)
+        self.plan_seconds = seconds if self.plan_seconds is None else (
+            self.plan_seconds + self.LATENCY_SMOOTHING * (seconds - self.plan_seconds)
+        )
+        self._adjust()
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained"""
+        per_plan = self.plan_seconds or self.DEFAULT_PLAN_SECONDS
+        return max(1, math.ceil((self.waiting + 1) / self.max_concurrent * per_plan))
+
+    def _adjust(self) -> None:
+        # An idle server is not overloaded, however slow the last plans were
+        if not self.active and not self.waiting:
+            self.latency_ratio = 0.0
+        now = time.monotonic()
+        if now - self.changed_at < self.MIN_DWELL_SECONDS:
+            return
+        fill = self.waiting / self.max_queue if self.max_queue else 0.0
+        ratio = self.latency_ratio
+
+        if (fill >= self.STEP_DOWN_QUEUE_FILL or ratio >= self.STEP_DOWN_LATENCY_RATIO) \
+                and self.level < len(self.MODE_LADDER) - 1:
+            self.level += 1
+        elif fill <= self.STEP_UP_QUEUE_FILL and ratio <= self.STEP_UP_LATENCY_RATIO and self.level > 0:
+            self.level -= 1
+        else:
+            return
+        self.changed_at = now
+        print(f"🚦 Admission: plan modes stepped to level {self.level} (queue {fill:.0%}, latency x{ratio:.2f})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "maxConcurrent": self.max_concurrent,
+            "maxQueue": self.max_queue,
+            "stepDown": self.level,
+            "latencyRatio": round(self.latency_ratio, 2),
+            "rejected": self.rejected
+        }
+
+
+# Singleton instance
+admission = AdmissionController()
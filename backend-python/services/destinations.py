@@ -0,0 +1,74 @@
+from functools import lru_cache
+from typing import Dict, Any, Optional
+from services.gazetteer import gazetteer, lookup_words, normalize_place_name
+
+
+def slugify(name: Optional[str]) -> str:
+    """
+    Cache-key form of a name ("Vasco da Gama" -> "vasco-da-gama"). Noise-only comma
+    parts are dropped ("Ziro, India"), other noise words only while two words remain
+    ("Lake City" stays "lake-city" rather than sharing "lake")
+    """
+    parts = [part for part in (name or "").split(",") if lookup_words(part)]
+    words = lookup_words(",".join(parts))
+    if len(words) < 2:
+        words = normalize_place_name(",".join(parts)).split()
+    return "-".join(words)
+
+
+@lru_cache(maxsize=4096)
+def _canonicalize(name: str) -> Dict[str, Any]:
+    entry = gazetteer.lookup(name)
+    if not entry:
+        slug = slugify(name)
+        return {"id": slug, "name": name.strip(), "state": None, "known": False, "rolledUpFrom": None}
+
+    rolled_up_from = None
+    # Neighbourhoods share their city's caches ("Indiranagar, Bangalore" -> Bengaluru)
+    while entry.get("parent"):
+        rolled_up_from = rolled_up_from or entry["name"]
+        parent = gazetteer.lookup(entry["parent"])
+        if not parent or parent is entry:
+            break
+        entry = parent
+
+    return {
+        "id": slugify(entry["name"]),
+        "name": entry["name"],
+        "state": entry.get("state"),
+        "known": True,
+        "rolledUpFrom": rolled_up_from
+    }
+
+
+class DestinationCanonicalizer:
+    """
+    Destination Canonicalizer
+    Maps every spelling of a destination ("Bangalore", "bengaluru ",
+    "Indiranagar, Bangalore") to one stable ID via the gazetteer's alias table
+    and neighbourhood roll-up. Results are memoized; every cache and mock
+    lookup keys on the ID instead of the raw string.
+    """
+
+    def canonicalize(self, name: Optional[str]) -> Dict[str, Any]:
+        """{id, name, state, known, rolledUpFrom} for a free-form destination"""
+        if not name or not name.strip():
+            return {"id": "", "name": "", "state": None, "known": False, "rolledUpFrom": None}
+        return dict(_canonicalize(name.strip()))
+
+    def destination_id(self, name: Optional[str]) -> str:
+        """Stable cache key for a destination ("bengaluru", "vasco-da-gama")"""
+        if not name or not name.strip():
+            return ""
+        return _canonicalize(name.strip())["id"]
+
+    def state_id(self, name: Optional[str]) -> Optional[str]:
+        """Slug of the destination's state, for state-level packs ("kerala")"""
+        if not name or not name.strip():
+            return None
+        state = _canonicalize(name.strip())["state"]
+        return slugify(state) if state else None
+
+
+# Singleton instance
+destinations = DestinationCanonicalizer()
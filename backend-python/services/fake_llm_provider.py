@@ -0,0 +1,430 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from services.llm_providers import LLMProvider
+
+
+class FakeLLMError(Exception):
+    """Simulated provider failure raised by error injection"""
+
+
+class LatencyDistribution:
+    """
+    Latency model for simulated calls (milliseconds)
+    Spec format: "fixed:800", "uniform:400,1500", "normal:900,200", "lognormal:900,0.5"
+    For lognormal the first value is the median and the second is sigma.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, raw = spec.partition(":")
+        kind = kind.strip().lower()
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.kind = kind
+        self.params = [float(v) for v in raw.split(",") if v.strip()] or [0.0]
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        """Sample one latency in milliseconds (never negative)"""
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        else:
+            value = p[0] * math.exp(rng.gauss(0.0, p[1] if len(p) > 1 else 0.5))
+        return max(0.0, value)
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Fake LLM Provider
+    Deterministic offline stand-in for Gemini. Builds schema-valid parse and
+    itinerary JSON from the prompt itself, with simulated timings and failures.
+    """
+
+    name = "fake"
+
+    ERROR_TYPES = ("rate_limit", "timeout", "server", "malformed")
+
+    # Attractions per day by travel style (same pace the real prompt asks for)
+    STYLE_PACE = {
+        "relaxed": (3, 4),
+        "balanced": (4, 5),
+        "adventure": (5, 6),
+        "cultural": (3, 4)
+    }
+
+    # Relative latency of each model tier (lite models answer faster)
+    TIER_SLOWDOWN = {"lite": 0.5, "standard": 1.0, "pro": 2.5}
+
+    EVENT_KEYWORDS = ("hackathon", "conference", "wedding", "meeting", "summit", "workshop", "concert")
+
+    ACTIVITY_KEYWORDS = {"beach": "beaches", "trek": "trekking", "adventure": "adventure", "nightlife": "nightlife"}
+
+    def __init__(
+        self,
+        seed: int = 42,
+        latency: str = "fixed:0",
+        tokens_per_second: float = 0.0,
+        chunk_tokens: int = 16,
+        error_rate: float = 0.0,
+        error_types: Optional[List[str]] = None
+    ):
+        self.seed = seed
+        self.latency = LatencyDistribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.error_rate = error_rate
+        self.error_types = [t for t in (error_types or ["rate_limit", "timeout", "server"]) if t in self.ERROR_TYPES]
+        self.stats = {"calls": 0, "errors": 0, "simulated_ms": 0.0}
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMProvider":
+        """Configure from FAKE_LLM_* environment variables"""
+        error_types = os.getenv("FAKE_LLM_ERROR_TYPES")
+        return cls(
+            seed=int(os.getenv("FAKE_LLM_SEED", "42")),
+            latency=os.getenv("FAKE_LLM_LATENCY", "fixed:0"),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "0")),
+            chunk_tokens=int(os.getenv("FAKE_LLM_CHUNK_TOKENS", "16")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            error_types=error_types.split(",") if error_types else None
+        )
+
+    # ---------- Provider interface ----------
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> str:
+        timing_rng = self._timing_rng()
+        text = self._respond(prompt, temperature)
+        text = self._maybe_inject_error(timing_rng, text)
+
+        slowdown = self.TIER_SLOWDOWN.get(model_tier, 1.0)
+        delay_ms = (self.latency.sample(timing_rng) + self._token_time_ms(text, max_tokens)) * slowdown
+        self.stats["simulated_ms"] += delay_ms
+        await asyncio.sleep(delay_ms / 1000)
+        return self._truncate(text, max_tokens)
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        timing_rng = self._timing_rng()
+        text = self._respond(prompt, temperature)
+        text = self._truncate(self._maybe_inject_error(timing_rng, text), max_tokens)
+
+        # Time to first token, then chunks at the simulated token rate
+        slowdown = self.TIER_SLOWDOWN.get(model_tier, 1.0)
+        first_token_ms = self.latency.sample(timing_rng) * slowdown
+        self.stats["simulated_ms"] += first_token_ms
+        await asyncio.sleep(first_token_ms / 1000)
+
+        chunk_chars = self.chunk_tokens * 4
+        for start in range(0, len(text), chunk_chars):
+            chunk = text[start:start + chunk_chars]
+            chunk_ms = self._token_time_ms(chunk, None) * slowdown
+            self.stats["simulated_ms"] += chunk_ms
+            if chunk_ms:
+                await asyncio.sleep(chunk_ms / 1000)
+            yield chunk
+
+    # ---------- Timing & failure simulation ----------
+
+    def _timing_rng(self) -> random.Random:
+        self.stats["calls"] += 1
+        return random.Random(f"{self.seed}:{self.stats['calls']}")
+
+    def _token_time_ms(self, text: str, max_tokens: Optional[int]) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        tokens = self._count_tokens(text)
+        if max_tokens:
+            tokens = min(tokens, max_tokens)
+        return tokens / self.tokens_per_second * 1000
+
+    def _count_tokens(self, text: str) -> int:
+        """Rough token estimate (~4 characters per token)"""
+        return max(1, len(text) // 4)
+
+    def _truncate(self, text: str, max_tokens: Optional[int]) -> str:
+        return text[:max_tokens * 4] if max_tokens else text
+
+    def _maybe_inject_error(self, rng: random.Random, text: str) -> str:
+        if not self.error_types or rng.random() >= self.error_rate:
+            return text
+
+        self.stats["errors"] += 1
+        error_type = rng.choice(self.error_types)
+        if error_type == "malformed":
+            # Cut the payload mid-object so JSON parsing fails downstream
+            return text[:max(1, len(text) // 2)]
+        if error_type == "rate_limit":
+            raise FakeLLMError("429 Resource has been exhausted (simulated)")
+        if error_type == "timeout":
+            raise FakeLLMError("504 Deadline Exceeded (simulated)")
+        raise FakeLLMError("500 Internal error encountered (simulated)")
+
+    # ---------- Deterministic responses ----------
+
+    def _content_rng(self, prompt: str, temperature: float) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{temperature}:{prompt}".encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _respond(self, prompt: str, temperature: float) -> str:
+        rng = self._content_rng(prompt, temperature)
+
+        if "travel query parser" in prompt:
+            return json.dumps(self._fake_parse(prompt))
+        if "Available Places" in prompt:
+            return json.dumps(self._fake_itinerary(prompt, rng))
+        if "budget advisor" in prompt:
+            return json.dumps({
+                "withinBudget": True,
+                "totalEstimated": 0,
+                "breakdown": {},
+                "adjustments": []
+            })
+        return "This is a simulated response from the fake LLM provider."
+
+    def _fake_parse(self, prompt: str) -> Dict[str, Any]:
+        """Build a parse_user_query response from the query and stored preferences"""
+        query_match = re.search(r'User query: "(.*)"', prompt)
+        query = query_match.group(1) if query_match else ""
+        query_lower = query.lower()
+
+        prefs_match = re.search(r"User's stored preferences: (.*)", prompt)
+        try:
+            stored = json.loads(prefs_match.group(1)) if prefs_match else {}
+        except ValueError:
+            stored = {}
+
+        destination = stored.get("destination")
+        if not destination:
+            dest_match = re.findall(r"\b(?:to|in|at|visit|visiting)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)", query)
+            destination = dest_match[-1] if dest_match else None
+
+        origin_match = re.search(r"\bfrom\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)", query)
+
+        days_match = re.search(r"(\d+)\s*-?\s*days?", query_lower)
+        days = int(days_match.group(1)) if days_match else (3 if "weekend" in query_lower else None)
+
+        budget_match = re.search(r"(?:₹|rs\.?|inr|under)\s*(\d+(?:,\d+)*)", query_lower)
+        budget = float(budget_match.group(1).replace(",", "")) if budget_match else None
+
+        adults, children = 2, 0
+        family_match = re.search(r"family of (\d+)", query_lower)
+        adults_match = re.search(r"(\d+)\s*adults?", query_lower)
+        children_match = re.search(r"(\d+)\s*(?:children|kids?)", query_lower)
+        if family_match:
+            size = int(family_match.group(1))
+            adults, children = min(2, size), max(0, size - 2)
+        if adults_match:
+            adults = int(adults_match.group(1))
+        if children_match:
+            children = int(children_match.group(1))
+        if "solo" in query_lower:
+            adults = 1
+
+        event_type = next((k for k in self.EVENT_KEYWORDS if k in query_lower), None)
+        event_details = {"has_event": False}
+        if event_type:
+            event_details = {
+                "has_event": True,
+                "event_type": event_type,
+                "event_name": f"{destination} {event_type}" if destination else event_type,
+                "event_location": destination,
+                "event_schedule": None,
+                "return_constraints": None
+            }
+
+        dietary = []
+        if "vegan" in query_lower:
+            dietary.append("vegan")
+        elif "non-veg" in query_lower:
+            dietary.append("non-veg")
+        elif "veg" in query_lower:
+            dietary.append("veg")
+
+        return {
+            "destination": destination,
+            "origin": origin_match.group(1) if origin_match else None,
+            "duration": {"days": days, "startDate": None, "endDate": None},
+            "budget": budget,
+            "travelers": {"adults": adults, "children": children},
+            "event_details": event_details,
+            "preferences": {
+                "dietary": dietary,
+                "transport_mode": None,
+                "accommodation_type": None,
+                "travel_style": None,
+                "activities": [a for k, a in self.ACTIVITY_KEYWORDS.items() if k in query_lower],
+                "night_travel": False
+            }
+        }
+
+    def _extract_places(self, prompt: str) -> List[Dict[str, Any]]:
+        """Decode the Available Places JSON array embedded in the prompt"""
+        match = re.search(r"Available Places[^\n]*:\s*\n\s*\[", prompt)
+        if not match:
+            return []
+        try:
+            places, _ = json.JSONDecoder().raw_decode(prompt[match.end() - 1:])
+            return places if isinstance(places, list) else []
+        except ValueError:
+            return []
+
+    def _prompt_field(self, prompt: str, label: str, default: str = "") -> str:
+        match = re.search(rf"- {re.escape(label)}: (.*)", prompt)
+        return match.group(1).strip() if match else default
+
+    def _fake_itinerary(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        """Build an itinerary using only places listed in the prompt"""
+        places = self._extract_places(prompt)
+        attractions = [p for p in places if p.get("category") == "attraction"]
+        restaurants = [p for p in places if p.get("category") == "restaurant"] or [{"name": "Hotel Restaurant"}]
+        hotels = [p for p in places if p.get("category") == "hotel"]
+
+        days_match = re.search(r"Create (\d+)-day", prompt)
+        days = int(days_match.group(1)) if days_match else 3
+        # Per-day prompts say which day of the whole trip they cover
+        part_match = re.search(r"- Day: (\d+) of (\d+)", prompt)
+        first_day, total_days = (int(part_match.group(1)), int(part_match.group(2))) if part_match else (1, days)
+        destination = self._prompt_field(prompt, "Destination", "the destination")
+        origin = self._prompt_field(prompt, "Origin", "Not specified")
+        round_trip = self._prompt_field(prompt, "Round Trip") == "True"
+        style = self._prompt_field(prompt, "Travel Style", "balanced")
+        is_event = "EVENT-FOCUSED TRIP" in prompt
+        event_type = self._prompt_field(prompt, "Event Type", "event")
+
+        # Visit attractions cluster by cluster so each day stays geographically tight
+        attractions.sort(key=lambda p: (str(p.get("cluster", "")), -(p.get("rating") or 0)))
+        low, high = self.STYLE_PACE.get(style, self.STYLE_PACE["balanced"])
+        per_day = 1 if is_event else rng.randint(low, high)
+        hotel = hotels[0] if hotels else {"name": f"Hotel in {destination}"}
+
+        # Alternative plans start from a different attraction and restaurant
+        variant_match = re.search(r"ALTERNATIVE PLAN (\d+) of", prompt)
+        variant = int(variant_match.group(1)) - 1 if variant_match else 0
+        if variant and attractions:
+            shift = (variant * per_day) % len(attractions)
+            attractions = attractions[shift:] + attractions[:shift]
+        if variant and len(hotels) > 1:
+            hotel = hotels[variant % len(hotels)]
+
+        meal_index = variant + (first_day - 1) * 3
+        attraction_index = 0
+        result_days = []
+        for day in range(first_day, first_day + days):
+            activities = []
+            clock = 9 * 60 + 30
+
+            if day == 1 and origin and origin not in ("Not specified", "None"):
+                activities.append(self._activity(
+                    "06:30 AM", "travel", f"Travel from {origin} to {destination}",
+                    f"Depart {origin} early to reach {destination}", "2 hours"
+                ))
+            if day == 1:
+                activities.append(self._activity(
+                    "08:00 AM" if activities else "07:30 AM", "hotel", hotel["name"],
+                    f"Hotel check-in at {hotel['name']}", "30 minutes", hotel
+                ))
+
+            for meal, meal_time in (("breakfast", 8 * 60 + 30), ("lunch", 13 * 60), ("dinner", 19 * 60 + 30)):
+                if meal == "lunch" or meal == "dinner":
+                    # Fill the slot before this meal with attractions
+                    slots = per_day // 2 if meal == "lunch" else per_day - per_day // 2
+                    for _ in range(slots):
+                        if is_event or attraction_index >= len(attractions):
+                            break
+                        place = attractions[attraction_index]
+                        attraction_index += 1
+                        activities.append(self._activity(
+                            self._format_time(clock), "sightseeing", place["name"],
+                            f"Explore {place['name']}", "1.5 hours", place
+                        ))
+                        clock += 105
+                    if is_event and meal == "lunch":
+                        activities.append(self._activity(
+                            "10:00 AM", "activity", f"Attend {event_type}",
+                            f"{event_type.title()} sessions", "3 hours"
+                        ))
+
+                restaurant = restaurants[meal_index % len(restaurants)]
+                meal_index += 1
+                activities.append(self._activity(
+                    self._format_time(meal_time), "food", restaurant["name"],
+                    f"{meal.title()} at {restaurant['name']}", "1 hour", restaurant
+                ))
+                clock = max(clock, meal_time + 75)
+
+                if meal == "breakfast" and day == total_days:
+                    activities.append(self._activity(
+                        "09:45 AM", "hotel", hotel["name"],
+                        f"Hotel check-out from {hotel['name']}", "30 minutes", hotel
+                    ))
+                    clock += 30
+
+            if day == total_days:
+                if round_trip and origin not in ("Not specified", "None", ""):
+                    activities.append(self._activity(
+                        "10:00 PM", "travel", f"Return to {origin}",
+                        f"Travel back from {destination} to {origin}", "2 hours"
+                    ))
+
+            result_days.append({
+                "day": day,
+                "summary": f"Day {day} in {destination}",
+                "activities": activities
+            })
+
+        return {"days": result_days}
+
+    def _activity(
+        self,
+        time: str,
+        activity_type: str,
+        name: str,
+        description: str,
+        duration: str,
+        place: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        location = {"name": name}
+        if place:
+            location["address"] = place.get("address", "")
+            if place.get("location"):
+                location.update(place["location"])
+        return {
+            "time": time,
+            "type": activity_type,
+            "name": name,
+            "description": description,
+            "duration": duration,
+            "tips": "",
+            "location": location
+        }
+
+    def _format_time(self, minutes: int) -> str:
+        hours, mins = divmod(int(minutes), 60)
+        suffix = "AM" if hours < 12 else "PM"
+        return f"{(hours - 1) % 12 + 1:02d}:{mins:02d} {suffix}"
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import unicodedata
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import haversine_km
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.json")
+
+# Words dropped before lookup ("Goa, India", "Bangalore city")
+NOISE_WORDS = {"india", "city", "district", "town", "the", "state"}
+
+
+def normalize_place_name(name: str) -> str:
+    """Lowercase ASCII words only ("Bengaluru,  Karnataka!" -> "bengaluru karnataka")"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    text = text.replace("'", "")
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def lookup_words(name: str) -> List[str]:
+    """Normalized words without noise words, for queries only (aliases are indexed verbatim)"""
+    return [word for word in normalize_place_name(name).split() if word not in NOISE_WORDS]
+
+
+def _word_runs(words: List[str]):
+    """Contiguous runs of words, longest first, skipping runs made only of noise words"""
+    for length in range(len(words), 0, -1):
+        for start in range(len(words) - length + 1):
+            run = words[start:start + length]
+            if not NOISE_WORDS.issuperset(run):
+                yield " ".join(run)
+
+
+class Gazetteer:
+    """
+    Gazetteer
+    Bundled Indian cities, towns and tourist regions (data/gazetteer.json) with
+    coordinates, state and aliases. Loaded once; every lookup is a dict hit and
+    distances are vectorized haversine with a road-distance factor, so budget
+    estimates and offline geocoding never touch the network.
+    """
+
+    # Straight-line to typical road distance
+    ROAD_FACTOR = 1.3
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        with open(path, encoding="utf-8") as f:
+            self.entries: List[Dict[str, Any]] = json.load(f)
+
+        self.coords = np.array([[e["lat"], e["lng"]] for e in self.entries], dtype=float)
+        self.aliases: Dict[str, int] = {}
+        # Neighbourhoods only match their full name or alias ("Salt Lake City" is not Salt Lake)
+        self.full_names: Dict[int, set] = {}
+        for index, entry in enumerate(self.entries):
+            for alias in [entry["name"]] + entry.get("aliases", []):
+                # Verbatim, so "pink city" never shrinks to a generic "pink"
+                key = normalize_place_name(alias)
+                if key:
+                    self.aliases.setdefault(key, index)
+                if entry.get("parent"):
+                    self.full_names.setdefault(index, set()).add(normalize_place_name(alias))
+
+    def lookup(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Entry for a free-form place name ("Baga, North Goa", "Bangalore Urban"), or None"""
+        index = self._index(name)
+        return self.entries[index] if index is not None else None
+
+    def coordinates(self, name: Optional[str]) -> Optional[Tuple[float, float]]:
+        """(lat, lng) for a place name, without any network call"""
+        entry = self.lookup(name)
+        return (entry["lat"], entry["lng"]) if entry else None
+
+    def distance_km(self, origin: Optional[str], destination: Optional[str], road: bool = True) -> Optional[float]:
+        """Estimated km between two places (None if either is unknown)"""
+        first, second = self._index(origin), self._index(destination)
+        if first is None or second is None:
+            return None
+        km = float(haversine_km(*self.coords[first], *self.coords[second]))
+        return km * self.ROAD_FACTOR if road else km
+
+    def distances_from(self, origin: str, destinations: List[str], road: bool = True) -> np.ndarray:
+        """Km from origin to each destination in one vectorized pass (NaN where unknown)"""
+        start = self._index(origin)
+        indexes = [self._index(name) for name in destinations]
+        result = np.full(len(destinations), np.nan)
+        known = [i for i, index in enumerate(indexes) if index is not None]
+        if start is None or not known:
+            return result
+        targets = self.coords[[indexes[i] for i in known]]
+        km = haversine_km(self.coords[start, 0], self.coords[start, 1], targets[:, 0], targets[:, 1])
+        result[known] = km * (self.ROAD_FACTOR if road else 1.0)
+        return result
+
+    def nearest(self, lat: float, lng: float) -> Tuple[Dict[str, Any], float]:
+        """Closest gazetteer entry to a point and its straight-line km (reverse geocoding)"""
+        km = haversine_km(lat, lng, self.coords[:, 0], self.coords[:, 1])
+        index = int(np.argmin(km))
+        return self.entries[index], float(km[index])
+
+    def _index(self, name: Optional[str]) -> Optional[int]:
+        """
+        Comma parts in order (most specific first); within a part the longest known
+        word run wins, first as written and then with noise words dropped
+        """
+        if not name:
+            return None
+        for part in name.split(","):
+            words = normalize_place_name(part).split()
+            stripped = lookup_words(part)
+            runs = list(_word_runs(words)) + (list(_word_runs(stripped)) if stripped != words else [])
+            for run in runs:
+                index = self.aliases.get(run)
+                if index is None:
+                    continue
+                if index in self.full_names and normalize_place_name(part) not in self.full_names[index]:
+                    continue
+                return index
+        return None
+
+
+# Singleton instance
+gazetteer = Gazetteer()
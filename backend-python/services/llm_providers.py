@@ -0,0 +1,128 @@
+import os
+from typing import AsyncIterator, Optional
+
+
+class LLMProvider:
+    """
+    LLM Provider interface
+    Backend that turns a prompt into raw model text for LLMService
+    """
+
+    name = "base"
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> str:
+        """Generate a full response for the prompt"""
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream the response in chunks (default: single chunk)"""
+        yield await self.generate(prompt, temperature, max_tokens, json_mode, model_tier)
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini backend"""
+
+    name = "gemini"
+
+    # Model per quality tier (overridable via GEMINI_MODEL_LITE / GEMINI_MODEL / GEMINI_MODEL_PRO)
+    MODEL_TIERS = {
+        "lite": "gemini-2.5-flash-lite",
+        "standard": "gemini-2.5-flash",
+        "pro": "gemini-2.5-pro"
+    }
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            print("⚠️ GEMINI_API_KEY not found in environment variables")
+
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.model_tiers = {
+            "lite": os.getenv("GEMINI_MODEL_LITE", self.MODEL_TIERS["lite"]),
+            "standard": os.getenv("GEMINI_MODEL", self.MODEL_TIERS["standard"]),
+            "pro": os.getenv("GEMINI_MODEL_PRO", self.MODEL_TIERS["pro"])
+        }
+        # Use gemini-2.5-flash (confirmed available model)
+        self.model = genai.GenerativeModel(self.model_tiers["standard"])
+        self._tier_models = {"standard": self.model}
+
+    def _model_for(self, model_tier: Optional[str]):
+        """Return (and lazily create) the model for a tier"""
+        tier = model_tier if model_tier in self.model_tiers else "standard"
+        if tier not in self._tier_models:
+            self._tier_models[tier] = self.genai.GenerativeModel(self.model_tiers[tier])
+        return self._tier_models[tier]
+
+    def _generation_config(
+        self,
+        temperature: float,
+        max_tokens: Optional[int],
+        json_mode: bool
+    ):
+        config = {"temperature": temperature}
+        if max_tokens:
+            config["max_output_tokens"] = max_tokens
+        if json_mode:
+            config["response_mime_type"] = "application/json"
+        return self.genai.types.GenerationConfig(**config)
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> str:
+        # Async call so a request deadline can cancel it instead of blocking the event loop
+        response = await self._model_for(model_tier).generate_content_async(
+            prompt,
+            generation_config=self._generation_config(temperature, max_tokens, json_mode)
+        )
+        return response.text
+
+    async def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        model_tier: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        # Async stream: each chunk is awaited instead of blocking the event loop for the whole response
+        response = await self._model_for(model_tier).generate_content_async(
+            prompt,
+            generation_config=self._generation_config(temperature, max_tokens, json_mode),
+            stream=True
+        )
+        async for chunk in response:
+            yield chunk.text
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """Create the provider selected by name or the LLM_PROVIDER env var"""
+    name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+
+    if name == "fake":
+        from services.fake_llm_provider import FakeLLMProvider
+        print("🧪 Using fake LLM provider (offline mode)")
+        return FakeLLMProvider.from_env()
+
+    return GeminiProvider()
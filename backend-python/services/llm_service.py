@@ -1,8 +1,10 @@
-import google.generativeai as genai
 import os
 import json
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
 from dotenv import load_dotenv
+from services.llm_providers import LLMProvider, create_provider
+from utils.deadline import within_deadline, DeadlineExceeded
 
 load_dotenv()
 
@@ -10,17 +12,15 @@ load_dotenv()
 class LLMService:
     """
     LLM Service for AI agent operations
-    Centralized service for all Gemini API calls
+    Centralized service for all LLM calls (Gemini by default, pluggable provider)
     """
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            print("⚠️ GEMINI_API_KEY not found in environment variables")
-        
-        genai.configure(api_key=api_key)
-        # Use gemini-2.5-flash (confirmed available model)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        self.provider = provider or create_provider()
+    
+    def set_provider(self, provider: LLMProvider):
+        """Swap the LLM backend (e.g. FakeLLMProvider for offline tests)"""
+        self.provider = provider
     
     async def generate_completion(
         self, 
@@ -28,42 +28,61 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: int = 2000
     ) -> str:
-        """Generate completion from Gemini"""
+        """Generate completion from the LLM provider"""
         try:
-            # Convert OpenAI-style messages to Gemini history
+            # Convert OpenAI-style messages to a single prompt
             prompt = self._convert_messages_to_prompt(messages)
             
-            response = self.model.generate_content(
+            # Bounded by the request deadline, if one is set
+            return await within_deadline(self.provider.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens
-                )
-            )
-            return response.text
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            # Deadline handling upstream depends on the exception type
+            raise
         except Exception as e:
-            print(f"Gemini API Error: {str(e)}")
+            print(f"LLM API Error ({self.provider.name}): {str(e)}")
             raise Exception(f"LLM Service Error: {str(e)}")
     
-    async def generate_json(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def stream_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ) -> AsyncIterator[str]:
+        """Stream completion chunks from the LLM provider"""
+        prompt = self._convert_messages_to_prompt(messages)
+        async for chunk in self.provider.stream(prompt, temperature=temperature, max_tokens=max_tokens):
+            yield chunk
+    
+    async def generate_json(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.3,
+        model_tier: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Generate structured JSON response"""
+        text = None
         try:
             prompt = self._convert_messages_to_prompt(messages)
             
-            # Use JSON mode for Gemini
-            response = self.model.generate_content(
+            # Use JSON mode (bounded by the request deadline, if one is set)
+            text = await within_deadline(self.provider.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    response_mime_type="application/json"
-                )
-            )
-            return json.loads(response.text)
+                temperature=temperature,
+                json_mode=True,
+                model_tier=model_tier
+            ))
+            return json.loads(text)
+        except (DeadlineExceeded, asyncio.TimeoutError):
+            # Deadline handling upstream depends on the exception type
+            raise
         except Exception as e:
-            print(f"Gemini JSON Error: {str(e)}")
+            print(f"LLM JSON Error ({self.provider.name}): {str(e)}")
             # Fallback: try to extract JSON from text if strict JSON mode fails
             try:
-                text = response.text
                 start = text.find('{')
                 end = text.rfind('}') + 1
                 if start != -1 and end != -1:
@@ -88,7 +107,8 @@ class LLMService:
     async def parse_user_query(
         self, 
         query: str, 
-        user_preferences: Optional[Dict] = None
+        user_preferences: Optional[Dict] = None,
+        model_tier: Optional[str] = None
     ) -> Dict[str, Any]:
         """Parse user query to extract travel details"""
         messages = [
@@ -147,16 +167,249 @@ Extract all travel details as JSON."""
             }
         ]
         
-        return await self.generate_json(messages)
+        return await self.generate_json(messages, model_tier=model_tier)
     
     async def generate_itinerary(
         self, 
         trip_details: Dict[str, Any], 
         places_data: List[Dict],
-        clusters: Dict[str, List[Dict]] = None
+        clusters: Dict[str, List[Dict]] = None,
+        plan_mode: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Generate route-optimized itinerary suggestions"""
-        messages = [
+        messages = self._build_itinerary_messages(trip_details, places_data, clusters, plan_mode)
+        return await self.generate_json(messages, model_tier=(plan_mode or {}).get("model_tier"))
+    
+    async def generate_itinerary_variants(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict],
+        clusters: Dict[str, List[Dict]] = None,
+        count: int = 2,
+        plan_mode: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        Generate several alternative itineraries from one compiled prompt.
+        Calls run concurrently; failed variants are returned as exceptions.
+        """
+        messages = self._build_itinerary_messages(trip_details, places_data, clusters, plan_mode)
+        
+        calls = []
+        for index in range(count):
+            variant_messages = messages
+            if index > 0:
+                variant_messages = messages + [self._variant_message(index, count)]
+            # Spread temperatures so alternatives don't collapse into the same plan
+            calls.append(self.generate_json(
+                variant_messages,
+                temperature=min(0.9, 0.3 + 0.2 * index),
+                model_tier=(plan_mode or {}).get("model_tier")
+            ))
+        
+        return await asyncio.gather(*calls, return_exceptions=True)
+    
+    async def generate_itinerary_by_day(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict],
+        plan_mode: Optional[Dict[str, Any]] = None,
+        variant: int = 0,
+        variants: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Generate every day concurrently from its own slice of attractions
+        (short per-day prompts) and merge them into one itinerary.
+        """
+        plan_mode = plan_mode or {}
+        days = trip_details["duration"]["days"]
+        day_places = self._split_places_by_day(places_data, days)
+        
+        calls = []
+        for day in range(1, days + 1):
+            messages = self._build_itinerary_messages(trip_details, day_places[day - 1], None, plan_mode, day=day)
+            if variant:
+                messages = messages + [self._variant_message(variant, variants)]
+            calls.append(self.generate_json(
+                messages,
+                temperature=min(0.9, 0.3 + 0.2 * variant),
+                model_tier=plan_mode.get("model_tier")
+            ))
+        
+        results = await asyncio.gather(*calls)
+        
+        merged = []
+        for day, result in enumerate(results, start=1):
+            day_list = result if isinstance(result, list) else result.get("days", [])
+            if day_list:
+                merged.append({**day_list[0], "day": day})
+        return {"days": merged}
+    
+    def _variant_message(self, index: int, count: int) -> Dict[str, str]:
+        """Extra instruction asking for a distinct alternative plan"""
+        return {
+            "role": "user",
+            "content": f"""ALTERNATIVE PLAN {index + 1} of {count}: Create a clearly different option from the same Available Places.
+Pick different attractions and restaurants where possible and vary the order of zones, while following every rule above."""
+        }
+    
+    def _split_places_by_day(self, places_data: List[Dict], days: int) -> List[List[Dict]]:
+        """Give each day a contiguous, cluster-ordered slice of attractions plus all restaurants and hotels"""
+        attractions = sorted(
+            (p for p in places_data if p.get("category") == "attraction"),
+            key=lambda p: str(p.get("cluster", ""))
+        )
+        shared = [p for p in places_data if p.get("category") != "attraction"]
+        
+        per_day = -(-len(attractions) // max(1, days))  # ceil division
+        return [
+            attractions[i * per_day:(i + 1) * per_day] + shared
+            for i in range(days)
+        ]
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token estimate (~4 characters per token)"""
+        return len(text) // 4
+    
+    def _fit_places_to_budget(self, places_data: List[Dict], token_budget: int) -> List[Dict]:
+        """Keep all restaurants and hotels, then add attractions in priority order until the budget is spent"""
+        essentials = [p for p in places_data if p.get("category") != "attraction"]
+        used = self._estimate_tokens(json.dumps(essentials))
+        
+        attractions = []
+        for place in places_data:
+            if place.get("category") != "attraction":
+                continue
+            cost = self._estimate_tokens(json.dumps(place)) + 1
+            if used + cost > token_budget:
+                break
+            attractions.append(place)
+            used += cost
+        
+        return attractions + essentials
+    
+    def _build_itinerary_messages(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict],
+        clusters: Dict[str, List[Dict]] = None,
+        plan_mode: Optional[Dict[str, Any]] = None,
+        day: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Compile the itinerary prompt within the plan mode's token budget"""
+        plan_mode = plan_mode or {}
+        compact = plan_mode.get("compact_prompt") or day is not None
+        token_budget = plan_mode.get("prompt_token_budget")
+        
+        is_event = trip_details.get('event_details', {}).get('has_event', False)
+        
+        def build(places):
+            if is_event:
+                return self._event_itinerary_messages(trip_details, places)
+            if compact:
+                return self._compact_itinerary_messages(trip_details, places, clusters, day)
+            return self._full_itinerary_messages(trip_details, places, clusters)
+        
+        if token_budget:
+            overhead = self._estimate_tokens(self._convert_messages_to_prompt(build([])))
+            places_data = self._fit_places_to_budget(places_data, token_budget - overhead)
+        else:
+            places_data = places_data[:100]
+        
+        return build(places_data)
+    
+    def _event_itinerary_messages(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict]
+    ) -> List[Dict[str, str]]:
+        """Short instruction set for event-focused trips (logistics around the venue)"""
+        event = trip_details.get('event_details', {})
+        
+        return [
+            {
+                "role": "system",
+                "content": f"""You are a business-travel planner. EVENT-FOCUSED TRIP: the user is attending an event, not sightseeing.
+Return JSON: {{"days": [{{"day", "summary", "activities": [{{"time", "type", "name", "description", "duration", "tips", "location"}}]}}]}}.
+RULES:
+1. The event is the PRIMARY activity: block its exact hours (type 'activity') and reach the venue before it starts, with a buffer.
+2. Breakfast, lunch and dinner every day at category='restaurant' places near the venue; say which meal in the description.
+3. Hotel check-in on the first day and check-out on the last day (type 'hotel'), using category='hotel' places.
+4. If Origin is given, travel from Origin on the first day; if Round Trip is True, travel back on the last day respecting return constraints (type 'travel').
+5. Sightseeing only in genuinely free slots (early morning / late evening), from category='attraction' places.
+6. Use ONLY names from Available Places. Activity types: 'hotel', 'food', 'sightseeing', 'travel', 'activity', 'rest'."""
+            },
+            {
+                "role": "user",
+                "content": f"""Create {trip_details['duration']['days']}-day EVENT-FOCUSED itinerary for {trip_details['destination']}.
+- Event Type: {event.get('event_type', 'N/A')}
+- Event Name: {event.get('event_name', 'N/A')}
+- Event Location: {event.get('event_location', 'N/A')}
+- Event Schedule: {event.get('event_schedule', 'N/A')}
+- Return Constraints: {event.get('return_constraints', 'N/A')}
+- Origin: {trip_details.get('origin', 'Not specified')}
+- Destination: {trip_details['destination']}
+- Round Trip: {trip_details.get('is_round_trip', False)}
+- Budget: ₹{trip_details['budget']}
+- Travelers: {trip_details.get('travelers', {}).get('adults', 2)} adults, {trip_details.get('travelers', {}).get('children', 0)} children
+- Dietary: {trip_details.get('preferences', {}).get('dietary', [])}
+- Transport Mode: {trip_details.get('preferences', {}).get('transport_mode', 'flexible')}
+
+Available Places:
+{json.dumps(places_data)}"""
+            }
+        ]
+    
+    def _compact_itinerary_messages(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict],
+        clusters: Dict[str, List[Dict]] = None,
+        day: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Short instruction set for fast mode and per-day generation"""
+        event = trip_details.get('event_details', {})
+        days = trip_details['duration']['days']
+        preferences = trip_details.get('preferences', {})
+        
+        return [
+            {
+                "role": "system",
+                "content": f"""You are an expert travel planner. Return JSON: {{"days": [{{"day", "summary", "activities": [{{"time", "type", "name", "description", "duration", "tips", "location"}}]}}]}}.
+RULES:
+1. Use ONLY names from Available Places. Never invent restaurants, hotels or attractions.
+2. Breakfast, lunch and dinner every day at category='restaurant' places; say which meal in the description.
+3. Hotel check-in on the first trip day and check-out on the last trip day (type 'hotel').
+4. If Origin is given, travel from Origin on the first trip day; if Round Trip is True, travel back on the last trip day (type 'travel').
+5. Pace: relaxed 3-4, balanced 4-5, adventure 5-6 attractions per day. Keep a day inside one cluster.
+6. Activity types: 'hotel', 'food', 'sightseeing', 'travel', 'rest'.
+{f"7. EVENT-FOCUSED TRIP: block the {event.get('event_type', 'event')} hours at {event.get('event_location', 'the venue')}; only minimal sightseeing." if event.get('has_event') else ""}"""
+            },
+            {
+                "role": "user",
+                "content": f"""Create {1 if day else days}-day itinerary for {trip_details['destination']}.
+{f"- Day: {day} of {days}" if day else ""}
+- Origin: {trip_details.get('origin', 'Not specified')}
+- Destination: {trip_details['destination']}
+- Round Trip: {trip_details.get('is_round_trip', False)}
+- Budget: ₹{trip_details['budget']}
+- Travelers: {trip_details.get('travelers', {}).get('adults', 2)} adults, {trip_details.get('travelers', {}).get('children', 0)} children
+- Travel Style: {preferences.get('travel_style', 'balanced')}
+- Dietary: {preferences.get('dietary', [])}
+- Transport Mode: {preferences.get('transport_mode', 'flexible')}
+
+Available Places:
+{json.dumps(places_data)}"""
+            }
+        ]
+    
+    def _full_itinerary_messages(
+        self, 
+        trip_details: Dict[str, Any], 
+        places_data: List[Dict],
+        clusters: Dict[str, List[Dict]] = None
+    ) -> List[Dict[str, str]]:
+        """Full instruction set for balanced and thorough modes"""
+        return [
             {
                 "role": "system",
                 "content": f"""You are an expert travel planner. Create a detailed day-wise itinerary.
@@ -271,7 +524,7 @@ VALIDATION: Before returning your response, verify that EVERY restaurant name ap
 7. Mention transport tips based on transport_mode
 
 Available Places (PRIORITIZE category='attraction'):
-{json.dumps(places_data[:100])}
+{json.dumps(places_data)}
 
 📊 GEOGRAPHIC CLUSTERS AVAILABLE:
 {json.dumps({k: [p["name"] for p in v] for k, v in (clusters or {}).items()}, indent=2) if clusters else "No clustering data"}
@@ -342,8 +595,6 @@ Day 1: Heritage temple (2 hrs) → Historical monument (2 hrs) → Traditional l
 Focus on: Natural beauty > Activities > Culture > Limited religious sites"""
             }
         ]
-        
-        return await self.generate_json(messages)
     
     async def validate_budget(
         self, 
@@ -0,0 +1,89 @@
+import os
+import asyncio
+import socket
+from typing import List, Optional
+from agents.orchestrator import orchestrator
+from database.job_store import job_store, JobStore
+from models.schemas import PlanRequest
+
+
+class PlanWorkerPool:
+    """
+    Plan Worker Pool
+    Async workers that claim queued plan jobs from the job store and run them
+    through the orchestrator, at most `count` at a time per process. Runs in
+    the web process (PLAN_WORKERS) or on its own via worker.py, so the number
+    of workers scales separately from the web tier. Job store calls are
+    blocking SQLite and run in a thread so they never stall the event loop.
+    """
+
+    # Workers per process when PLAN_WORKERS is unset (web tier and worker.py alike)
+    DEFAULT_WORKERS = 2
+
+    # Idle workers check the queue this often (submits in the same process wake them at once)
+    POLL_SECONDS = 0.5
+    # Expired jobs are deleted this often
+    PURGE_SECONDS = 600
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self.tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+
+    def start(self, count: Optional[int] = None) -> int:
+        """Start the workers (default PLAN_WORKERS) and return how many are running"""
+        count = int(os.getenv("PLAN_WORKERS", str(self.DEFAULT_WORKERS))) if count is None else count
+        self._wake = asyncio.Event()
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        self.tasks = [asyncio.create_task(self._work(f"{prefix}-{index}")) for index in range(count)]
+        if count:
+            self.tasks.append(asyncio.create_task(self._purge()))
+            print(f"👷 Plan workers started: {count}")
+        return count
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def notify(self) -> None:
+        """A job was queued: wake an idle worker without waiting for the next poll"""
+        if self._wake:
+            self._wake.set()
+
+    async def _work(self, worker: str) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim, worker)
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.run_job(job)
+
+    async def run_job(self, job) -> None:
+        print(f"👷 Running plan job {job['jobId']} (attempt {job['attempts']})")
+        try:
+            request = PlanRequest(**job["request"])
+            result = await orchestrator.create_travel_plan(**request.orchestrator_args())
+            await asyncio.to_thread(self.store.complete, job["jobId"], result)
+        except asyncio.CancelledError:
+            # Shutting down: the lease runs out and another worker picks the job up
+            raise
+        except Exception as e:
+            print(f"❌ Plan job {job['jobId']} failed: {e}")
+            await asyncio.to_thread(self.store.fail, job["jobId"], str(e))
+
+    async def _purge(self) -> None:
+        while True:
+            removed = await asyncio.to_thread(self.store.purge_expired)
+            if removed:
+                print(f"🧹 Purged {removed} expired plan job(s)")
+            await asyncio.sleep(self.PURGE_SECONDS)
+
+
+# Singleton instance
+plan_workers = PlanWorkerPool(job_store)
@@ -0,0 +1,121 @@
+import asyncio
+from typing import Dict, Any, List, Tuple
+
+
+class QueryPlanner:
+    """
+    Query Planner
+    Turns a style's weighted category list into as few Mappls searches as possible:
+    near-synonyms are merged into one query, queries run in weight order and
+    fetching stops once the attraction quota and diversity target are met.
+    """
+
+    # Synonym groups: combined query -> categories it answers
+    # Only names for the same kind of place are merged (distinct activities such as
+    # rafting or paragliding keep their own search). The first member is the
+    # broadest search and is what actually gets sent.
+    SYNONYM_GROUPS = {
+        "temple": ["temple", "ancient temple", "peaceful temple"],
+        "park": ["park", "garden", "botanical garden"],
+        "monument": ["monument", "heritage site", "historical site", "archaeological site"],
+        "lake": ["lake", "sacred lake"],
+        "river": ["river", "holy river"],
+        "wildlife sanctuary": ["wildlife sanctuary", "national park"],
+        "boat ride": ["boat ride", "cruise"],
+        "market": ["market", "traditional market", "shopping"],
+        "viewpoint": ["viewpoint", "sunset point"]
+    }
+
+    # Queries sent concurrently before checking the stop condition
+    BATCH_SIZE = 3
+
+    def __init__(self):
+        # Reverse index: category -> synonym group
+        self.group_for = {
+            member: group
+            for group, members in self.SYNONYM_GROUPS.items()
+            for member in members
+        }
+
+    def plan(self, categories: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Merge categories into combined queries ordered by total weight"""
+        queries: Dict[str, Dict[str, Any]] = {}
+        for category, weight in categories.items():
+            group = self.group_for.get(category, category)
+            query = queries.setdefault(group, {"query": group, "categories": [], "weight": 0, "limit": 0})
+            query["categories"].append(category)
+            query["weight"] += weight
+            # Keep as many results as the members would have kept together
+            query["limit"] += weight
+
+        return sorted(queries.values(), key=lambda q: q["weight"], reverse=True)
+
+    async def fetch(
+        self,
+        travel_api,
+        destination: str,
+        categories: Dict[str, int],
+        max_attractions: int = 30,
+        min_groups: int = 4
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Run the planned queries until the quota and diversity targets are met"""
+        planned = self.plan(categories)
+        min_groups = min(min_groups, len(planned))
+
+        places: Dict[str, Dict[str, Any]] = {}
+        groups_used = set()
+        stats = {
+            "categories": len(categories),
+            "queries_planned": len(planned),
+            "queries_issued": 0,
+            "cache_hits": 0
+        }
+
+        for start in range(0, len(planned), self.BATCH_SIZE):
+            batch = planned[start:start + self.BATCH_SIZE]
+            results = await asyncio.gather(*(
+                self._run_query(travel_api, destination, query, stats) for query in batch
+            ))
+
+            added = 0
+            for query, results_for_query in zip(batch, results):
+                for place in results_for_query[:query["limit"]]:
+                    if place["name"] not in places:
+                        places[place["name"]] = place
+                        groups_used.add(query["query"])
+                        added += 1
+
+            if len(places) >= max_attractions and len(groups_used) >= min_groups:
+                break
+            if added == 0:
+                # Destination is saturated: further queries only return duplicates
+                break
+
+        stats["groups"] = len(groups_used)
+        print(
+            f"🧭 Query planner: {stats['queries_issued']} searches, {stats['cache_hits']} cache hits "
+            f"(from {stats['categories']} categories, {stats['queries_planned']} merged queries)"
+        )
+        return list(places.values())[:max_attractions], stats
+
+    async def _run_query(
+        self,
+        travel_api,
+        destination: str,
+        query: Dict[str, Any],
+        stats: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Serve a query from its cached group search, else call the API"""
+        # Only the group's own (broadest) search may answer it: a cached narrower
+        # member such as "peaceful temple" would cut "temple" down to a subset
+        cached = travel_api.get_cached_places(destination, query["query"])
+        if cached is not None:
+            stats["cache_hits"] += 1
+            return cached
+
+        stats["queries_issued"] += 1
+        return await travel_api.search_places(destination, query["query"])
+
+
+# Singleton instance
+query_planner = QueryPlanner()
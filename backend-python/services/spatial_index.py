@@ -0,0 +1,182 @@
+import os
+import math
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from utils.geo import coordinates_array, haversine_km
+from services.destinations import destinations
+
+
+class SpatialIndex:
+    """
+    Spatial Index
+    Uniform lat/lng grid over a set of places for k-nearest, radius and
+    bounding-box queries. Places without coordinates are kept out of the grid.
+    """
+
+    # Grid cell edge (km); city-scale searches touch only a handful of cells
+    CELL_KM = 2.0
+
+    def __init__(self, places: List[Dict[str, Any]]):
+        self.places = places
+        self.coords, valid = coordinates_array(places)
+        self.located = np.flatnonzero(valid)
+
+        self.cell_lat = self.CELL_KM / 111.0
+        mean_lat = float(np.mean(self.coords[self.located, 0])) if len(self.located) else 0.0
+        self.cell_lng = self.CELL_KM / (111.0 * max(math.cos(math.radians(mean_lat)), 0.1))
+
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        for index in self.located:
+            self.cells.setdefault(self._cell(*self.coords[index]), []).append(int(index))
+
+    def __len__(self) -> int:
+        return len(self.located)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 5,
+        category: Optional[str] = None,
+        max_km: Optional[float] = None,
+        exclude: Optional[set] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Up to k (place, km) pairs closest to a point, nearest first"""
+        if not len(self.located):
+            return []
+        row, col = self._cell(lat, lng)
+        # Widest ring that can matter: the whole grid, or the search radius
+        max_ring = self._max_ring(row, col) if max_km is None else int(math.ceil(max_km / self.CELL_KM)) + 1
+
+        found: List[Tuple[float, int]] = []
+        for ring in range(max_ring + 1):
+            candidates = self._ring(row, col, ring)
+            found.extend(self._filter(candidates, lat, lng, category, max_km, exclude))
+            found.sort()
+            # Anything in later rings is at least ring * CELL_KM away
+            if len(found) >= k and found[k - 1][0] <= ring * self.CELL_KM:
+                break
+
+        return [(self.places[index], round(km, 2)) for km, index in found[:k]]
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        category: Optional[str] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """All (place, km) pairs within radius_km of a point, nearest first"""
+        row, col = self._cell(lat, lng)
+        rings = int(math.ceil(radius_km / self.CELL_KM)) + 1
+        candidates = [
+            index
+            for ring in range(rings + 1)
+            for index in self._ring(row, col, ring)
+        ]
+        found = sorted(self._filter(candidates, lat, lng, category, radius_km))
+        return [(self.places[index], round(km, 2)) for km, index in found]
+
+    def in_bbox(
+        self,
+        min_lat: float,
+        min_lng: float,
+        max_lat: float,
+        max_lng: float,
+        category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Places inside a lat/lng bounding box"""
+        low_row, low_col = self._cell(min_lat, min_lng)
+        high_row, high_col = self._cell(max_lat, max_lng)
+        results = []
+        for row in range(low_row, high_row + 1):
+            for col in range(low_col, high_col + 1):
+                for index in self.cells.get((row, col), []):
+                    lat, lng = self.coords[index]
+                    if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng and self._in_category(index, category):
+                        results.append(self.places[index])
+        return results
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_lat)), int(math.floor(lng / self.cell_lng))
+
+    def _ring(self, row: int, col: int, ring: int) -> List[int]:
+        """Place indexes in the square ring of cells at Chebyshev distance ring"""
+        if ring == 0:
+            return list(self.cells.get((row, col), []))
+        indexes = []
+        for d_row in range(-ring, ring + 1):
+            step = 1 if abs(d_row) == ring else 2 * ring
+            for d_col in range(-ring, ring + 1, step):
+                indexes.extend(self.cells.get((row + d_row, col + d_col), []))
+        return indexes
+
+    def _max_ring(self, row: int, col: int) -> int:
+        return max(max(abs(r - row), abs(c - col)) for r, c in self.cells)
+
+    def _filter(
+        self,
+        candidates: List[int],
+        lat: float,
+        lng: float,
+        category: Optional[str],
+        max_km: Optional[float],
+        exclude: Optional[set] = None
+    ) -> List[Tuple[float, int]]:
+        """(km, index) for candidates passing the category/distance/exclusion filters"""
+        candidates = [
+            i for i in candidates
+            if self._in_category(i, category) and not (exclude and self.places[i].get("name") in exclude)
+        ]
+        if not candidates:
+            return []
+        km = haversine_km(lat, lng, self.coords[candidates, 0], self.coords[candidates, 1])
+        return [
+            (float(distance), index)
+            for distance, index in zip(np.atleast_1d(km), candidates)
+            if max_km is None or distance <= max_km
+        ]
+
+    def _in_category(self, index: int, category: Optional[str]) -> bool:
+        return category is None or self.places[index].get("category", category) == category
+
+
+class SpatialIndexCache:
+    """
+    Spatial indexes per (destination ID, category), least recently used first.
+    An index is reused only for the same version of the cached search it was
+    built from (see TravelAPIService.cache_version); uncached lists are indexed
+    on every call.
+    """
+
+    def __init__(self):
+        self.max_indexes = int(os.getenv("SPATIAL_INDEX_CACHE_SIZE", "256"))
+        self._indexes: "OrderedDict[Tuple[str, str], Tuple[int, SpatialIndex]]" = OrderedDict()
+
+    def get(
+        self,
+        destination: str,
+        category: str,
+        places: List[Dict[str, Any]],
+        version: Optional[int] = None
+    ) -> SpatialIndex:
+        if version is None:
+            return SpatialIndex(places)
+
+        key = (destinations.destination_id(destination), category)
+        entry = self._indexes.get(key)
+        if entry and entry[0] == version and entry[1].places is places:
+            self._indexes.move_to_end(key)
+            return entry[1]
+
+        index = SpatialIndex(places)
+        self._indexes[key] = (version, index)
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_indexes:
+            self._indexes.popitem(last=False)
+        return index
+
+
+# Singleton instance
+spatial_indexes = SpatialIndexCache()
@@ -1,8 +1,15 @@
 import os
+import time
+import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
+import itertools
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 from utils.logger import log_data
+from utils.deadline import clamp_timeout
+from services.gazetteer import gazetteer
+from services.destinations import destinations
 
 load_dotenv()
 
@@ -21,6 +28,15 @@ class TravelAPIService:
         self.access_token = None
         self.token_expiry = None
         
+        # Search results cache: (destination ID, category) -> (expires_at, version, places), least recently used first.
+        # Every store gets a new version so derived data (spatial indexes) can tell a refreshed entry apart
+        self.place_cache_ttl = int(os.getenv("PLACE_CACHE_TTL", str(6 * 3600)))
+        self.place_cache_size = int(os.getenv("PLACE_CACHE_SIZE", "2000"))
+        self._place_cache: "OrderedDict[Tuple[str, str], Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._cache_versions = itertools.count(1)
+        # Searches still finishing for a caller that went away (see _detached)
+        self._detached_searches: set = set()
+        
         if self.mappls_client_id and self.mappls_client_secret:
             print("✅ Mappls API initialized")
         else:
@@ -44,7 +60,7 @@ class TravelAPIService:
                         "client_id": self.mappls_client_id,
                         "client_secret": self.mappls_client_secret
                     },
-                    timeout=10.0
+                    timeout=clamp_timeout(10.0)
                 )
                 
                 if response.status_code == 200:
@@ -61,21 +77,62 @@ class TravelAPIService:
             print(f"❌ Token generation error: {e}")
             return None
     
+    def _cache_key(self, destination: str, category: str) -> Tuple[str, str]:
+        # "Bangalore", "bengaluru " and "Indiranagar, Bangalore" share one entry
+        return (destinations.destination_id(destination), category.strip().lower())
+    
+    def get_cached_places(self, destination: str, category: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached search results if present and fresh"""
+        key = self._cache_key(destination, category)
+        entry = self._place_cache.get(key)
+        if not entry:
+            return None
+        expires_at, _, places = entry
+        if time.time() > expires_at:
+            del self._place_cache[key]
+            return None
+        self._place_cache.move_to_end(key)
+        return places
+
+    def cache_version(self, destination: str, category: str) -> Optional[int]:
+        """Version of the fresh cached search, None when it isn't cached (mock data, expired)"""
+        entry = self._place_cache.get(self._cache_key(destination, category))
+        if not entry or time.time() > entry[0]:
+            return None
+        return entry[1]
+    
+    def _store_places(self, destination: str, category: str, places: List[Dict[str, Any]]):
+        """Cache real API results (mock fallbacks are never cached)"""
+        now = time.time()
+        # Drop expired entries, then the least recently used ones over the size limit
+        for key in [key for key, (expires_at, _, _) in self._place_cache.items() if expires_at < now]:
+            del self._place_cache[key]
+        key = self._cache_key(destination, category)
+        self._place_cache[key] = (now + self.place_cache_ttl, next(self._cache_versions), places)
+        self._place_cache.move_to_end(key)
+        while len(self._place_cache) > self.place_cache_size:
+            self._place_cache.popitem(last=False)
+    
     async def search_hotels(
         self, 
         destination: str, 
         budget_range: str = "mid_range"
     ) -> List[Dict[str, Any]]:
         """Search for hotels using Mappls API"""
-        # Map budget range to keywords
+        return await self.search_places(destination, self.hotel_keyword(budget_range))
+
+    def hotel_keyword(self, budget_range: str = "mid_range") -> str:
+        """Search keyword (and cache category) for a budget range"""
         keywords = {
             "budget": "cheap hotel",
             "mid_range": "hotel",
             "luxury": "luxury hotel 5 star"
         }
-        keyword = keywords.get(budget_range, "hotel")
-        
-        return await self.search_places(destination, keyword)
+        return keywords.get(budget_range, "hotel")
+
+    def restaurant_keyword(self, dietary: str = "any") -> str:
+        """Search keyword (and cache category) for a dietary preference"""
+        return "vegetarian restaurant" if dietary and "veg" in str(dietary).lower() else "restaurant"
 
 
 
@@ -89,6 +146,15 @@ class TravelAPIService:
             print(f"⚠️ Mappls API not configured, using mock data for {destination}")
             return self._get_mock_places(destination)
         
+        cached = self.get_cached_places(destination, category)
+        if cached is not None:
+            print(f"⚡ Cache hit: {category} for {destination}")
+            return cached
+        
+        return await self._detached(self._fetch_places(destination, category))
+    
+    async def _fetch_places(self, destination: str, category: str) -> List[Dict[str, Any]]:
+        """Mappls search for one category (cached on success, mock data on failure)"""
         try:
             print(f"🗺️  Fetching real {category} for {destination}...")
             
@@ -110,7 +176,7 @@ class TravelAPIService:
                         "location": destination,
                         "access_token": access_token
                     },
-                    timeout=15.0
+                    timeout=clamp_timeout(15.0)
                 )
                 
                 if response.status_code == 200:
@@ -122,6 +188,7 @@ class TravelAPIService:
                     print(f"✅ Found {len(places)} real places ({category})")
                     if places:
                         print(f"🔍 First place: {places[0].get('name')}")
+                        self._store_places(destination, category, places)
                     return places if places else self._get_mock_places(destination)
                 elif response.status_code == 403:
                     print("❌ Mappls API returned 403 Forbidden - using mock data")
@@ -145,6 +212,12 @@ class TravelAPIService:
             print(f"⚠️ Mappls API not configured, using mock restaurants for {destination}")
             return self._get_mock_restaurants(destination)
         
+        keyword = self.restaurant_keyword(dietary)
+        cached = self.get_cached_places(destination, keyword)
+        if cached is not None:
+            print(f"⚡ Cache hit: {keyword} for {destination}")
+            return cached
+        
         try:
             print(f"🍽️  Fetching real restaurants for {destination}...")
             
@@ -154,8 +227,15 @@ class TravelAPIService:
                 print("❌ Failed to get Mappls access token, using mock data")
                 return self._get_mock_restaurants(destination)
             
-            keyword = "vegetarian restaurant" if dietary and "veg" in str(dietary).lower() else "restaurant"
-            
+            return await self._detached(self._fetch_restaurants(destination, keyword, access_token))
+                    
+        except Exception as e:
+            print(f"❌ Restaurant search error: {e}, using mock data")
+            return self._get_mock_restaurants(destination)
+    
+    async def _fetch_restaurants(self, destination: str, keyword: str, access_token: str) -> List[Dict[str, Any]]:
+        """Mappls restaurant search (cached on success, mock data on failure)"""
+        try:
             async with httpx.AsyncClient() as client:
                 response = await client.get(
                     f"{self.mappls_base_url}/search/json",
@@ -164,7 +244,7 @@ class TravelAPIService:
                         "region": "IND",
                         "access_token": access_token
                     },
-                    timeout=10.0
+                    timeout=clamp_timeout(10.0)
                 )
                 if response.status_code == 200:
                     data = response.json()
@@ -175,6 +255,7 @@ class TravelAPIService:
                     print(f"✅ Found {len(restaurants)} real restaurants")
                     if restaurants:
                         print(f"🔍 First restaurant: {restaurants[0].get('name')}")
+                        self._store_places(destination, keyword, restaurants)
                     return restaurants if restaurants else self._get_mock_restaurants(destination)
                 elif response.status_code == 403:
                     print("❌ Mappls API returned 403 Forbidden - using mock data")
@@ -189,8 +270,23 @@ class TravelAPIService:
             return self._get_mock_restaurants(destination)
 
     
+    async def _detached(self, search) -> List[Dict[str, Any]]:
+        """
+        Run a search that outlives its caller: if the request is cancelled (client gone,
+        deadline), a search already sent to Mappls still finishes into the cache for the
+        retry instead of being thrown away. Searches not yet started are never sent.
+        """
+        task = asyncio.create_task(search)
+        self._detached_searches.add(task)
+        task.add_done_callback(self._detached_searches.discard)
+        return await asyncio.shield(task)
+    
     async def _geocode_destination(self, destination: str) -> Optional[Dict[str, float]]:
-        """Geocode destination to get coordinates (deprecated - not used in current flow)"""
+        """Geocode destination to get coordinates (bundled gazetteer first, then Mappls)"""
+        coordinates = gazetteer.coordinates(destination)
+        if coordinates:
+            return {"lat": coordinates[0], "lng": coordinates[1]}
+        
         try:
             access_token = await self._get_access_token()
             if not access_token:
@@ -203,7 +299,7 @@ class TravelAPIService:
                         "address": destination,
                         "access_token": access_token
                     },
-                    timeout=10.0
+                    timeout=clamp_timeout(10.0)
                 )
                 
                 if response.status_code == 200:
@@ -392,7 +488,7 @@ class TravelAPIService:
                     "location": {"lat": 10.2850, "lng": 76.5700}
                 }
             ],
-            "himachal pradesh": [
+            "himachal-pradesh": [
                 {
                     "name": "Rohtang Pass",
                     "address": "Manali-Leh Highway, Himachal Pradesh",
@@ -412,16 +508,19 @@ class TravelAPIService:
             ]
         }
         
-        destination_lower = destination.lower()
-        for key in mock_places:
-            if key in destination_lower or destination_lower in key:
+        # Keyed by destination ID, then state ("Munnar" -> kerala, "Manali" -> himachal-pradesh)
+        for key in (destinations.destination_id(destination), destinations.state_id(destination)):
+            if key in mock_places:
                 return mock_places[key]
         
         return mock_places["goa"]
     
+    # Mock restaurants sit around the destination's gazetteer point (degrees)
+    MOCK_RESTAURANT_OFFSETS = [(0.004, 0.003), (-0.006, 0.002), (0.002, -0.005), (-0.003, -0.004)]
+    
     def _get_mock_restaurants(self, destination: str) -> List[Dict[str, Any]]:
         """Mock restaurants with Indian names"""
-        return [
+        restaurants = [
             {
                 "name": "Sattvam - Pure Veg Restaurant",
                 "address": f"Main Market, {destination}",
@@ -459,6 +558,13 @@ class TravelAPIService:
                 "price_level": 2
             }
         ]
+        
+        # Offline geocoding keeps mock meals routable near the destination
+        centre = gazetteer.coordinates(destination)
+        if centre:
+            for restaurant, (d_lat, d_lng) in zip(restaurants, self.MOCK_RESTAURANT_OFFSETS):
+                restaurant["location"] = {"lat": round(centre[0] + d_lat, 6), "lng": round(centre[1] + d_lng, 6)}
+        return restaurants
 
 
 # Singleton instance
@@ -0,0 +1,124 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes.budget import router
+from agents.budget_agent import budget_agent
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+ITINERARY = [
+    {"day": 1, "activities": [
+        {"type": "food", "name": "Breakfast at Cafe Bodega", "description": "Breakfast"},
+        {"type": "sightseeing", "name": "Fort Aguada"},
+        {"type": "activity", "name": "Scuba diving at Grande Island"},
+        {"type": "food", "name": "Dinner at Britto's", "description": "Dinner"}
+    ]},
+    {"day": 2, "activities": [
+        {"type": "food", "name": "Lunch at Ritz Classic", "description": "Lunch"},
+        {"type": "sightseeing", "name": "Goa State Museum"}
+    ]}
+]
+TRIP = {"destination": "Goa", "origin": "Bengaluru", "budget": 30000}
+
+
+def trip_details(days=2, adults=2, tier="mid_range", mode="flexible"):
+    return {
+        **TRIP,
+        "duration": {"days": days},
+        "travelers": {"adults": adults, "children": 0},
+        "preferences": {"accommodation_type": tier, "transport_mode": mode}
+    }
+
+
+def test_scenarios():
+    print("🧪 Testing /api/budget/scenarios...")
+    response = client.post("/api/budget/scenarios", json={
+        **TRIP,
+        "itinerary": ITINERARY,
+        "accommodation_types": ["budget", "luxury", "mid_range"],
+        "transport_modes": ["public_transport", "flexible"],
+        "travelers": [1, 2],
+        "durations": [2, 4]
+    })
+    assert response.status_code == 200, response.text
+    matrix = response.json()
+    totals = matrix["totals"]
+    assert matrix["axes"]["days"] == [2, 4]
+    assert (len(totals), len(totals[0]), len(totals[0][0]), len(totals[0][0][0])) == (3, 2, 2, 2)
+
+    # Every cell is the sum of its components and rises with tier, group size and length
+    for t, m, p, d in [(0, 0, 0, 0), (1, 1, 1, 1), (2, 1, 1, 0)]:
+        assert totals[t][m][p][d] == sum(values[t][m][p][d] for values in matrix["breakdown"].values())
+    assert totals[0][0][0][0] < totals[1][0][0][0]
+    assert totals[2][1][0][0] < totals[2][1][1][0] < totals[2][1][1][1]
+    cheapest = matrix["cheapest"]
+    assert cheapest["total"] == min(v for a in totals for b in a for c in b for v in c)
+    assert (cheapest["accommodation"], cheapest["travelers"], cheapest["days"]) == ("budget", 1, 2)
+
+    # The planned scenario costs what the budget agent validates for the plan
+    validation = asyncio.run(budget_agent.process(ITINERARY, TRIP["budget"], trip_details()))
+    assert totals[2][1][1][0] == validation["estimated"], (totals[2][1][1][0], validation["estimated"])
+    assert matrix["withinBudget"][2][1][1][0] == validation["withinBudget"]
+    print(f"✅ 24 scenarios, ₹{cheapest['total']:,}-₹{max(v for a in totals for b in a for c in b for v in c):,}")
+
+    # Defaults: every tier and mode, 1-4 travelers, a couple of days either side of the plan
+    response = client.post("/api/budget/scenarios", json={**TRIP, "itinerary": ITINERARY, "days": 3})
+    assert response.json()["axes"]["days"] == [1, 2, 3, 4, 5]
+    assert response.json()["axes"]["travelers"] == [1, 2, 3, 4]
+
+    assert client.post("/api/budget/scenarios", json={**TRIP, "itinerary": []}).status_code == 422
+    invalid_tier = {**TRIP, "itinerary": ITINERARY, "accommodation_types": ["palace"]}
+    assert client.post("/api/budget/scenarios", json=invalid_tier).status_code == 422
+    print("✅ Default axes and request validation")
+
+
+def test_patch():
+    print("\n🧪 Testing /api/budget/patch...")
+    validation = asyncio.run(budget_agent.process(ITINERARY, TRIP["budget"], trip_details()))
+    removed = ITINERARY[0]["activities"][2]
+    added = {"type": "sightseeing", "name": "Basilica of Bom Jesus"}
+    response = client.post("/api/budget/patch", json={
+        **TRIP,
+        "days": 2,
+        "ledger": validation["ledger"],
+        "operations": [
+            {"op": "remove", "activity": removed},
+            {"op": "add", "activity": added},
+            {"op": "set_nights", "value": 2},
+            {"op": "set_travelers", "adults": 3}
+        ]
+    })
+    assert response.status_code == 200, response.text
+    patched = response.json()
+    assert patched["days"] == 3 and patched["travelers"] == {"adults": 3, "children": 0}
+
+    # Same result as validating the edited plan from scratch
+    edited = [
+        {**day, "activities": [a for a in day["activities"] if a is not removed] + ([added] if day["day"] == 2 else [])}
+        for day in ITINERARY
+    ]
+    full = asyncio.run(budget_agent.process(edited, TRIP["budget"], trip_details(days=3, adults=3)))
+    assert patched["budgetValidation"]["breakdown"] == full["breakdown"], (patched["budgetValidation"]["breakdown"], full["breakdown"])
+    assert patched["budgetValidation"]["ledger"] == full["ledger"]
+    print(f"✅ Patched ₹{validation['estimated']:,} -> ₹{patched['budgetValidation']['estimated']:,}, same as re-validating")
+
+    base = {**TRIP, "days": 2, "ledger": validation["ledger"]}
+    for operations, status in [
+        ([{"op": "remove"}], 400),
+        ([{"op": "replace", "activity": removed}], 400),
+        ([{"op": "set_nights"}], 400),
+        ([{"op": "rename", "activity": removed}], 422),
+        ([], 422)
+    ]:
+        response = client.post("/api/budget/patch", json={**base, "operations": operations})
+        assert response.status_code == status, (operations, response.status_code, response.text)
+    broken = {**base, "ledger": {"meals": {}}, "operations": [{"op": "add", "activity": added}]}
+    assert client.post("/api/budget/patch", json=broken).status_code == 400
+    print("✅ Incomplete edits and invalid ledgers are rejected")
+
+
+if __name__ == "__main__":
+    test_scenarios()
+    test_patch()
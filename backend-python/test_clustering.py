@@ -0,0 +1,54 @@
+import os
+
+# Select the offline provider before the service singletons are created
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from agents.itinerary_agent import itinerary_agent
+
+
+def place(name, lat=None, lng=None):
+    return {"name": name, "location": {"lat": lat, "lng": lng}} if lat is not None else {"name": name}
+
+
+def test_zones():
+    print("🧪 Testing k-medoids zones...")
+    north = [place(f"Beach {i}", 15.55 + i * 0.005, 73.75 + i * 0.004) for i in range(4)]
+    south = [place(f"Church {i}", 15.25 + i * 0.005, 73.95 + i * 0.004) for i in range(4)]
+    far = place("Dudhsagar Falls", 15.3144, 74.3144 + 1.5)
+    lost = place("Hidden Cove")
+
+    result = itinerary_agent._cluster_places_by_location(north + south + [far, lost], days=2, destination="Goa")
+    clusters, index = result["clusters"], result["index"]
+
+    # One zone per day, each holding one area; the far point and the unlocated one get their own zones
+    regular = [zone for zone in clusters if zone not in ("Outskirts", "Unlocated")]
+    assert len(regular) == 2, clusters.keys()
+    assert len({index[p["name"]] for p in north}) == 1 and len({index[p["name"]] for p in south}) == 1
+    assert index["Beach 0"] != index["Church 0"]
+    assert index["Dudhsagar Falls"] == "Outskirts" and index["Hidden Cove"] == "Unlocated"
+
+    # Unlocated is centred on the destination's gazetteer point, flagged as approximate
+    assert result["centroids"]["Unlocated"]["approximate"]
+    assert abs(result["centroids"]["Unlocated"]["lat"] - 15.4909) < 1e-6
+    assert result["centroids"]["Outskirts"]["size"] == 1
+    print(f"✅ Zones: {', '.join(f'{zone}({len(places)})' for zone, places in clusters.items())}")
+
+
+def test_small_and_unlocated_sets():
+    print("\n🧪 Testing clustering edge cases...")
+    # Fewer than two places per day: fewer zones than days
+    result = itinerary_agent._cluster_places_by_location(
+        [place("A", 12.97, 77.59), place("B", 12.98, 77.60), place("C", 12.99, 77.61)], days=3
+    )
+    assert len(result["clusters"]) == 1 and result["centroids"][next(iter(result["clusters"]))]["size"] == 3
+
+    # Nothing located and an unknown destination: one Unlocated zone without a centre
+    result = itinerary_agent._cluster_places_by_location([place("X"), place("Y")], days=2, destination="Atlantis")
+    assert list(result["clusters"]) == ["Unlocated"] and "Unlocated" not in result["centroids"]
+    assert itinerary_agent._cluster_places_by_location([], days=2) == {"clusters": {}, "centroids": {}, "index": {}}
+    print("✅ Small sets, unlocated places, empty input")
+
+
+if __name__ == "__main__":
+    test_zones()
+    test_small_and_unlocated_sets()
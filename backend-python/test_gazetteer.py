@@ -0,0 +1,58 @@
+from services.gazetteer import gazetteer
+from services.destinations import destinations
+
+
+def test_noise_word_aliases():
+    print("🧪 Testing aliases and names that contain noise words...")
+    expected = {
+        "Pink City": "jaipur",
+        "Blue City": "jodhpur",
+        "Golden City": "jaisalmer",
+        "City of Lakes": "udaipur",
+        "Goa State": "goa",
+        "Hitec City": "hyderabad",
+        "Hitech City": "hyderabad",
+        "Electronic City": "bengaluru",
+        "Bangalore city": "bengaluru",
+        "Goa, India": "goa"
+    }
+    for query, destination_id in expected.items():
+        assert destinations.destination_id(query) == destination_id, (query, destinations.destination_id(query))
+    assert destinations.canonicalize("Electronic City")["rolledUpFrom"] == "Electronic City"
+
+    # Aliases are indexed verbatim, so "pink city" doesn't claim every "Pink ..." place
+    assert destinations.destination_id("Pink Beach, Goa") == "goa"
+    assert destinations.destination_id("Pink Lake") == "pink-lake"
+    assert gazetteer.lookup("Pink Beach") is None
+    assert destinations.destination_id("Lake City") == "lake-city"
+    print(f"✅ {len(expected)} names resolved, generic words never match alone")
+
+
+def test_state_regions():
+    print("\n🧪 Testing that states don't resolve to one of their cities...")
+    assert destinations.destination_id("Himachal Pradesh") == "himachal-pradesh"
+    assert destinations.destination_id("Himachal") == "himachal-pradesh"
+    assert destinations.destination_id("Shimla") == "shimla"
+    assert destinations.destination_id("Kerala") == "kerala"
+    assert destinations.state_id("Manali") == "himachal-pradesh"
+    assert gazetteer.distance_km("Bengaluru", "Himachal Pradesh") is not None
+    print("✅ Himachal Pradesh and Kerala are their own regions")
+
+
+def test_neighbourhood_roll_up():
+    print("\n🧪 Testing neighbourhood roll-up...")
+    assert destinations.destination_id("Salt Lake") == "kolkata"
+    assert destinations.destination_id("Bidhannagar") == "kolkata"
+    assert destinations.destination_id("Salt Lake, Kolkata") == "kolkata"
+    assert destinations.destination_id("Indiranagar, Bangalore") == "bengaluru"
+    # Only a neighbourhood's full name or alias rolls up to its city
+    assert destinations.destination_id("Salt Lake City") == "salt-lake"
+    assert not destinations.canonicalize("Salt Lake City")["known"]
+    assert destinations.destination_id("Koramangala 5th Block, Bangalore") == "bengaluru"
+    print("✅ Partial neighbourhood names don't borrow a city's caches")
+
+
+if __name__ == "__main__":
+    test_noise_word_aliases()
+    test_state_regions()
+    test_neighbourhood_roll_up()
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from services.llm_providers import GeminiProvider
+from services.llm_service import llm_service
+
+CALL_SECONDS = 0.2
+
+
+class StubChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubStream:
+    async def __aiter__(self):
+        for text in ('{"ok"', ': true}'):
+            await asyncio.sleep(CALL_SECONDS / 2)
+            yield StubChunk(text)
+
+
+class StubModel:
+    """Gemini model stand-in: the async API waits like a network call, the sync API blocks the thread"""
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        if stream:
+            return StubStream()
+        await asyncio.sleep(CALL_SECONDS)
+        return StubChunk('{"ok": true}')
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        time.sleep(CALL_SECONDS)
+        return StubChunk('{"ok": true}')
+
+
+async def test_gemini_calls_overlap():
+    print("🧪 Testing that concurrent Gemini calls don't block each other...")
+    provider = GeminiProvider()
+    provider._tier_models = {tier: StubModel() for tier in provider.model_tiers}
+    llm_service.set_provider(provider)
+
+    async def streamed():
+        return "".join([chunk async for chunk in provider.stream("prompt")])
+
+    messages = [{"role": "user", "content": "plan"}]
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(llm_service.generate_json(messages, model_tier=tier) for tier in ("lite", "standard", "pro")),
+        streamed(),
+        streamed()
+    )
+    elapsed = time.perf_counter() - start
+
+    # Variants and per-day itinerary calls rely on these overlapping
+    assert results[:3] == [{"ok": True}] * 3 and results[3] == '{"ok": true}'
+    assert elapsed < CALL_SECONDS * 2, f"calls ran one after another ({elapsed:.2f}s)"
+    print(f"✅ 5 concurrent calls in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_gemini_calls_overlap())
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes.places import router
+from services.travel_api import travel_api
+from services.spatial_index import spatial_indexes
+
+app = FastAPI()
+app.include_router(router)
+client = TestClient(app)
+
+RESTAURANTS = [
+    {"name": "Fisherman's Wharf", "location": {"lat": 15.5000, "lng": 73.8300}},
+    {"name": "Vinayak Family Restaurant", "location": {"lat": 15.5600, "lng": 73.7600}},
+    {"name": "Gunpowder", "location": {"lat": 15.5900, "lng": 73.7400}},
+    {"name": "No Coordinates Cafe"}
+]
+ATTRACTIONS = [
+    {"name": "Baga Beach", "location": {"lat": 15.5559, "lng": 73.7516}},
+    {"name": "Fort Aguada", "location": {"lat": 15.4909, "lng": 73.7730}},
+    {"name": "Dudhsagar Waterfalls", "location": {"lat": 15.3144, "lng": 74.3144}}
+]
+
+
+@contextmanager
+def cached_searches():
+    """Serve the routes from seeded cache entries instead of Mappls, then restore the singletons"""
+    credentials = (travel_api.mappls_client_id, travel_api.mappls_client_secret)
+    place_cache = travel_api._place_cache.copy()
+    indexes, max_indexes = spatial_indexes._indexes.copy(), spatial_indexes.max_indexes
+    travel_api.mappls_client_id = credentials[0] or "test"
+    travel_api.mappls_client_secret = credentials[1] or "test"
+    travel_api._store_places("Goa", "restaurant", list(RESTAURANTS))
+    travel_api._store_places("Goa", "tourist attraction", list(ATTRACTIONS))
+    try:
+        yield
+    finally:
+        travel_api.mappls_client_id, travel_api.mappls_client_secret = credentials
+        travel_api._place_cache.clear()
+        travel_api._place_cache.update(place_cache)
+        spatial_indexes._indexes.clear()
+        spatial_indexes._indexes.update(indexes)
+        spatial_indexes.max_indexes = max_indexes
+
+
+def test_nearby():
+    print("🧪 Testing /api/places/nearby...")
+    with cached_searches():
+        response = client.get("/api/places/nearby", params={"destination": "Goa", "lat": 15.556, "lng": 73.752, "k": 2})
+        assert response.status_code == 200, response.text
+        results = response.json()["results"]
+        assert [r["name"] for r in results] == ["Vinayak Family Restaurant", "Gunpowder"], results
+        assert results[0]["distanceKm"] <= results[1]["distanceKm"]
+
+        response = client.get(
+            "/api/places/nearby",
+            params={"destination": "Goa", "lat": 15.556, "lng": 73.752, "radius_km": 5}
+        )
+        assert [r["name"] for r in response.json()["results"]] == ["Vinayak Family Restaurant", "Gunpowder"]
+
+        assert client.get("/api/places/nearby", params={"destination": "Goa", "lat": 95, "lng": 73.7}).status_code == 422
+    print("✅ Nearest first, radius filter, coordinate validation")
+
+
+def test_within():
+    print("\n🧪 Testing /api/places/within...")
+    with cached_searches():
+        box = {"destination": "Goa", "min_lat": 15.4, "min_lng": 73.7, "max_lat": 15.6, "max_lng": 73.8}
+        response = client.get("/api/places/within", params=box)
+        assert response.status_code == 200, response.text
+        assert sorted(r["name"] for r in response.json()["results"]) == ["Baga Beach", "Fort Aguada"]
+
+        inverted = {**box, "min_lat": 15.7}
+        assert client.get("/api/places/within", params=inverted).status_code == 400
+    print("✅ Bounding box filter and validation")
+
+
+def test_index_cache():
+    print("\n🧪 Testing spatial index reuse...")
+    with cached_searches():
+        key = ("goa", "restaurant:restaurant")
+        params = {"destination": "Goa", "lat": 15.556, "lng": 73.752, "k": 1}
+        client.get("/api/places/nearby", params=params)
+        first = spatial_indexes._indexes[key]
+        client.get("/api/places/nearby", params=params)
+        assert spatial_indexes._indexes[key] is first, "index rebuilt for the same cached search"
+
+        # A refreshed search is a new version, so the index is rebuilt from it
+        travel_api._store_places("Goa", "restaurant", RESTAURANTS + [
+            {"name": "Baga Shack", "location": {"lat": 15.5560, "lng": 73.7517}}
+        ])
+        response = client.get("/api/places/nearby", params=params)
+        assert response.json()["results"][0]["name"] == "Baga Shack"
+        assert spatial_indexes._indexes[key][0] > first[0]
+
+        # Uncached lists are never kept, and the cache stays bounded
+        spatial_indexes.get("Goa", "restaurant:uncached", RESTAURANTS)
+        assert ("goa", "restaurant:uncached") not in spatial_indexes._indexes
+        spatial_indexes.max_indexes = 2
+        for version, city in enumerate(["Pune", "Agra", "Delhi"], start=1):
+            spatial_indexes.get(city, "attraction", ATTRACTIONS, version)
+        assert list(spatial_indexes._indexes) == [("agra", "attraction"), ("delhi", "attraction")]
+    print("✅ Reused per cache version, rebuilt on refresh, bounded")
+
+
+if __name__ == "__main__":
+    test_nearby()
+    test_within()
+    test_index_cache()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Select the offline provider before the service singletons are created
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes import jobs
+from database.job_store import JobStore
+from services.plan_workers import PlanWorkerPool, plan_workers
+from services.fake_llm_provider import FakeLLMProvider
+from services.llm_service import llm_service
+
+app = FastAPI()
+app.include_router(jobs.router)
+client = TestClient(app)
+
+RESULT = {"destination": "Goa", "itinerary": [{"day": 1, "activities": []}]}
+
+
+@contextmanager
+def temp_store():
+    """Point the routes and worker pool at a fresh database, then restore the singletons"""
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    previous = (jobs.job_store, plan_workers.store)
+    jobs.job_store = plan_workers.store = store
+    try:
+        yield store
+    finally:
+        jobs.job_store, plan_workers.store = previous
+
+
+def read_events(response):
+    """(event, data) pairs from a server-sent events response"""
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_queue():
+    print("🧪 Testing plan job queue...")
+    llm_service.set_provider(FakeLLMProvider(seed=7))
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    pool = PlanWorkerPool(store)
+
+    job = store.submit({"query": "3 day trip to Goa"})
+    claimed = store.claim("worker-a")
+    assert claimed["jobId"] == job["jobId"] and claimed["status"] == "running"
+    assert store.claim("worker-b") is None, "a job must only be claimed once"
+
+    asyncio.run(pool.run_job(claimed))
+    done = store.get(job["jobId"])
+    assert done["status"] == "done" and len(done["result"]["itinerary"]) == 3
+
+    # A job whose worker died is picked up again once its lease runs out
+    lost = store.submit({"query": "2 day trip to Goa"})
+    store.LEASE_SECONDS = 0
+    store.claim("worker-a")
+    retried = store.claim("worker-b")
+    assert retried["jobId"] == lost["jobId"] and retried["attempts"] == 2
+    print("✅ Submit, single claim, result stored, lost job re-queued")
+
+
+def test_routes():
+    print("\n🧪 Testing /api/plan/jobs...")
+    with temp_store() as store:
+        response = client.post("/api/plan/jobs", json={"query": "3 day trip to Goa"})
+        assert response.status_code == 202, response.text
+        submitted = response.json()
+        job_id = submitted["jobId"]
+        assert submitted["status"] == "queued"
+        assert submitted["pollUrl"] == f"/api/plan/jobs/{job_id}"
+
+        polled = client.get(submitted["pollUrl"]).json()
+        assert polled["status"] == "queued" and "request" not in polled
+        assert client.post("/api/plan/jobs", json={"query": ""}).status_code == 400
+        assert client.get("/api/plan/jobs/missing").status_code == 404
+
+        # The stream reports the running job, then the result once a worker finishes it
+        store.claim("worker-a")
+        finish = threading.Timer(0.2, store.complete, (job_id, RESULT))
+        finish.start()
+        events = read_events(client.get(submitted["eventsUrl"]))
+        finish.join()
+        assert [event for event, _ in events] == ["status", "done"], events
+        assert events[0][1]["status"] == "running" and events[1][1]["result"] == RESULT
+        assert client.get(submitted["pollUrl"]).json()["result"] == RESULT
+
+        failed = store.submit({"query": "2 day trip to Goa"})
+        store.fail(failed["jobId"], "LLM unavailable")
+        events = read_events(client.get(f"/api/plan/jobs/{failed['jobId']}/events"))
+        assert [event for event, _ in events] == ["failed"] and events[0][1]["error"] == "LLM unavailable", events
+        assert client.get("/api/plan/jobs/missing/events").status_code == 404
+    print("✅ Submit, poll, status and result events, 400/404")
+
+
+def test_expiry():
+    print("\n🧪 Testing job TTL and purge...")
+    with temp_store() as store:
+        live = store.submit({"query": "3 day trip to Goa"})
+        expired = store.submit({"query": "2 day trip to Goa"})
+        # Finished jobs live for the TTL from when they finish
+        store.ttl = -1
+        store.complete(expired["jobId"], RESULT)
+        store.ttl = 3600
+
+        # Expired jobs are gone for clients before they are purged
+        assert client.get(f"/api/plan/jobs/{expired['jobId']}").status_code == 404
+        assert client.get(f"/api/plan/jobs/{expired['jobId']}/events").status_code == 404
+        assert client.get(f"/api/plan/jobs/{live['jobId']}").status_code == 200
+
+        assert store.purge_expired() == 1
+        assert store.purge_expired() == 0
+        assert store.get(live["jobId"]) and store.queue_depth() == 1
+    print("✅ Expired jobs hidden, then purged; live jobs kept")
+
+
+if __name__ == "__main__":
+    test_queue()
+    test_routes()
+    test_expiry()
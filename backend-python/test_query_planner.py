@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+# Select the offline provider before the service singletons are created
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from services.query_planner import query_planner
+from services.travel_api import TravelAPIService
+
+
+def test_synonym_groups():
+    print("🧪 Testing query merging...")
+    planned = query_planner.plan({"temple": 3, "ancient temple": 2, "rafting": 2, "paragliding": 1, "restaurant": 1, "cafe": 1})
+    queries = {q["query"]: q for q in planned}
+
+    # Only true synonyms share a search; activities keep the term the style asked for
+    assert queries["temple"]["categories"] == ["temple", "ancient temple"] and queries["temple"]["limit"] == 5
+    assert {"rafting", "paragliding", "restaurant", "cafe"} <= queries.keys(), queries.keys()
+    assert planned[0]["query"] == "temple"
+    print(f"✅ {len(queries)} searches for 6 categories")
+
+
+def test_place_cache_bounds():
+    print("\n🧪 Testing place cache size and expiry...")
+    api = TravelAPIService()
+    api.place_cache_size = 3
+    for city in ("Goa", "Mumbai", "Jaipur"):
+        api._store_places(city, "temple", [{"name": f"{city} Temple"}])
+
+    # A read refreshes Goa, so Mumbai is the least recently used when a fourth city arrives
+    assert api.get_cached_places("Goa", "temple")
+    api._store_places("Delhi", "temple", [{"name": "Delhi Temple"}])
+    assert api.get_cached_places("Mumbai", "temple") is None
+    assert api.get_cached_places("Goa", "temple") and len(api._place_cache) == 3
+
+    # Expired entries are swept on the next write even if never read again
+    api.place_cache_size = 10
+    api.place_cache_ttl = -1
+    api._store_places("Pune", "temple", [])
+    api.place_cache_ttl = 3600
+    api._store_places("Agra", "temple", [{"name": "Agra Temple"}])
+    assert ("pune", "temple") not in api._place_cache and len(api._place_cache) == 4, list(api._place_cache)
+    print("✅ LRU eviction at the size limit, expired entries swept on write")
+
+
+def test_narrower_cache_not_reused():
+    print("\n🧪 Testing that a narrower cached search never answers its group...")
+    api = TravelAPIService()
+    api.mappls_client_id = api.mappls_client_secret = "test"
+    api._store_places("Goa", "peaceful temple", [{"name": "Quiet Shrine"}])
+    sent = []
+
+    async def search_places(destination, category="tourist attraction"):
+        sent.append(category)
+        return [{"name": "Shri Mangueshi Temple"}, {"name": "Quiet Shrine"}]
+
+    api.search_places = search_places
+    places, stats = asyncio.run(query_planner.fetch(api, "Goa", {"temple": 2, "peaceful temple": 1}, min_groups=1))
+    assert sent == ["temple"] and stats["cache_hits"] == 0, (sent, stats)
+    assert [p["name"] for p in places] == ["Shri Mangueshi Temple", "Quiet Shrine"]
+
+    # The broad search itself is reused
+    api._store_places("Goa", "temple", places)
+    _, stats = asyncio.run(query_planner.fetch(api, "Goa", {"peaceful temple": 1}, min_groups=1))
+    assert stats["cache_hits"] == 1 and sent == ["temple"], (sent, stats)
+    print("✅ \"peaceful temple\" cache ignored, \"temple\" cache reused")
+
+
+if __name__ == "__main__":
+    test_synonym_groups()
+    test_place_cache_bounds()
+    test_narrower_cache_not_reused()
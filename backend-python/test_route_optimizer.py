@@ -0,0 +1,53 @@
+from agents.route_optimizer import route_optimizer
+
+
+def stop(name, time, lat, lng, activity_type="sightseeing"):
+    return {"name": name, "time": time, "type": activity_type, "location": {"name": name, "lat": lat, "lng": lng}}
+
+
+def test_two_opt_route_stats():
+    print("🧪 Testing 2-opt stop ordering...")
+    # Stops along a line, listed zigzagging between the ends
+    day = {"day": 1, "activities": [
+        stop("Hotel Breakfast", "08:30 AM", 15.50, 73.80, "food"),
+        stop("Far", "09:30 AM", 15.50, 73.90),
+        stop("Near", "10:30 AM", 15.50, 73.82),
+        stop("Farther", "11:30 AM", 15.50, 73.94),
+        stop("Middle", "12:30 PM", 15.50, 73.86),
+        stop("Lunch", "01:30 PM", 15.50, 73.96, "food"),
+        stop("Museum", "03:00 PM", 15.50, 73.70),
+        {"name": "Hidden Cove", "time": "04:30 PM", "type": "sightseeing", "location": {"name": "Hidden Cove"}},
+        stop("Dinner", "07:30 PM", 15.50, 73.70, "food")
+    ]}
+    route_optimizer.optimize([day])
+    names = [a["name"] for a in day["activities"]]
+
+    # Stops between two anchors are walked outward; meals keep their position and time
+    assert names[:6] == ["Hotel Breakfast", "Near", "Middle", "Far", "Farther", "Lunch"], names
+    assert [a["time"] for a in day["activities"][:6]] == ["08:30 AM", "09:30 AM", "10:30 AM", "11:30 AM", "12:30 PM", "01:30 PM"]
+    assert names[6:] == ["Museum", "Hidden Cove", "Dinner"]
+
+    stats = day["routeStats"]
+    assert stats["distanceKmAfter"] < stats["distanceKmBefore"]
+    assert stats["savedKm"] == round(stats["distanceKmBefore"] - stats["distanceKmAfter"], 1)
+    print(f"✅ {stats['distanceKmBefore']} km → {stats['distanceKmAfter']} km")
+
+
+def test_already_optimal_and_unlocated():
+    print("\n🧪 Testing days that need no reordering...")
+    ordered = {"activities": [
+        stop("A", "09:00 AM", 12.90, 77.50),
+        stop("B", "10:00 AM", 12.90, 77.52),
+        stop("C", "11:00 AM", 12.90, 77.54)
+    ]}
+    unlocated = {"activities": [{"name": "Somewhere", "type": "sightseeing"}]}
+    route_optimizer.optimize([ordered, unlocated])
+    assert [a["name"] for a in ordered["activities"]] == ["A", "B", "C"]
+    assert ordered["routeStats"]["savedKm"] == 0
+    assert unlocated["routeStats"] == {"distanceKmBefore": 0.0, "distanceKmAfter": 0.0, "savedKm": 0.0}
+    print("✅ Model order kept when already shortest; unlocated days report zero")
+
+
+if __name__ == "__main__":
+    test_two_opt_route_stats()
+    test_already_optimal_and_unlocated()
@@ -0,0 +1,109 @@
+import time
+from agents.timeline_engine import timeline_engine, parse_time
+
+
+def stop(name, time, duration, lat, lng, activity_type="sightseeing", cost=0):
+    return {
+        "name": name, "time": time, "duration": duration, "type": activity_type, "estimatedCost": cost,
+        "location": {"name": name, "lat": lat, "lng": lng}
+    }
+
+
+def test_anchors_hold():
+    print("🧪 Testing that meals and travel keep their planned times...")
+    day = {"day": 1, "totalCost": 1500, "activities": [
+        stop("Breakfast", "08:30 AM", "1 hour", 15.50, 73.80, "food", 300),
+        stop("Fort", "09:30 AM", "2 hours", 15.50, 73.82),
+        stop("Museum", "11:30 AM", "2 hours", 15.50, 73.84),
+        stop("Lunch", "01:00 PM", "1 hour", 15.50, 73.84, "food", 400),
+        stop("Waterfall", "02:00 PM", "3 hours", 15.31, 74.31, cost=400),
+        stop("Beach", "05:00 PM", "2 hours", 15.50, 73.85),
+        stop("Dinner", "07:30 PM", "1 hour", 15.50, 73.85, "food", 400),
+        stop("Return to Bengaluru", "09:00 PM", "10 hours", 15.50, 73.85, "travel")
+    ]}
+    timeline_engine.schedule([day])
+    by_name = {a["name"]: a for a in day["activities"]}
+
+    # Sightseeing is shortened or dropped so the anchors stay put
+    assert [by_name[name]["time"] for name in ("Breakfast", "Lunch", "Dinner", "Return to Bengaluru")] == \
+        ["08:30 AM", "01:00 PM", "07:30 PM", "09:00 PM"]
+    assert "Waterfall" not in by_name and day["timeline"]["dropped"] == ["Waterfall"]
+    assert day["totalCost"] == 1100, "dropped activity still counted"
+    assert day["timeline"]["compressed"] >= 1 and day["timeline"]["conflicts"] == 0
+
+    # Nothing overlaps and every stop ends before its next anchor
+    times = [(parse_time(a["time"]), parse_time(a["endTime"])) for a in day["activities"][:-1]]
+    assert all(end <= following[0] for (_, end), following in zip(times, times[1:])), times
+    print(f"✅ {day['timeline']['compressed']} shortened, dropped {day['timeline']['dropped']}")
+
+
+def test_day_end_resolved():
+    print("\n🧪 Testing days that would run past midnight...")
+    day = {"day": 1, "activities": [
+        stop("Dinner", "09:00 PM", "1 hour", 12.97, 77.59, "food"),
+        stop("Night Market", "10:00 PM", "2 hours", 12.97, 77.60),
+        stop("Late Show", "11:30 PM", "1.5 hours", 12.97, 77.61)
+    ]}
+    timeline_engine.schedule([day])
+    names = [a["name"] for a in day["activities"]]
+    assert not any(a.get("overrun") for a in day["activities"]), day["activities"]
+    assert not day["timeline"]["overrun"] and day["timeline"]["dropped"], day["timeline"]
+    print(f"✅ Kept {names}, dropped {day['timeline']['dropped']}")
+
+
+def test_opening_run_starts_on_time():
+    print("\n🧪 Testing a first activity that overruns the next anchor...")
+    day = {"day": 1, "activities": [
+        stop("Fort", "09:00 AM", "4 hours", 15.50, 73.80),
+        stop("Lunch", "10:00 AM", "1 hour", 15.50, 73.81, "food")
+    ]}
+    # Used to be moved to minus infinity and crash formatting the time
+    timeline_engine.schedule([day])
+    assert day["timeline"]["dropped"] == ["Fort"] and day["activities"][0]["time"] == "10:00 AM"
+    print(f"✅ Dropped {day['timeline']['dropped']}")
+
+
+def week(fits=True):
+    """Seven days like the ones the planners produce; fits=False adds a stop no day has time for"""
+    days = []
+    for n in range(1, 8):
+        activities = [
+            stop("Breakfast", "08:30 AM", "1 hour", 15.50, 73.80, "food"),
+            stop("Fort", "09:45 AM", "2 hours", 15.50, 73.82),
+            stop("Museum", "12:00 PM", "1 hour", 15.50, 73.84),
+            stop("Lunch", "01:30 PM", "1 hour", 15.50, 73.84, "food"),
+            stop("Beach", "03:00 PM", "2 hours", 15.50, 73.85),
+            stop("Dinner", "07:30 PM", "1 hour", 15.50, 73.85, "food")
+        ]
+        if not fits:
+            activities.insert(5, stop("Waterfall", "05:00 PM", "3 hours", 15.31, 74.31))
+        days.append({"day": n, "activities": activities})
+    return days
+
+
+def test_schedule_speed():
+    print("\n🧪 Testing scheduling speed for a week-long plan...")
+    # Days that fit as planned are placed together in one vectorized pass
+    columns = timeline_engine._columns([day["activities"] for day in week()], {}, "flexible")
+    assert timeline_engine._place_pinned(columns)["fits"].all()
+
+    timings = {}
+    for fits in (True, False):
+        plans = [week(fits) for _ in range(50)]
+        started = time.perf_counter()
+        for plan in plans:
+            timeline_engine.schedule(plan)
+        timings[fits] = (time.perf_counter() - started) / len(plans) * 1000
+        assert all(day["timeline"]["dropped"] == ([] if fits else ["Waterfall"]) for day in plans[0])
+
+    # Generous bounds (about 1 ms and 3 ms here) so slow CI machines don't flake
+    assert timings[True] < 5, f"{timings[True]:.2f} ms for a 7-day plan"
+    assert timings[False] < 15, f"{timings[False]:.2f} ms for a 7-day plan with drops"
+    print(f"✅ 7 days in {timings[True]:.2f} ms, {timings[False]:.2f} ms with a drop per day")
+
+
+if __name__ == "__main__":
+    test_anchors_hold()
+    test_day_end_resolved()
+    test_opening_run_starts_on_time()
+    test_schedule_speed()
@@ -0,0 +1,68 @@
+import os
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Iterator
+
+# Default end-to-end budget for one plan request
+DEFAULT_DEADLINE_MS = int(os.getenv("PLAN_DEADLINE_MS", "60000"))
+
+# Absolute time.monotonic() deadline of the request being served (None = unbounded).
+# Context variables follow asyncio tasks, so every agent and service call made
+# on behalf of the request sees the same deadline without passing it around.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request's deadline passed before the operation could start or finish"""
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[float]) -> Iterator[Optional[float]]:
+    """Bound everything inside the block to timeout_ms from now (None = unbounded)"""
+    deadline = None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left before the deadline (None without one, never negative)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, (deadline - time.monotonic()) * 1000)
+
+
+def clamp_timeout(seconds: float) -> float:
+    """A call's own timeout, cut to the time the request has left"""
+    left = remaining_ms()
+    if left is None:
+        return seconds
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(seconds, left / 1000)
+
+
+async def within_deadline(awaitable, seconds: Optional[float] = None):
+    """Await with the request's remaining time (and an optional own timeout) as the limit"""
+    left = remaining_ms()
+    if left is not None:
+        if left <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded("Request deadline exceeded")
+        seconds = left / 1000 if seconds is None else min(seconds, left / 1000)
+    if seconds is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=seconds)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Timed out after {seconds:.1f}s")
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any, Awaitable
+
+# How often the plan endpoints check whether the client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class ClientDisconnected(Exception):
+    """The client closed the connection before the response was ready"""
+
+
+async def cancel_on_disconnect(request, work: Awaitable[Any], poll_seconds: float = DISCONNECT_POLL_SECONDS) -> Any:
+    """
+    Await `work`, cancelling it as soon as the client of `request` goes away.
+    Cancellation reaches every agent stage, LLM call and pending search the work started.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("🛑 Client disconnected, cancelling plan")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
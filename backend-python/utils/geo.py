@@ -0,0 +1,66 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """Great-circle distance in km (inputs broadcast like NumPy arrays)"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_matrix_km(coords: np.ndarray) -> np.ndarray:
+    """Pairwise haversine distances for an (n, 2) array of lat/lng"""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    lat, lng = coords[:, 0], coords[:, 1]
+    return haversine_km(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+
+
+def get_coordinates(place: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Return (lat, lng) for a place, or None when missing or a 0/0 placeholder"""
+    location = place.get("location") or {}
+    try:
+        lat, lng = float(location.get("lat")), float(location.get("lng"))
+    except (TypeError, ValueError):
+        return None
+    if not (np.isfinite(lat) and np.isfinite(lng)) or (lat == 0 and lng == 0):
+        return None
+    return lat, lng
+
+
+def coordinates_array(places: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(n, 2) array of coordinates (NaN where missing) and a boolean validity mask"""
+    coords = np.full((len(places), 2), np.nan)
+    for i, place in enumerate(places):
+        point = get_coordinates(place)
+        if point:
+            coords[i] = point
+    return coords, ~np.isnan(coords[:, 0])
+
+
+def build_coordinate_lookup(places: List[Dict[str, Any]]) -> Dict[str, Tuple[float, float]]:
+    """Normalized place name -> (lat, lng) for places with coordinates"""
+    return {
+        place["name"].strip().lower(): point
+        for place in places or []
+        if place.get("name") and (point := get_coordinates(place))
+    }
+
+
+def resolve_coordinates(
+    activity: Dict[str, Any],
+    lookup: Dict[str, Tuple[float, float]]
+) -> Optional[Tuple[float, float]]:
+    """Coordinates from the activity itself, else from the lookup by location or activity name"""
+    point = get_coordinates(activity)
+    if point:
+        return point
+    for name in ((activity.get("location") or {}).get("name"), activity.get("name")):
+        if name and name.strip().lower() in lookup:
+            return lookup[name.strip().lower()]
+    return None
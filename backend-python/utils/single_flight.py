@@ -0,0 +1,51 @@
+import asyncio
+from typing import Dict, Any, Hashable, Callable, Awaitable, Tuple
+
+
+class SingleFlight:
+    """
+    Request Coalescing
+    Concurrent calls with the same key share one execution of the work: the
+    first caller starts it, later callers wait for the same result. The work
+    runs in its own task, so a caller that goes away doesn't cancel it for
+    the others; it is cancelled only once every caller has gone. Nothing is
+    kept after it finishes (this is not a cache).
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Dict[str, Any]] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        work: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """(result, shared): shared is True when another caller's execution was joined"""
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            # The task copies the caller's context (deadline included)
+            flight = {"task": asyncio.create_task(work()), "waiters": 0}
+            self._flights[key] = flight
+            flight["task"].add_done_callback(lambda _: self._forget(key, flight))
+        flight["waiters"] += 1
+        try:
+            return await asyncio.shield(flight["task"]), shared
+        except asyncio.CancelledError:
+            if flight["task"].done():
+                raise
+            flight["waiters"] -= 1
+            if not flight["waiters"]:
+                flight["task"].cancel()
+            raise
+
+    def joining(self, key: Hashable) -> bool:
+        """Whether a call with this key now would join a running execution"""
+        return key in self._flights
+
+    def _forget(self, key: Hashable, flight: Dict[str, Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,23 @@
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.plan_workers import plan_workers
+
+
+async def main():
+    """Run plan job workers without the web tier (scale with PLAN_WORKERS and more processes)"""
+    count = plan_workers.start()
+    print(f"🚀 TripAI plan worker running {count} worker(s) on {plan_workers.store.path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await plan_workers.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 Plan worker stopped")